@@ -0,0 +1,423 @@
+"""Benchmark suite for ISHARATI PRO.
+
+Covers the diagnostic engine, the analytics storage/statistics, the analytics
+page render, PDF generation, the speed-test download endpoint and the cold
+import of index.py. Results are emitted as JSON so that runs from different
+releases can be diffed:
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick            # skip the 100k cases
+    python benchmarks/run_benchmarks.py --only analyze_network
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# All test-client requests share one address: lift the per-client limits and concurrency caps
+for name in ('ISHARATI_RATE_LIMIT_CHEAP', 'ISHARATI_RATE_LIMIT_EXPENSIVE', 'ISHARATI_RATE_LIMIT_SPEED_TEST',
+             'ISHARATI_HEAVY_CONCURRENCY', 'ISHARATI_SPEED_TEST_CONCURRENCY'):
+    os.environ.setdefault(name, '0')
+
+import index  # noqa: E402
+
+OPERATORS = ["Mobilis", "Djezzy", "Ooredoo"]
+WILAYAS = ["Alger", "Oran", "Constantine", "Blida", "Setif", "Tizi Ouzou"]
+PLACES = ["Indoor", "Outdoor"]
+
+
+def measure(func, repeats=5, warmup=1):
+    """Run func repeatedly and return timing statistics in seconds"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {
+        'unit': 's',
+        'repeats': repeats,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'max': max(timings),
+    }
+
+
+def synthetic_input(rng):
+    speed = None
+    if rng.random() < 0.7:
+        speed = {
+            'download': round(rng.uniform(0.5, 80), 2),
+            'upload': round(rng.uniform(0.1, 20), 2),
+            'ping': round(rng.uniform(10, 200), 2),
+        }
+    return {
+        'lat': 36.70 + rng.random() * 0.12,
+        'lon': 3.00 + rng.random() * 0.20,
+        'rsrp': rng.randint(-125, -70),
+        'sinr': rng.randint(-5, 25),
+        'network': rng.choice(["4G", "3G"]),
+        'operator': rng.choice(OPERATORS),
+        'place': rng.choice(PLACES),
+        'wilaya': rng.choice(WILAYAS),
+        'city': "City",
+        'speed_data': speed,
+    }
+
+
+def analyze(data):
+    return index.analyze_network(data['lat'], data['lon'], data['rsrp'], data['sinr'], data['network'],
+                                 data['operator'], data['place'], data['wilaya'], data['city'], data['speed_data'])
+
+
+def save(data):
+    return index.save_analytics_record(analyze(data), data['lat'], data['lon'])
+
+
+def reset_history():
+    index.analytics_history.clear()
+
+
+def populate_history(count, seed=0):
+    reset_history()
+    rng = random.Random(seed)
+    for _ in range(count):
+        save(synthetic_input(rng))
+
+
+def synthetic_towers(count, rng):
+    return [{"name": f"BTS-{i}", "lat": 36.5 + rng.random() * 0.6, "lon": 2.8 + rng.random() * 0.6,
+             "operator": OPERATORS[i % len(OPERATORS)]} for i in range(count)]
+
+
+# ==================== CASES ====================
+def bench_analyze_network(quick):
+    """Analysis cost against the number of towers.
+
+    ``analyze_network`` times the uncached analysis, so it stays comparable
+    across the memoisation; ``analyze_network_cached`` times repeat calls
+    once the LRU cache holds every input (cleared for each tower list,
+    since the key does not include BTS_LIST).
+    """
+    rng = random.Random(1)
+    inputs = [synthetic_input(rng) for _ in range(200)]
+    original = index.BTS_LIST
+    results = []
+
+    def uncached():
+        for d in inputs:
+            index._analyze_network(d['lat'], d['lon'], d['rsrp'], d['sinr'], d['network'], d['operator'],
+                                   d['place'], d['wilaya'], d['city'], d['speed_data'])
+    try:
+        for towers in (5, 50, 500) if quick else (5, 50, 500, 5000):
+            index.BTS_LIST = synthetic_towers(towers, rng)
+            index.analysis_cache.clear()
+            for name, func in (('analyze_network', uncached),
+                               ('analyze_network_cached', lambda: [analyze(d) for d in inputs])):
+                stats = measure(func)
+                stats['per_call_us'] = stats['median'] / len(inputs) * 1e6
+                results.append({'name': name, 'params': {'bts': towers, 'calls': len(inputs)}, **stats})
+    finally:
+        index.BTS_LIST = original
+        index.analysis_cache.clear()
+    return results
+
+
+def bench_analytics(quick):
+    results = []
+    client = index.app.test_client()
+    for count in (1_000, 10_000) if quick else (1_000, 10_000, 100_000):
+        started = time.perf_counter()
+        populate_history(count)
+        ingest = time.perf_counter() - started
+        results.append({'name': 'save_analytics_record', 'params': {'records': count}, 'unit': 's',
+                        'repeats': 1, 'median': ingest, 'per_call_us': ingest / count * 1e6})
+        results.append({'name': 'get_analytics_stats', 'params': {'records': count},
+                        **measure(index.get_analytics_stats)})
+        results.append({'name': 'group_stats', 'params': {'records': count, 'by': 'wilaya', 'operator': 'Mobilis'},
+                        **measure(lambda: index.analytics_columns.group_stats(
+                            'wilaya', index.analytics_columns.mask(operator='Mobilis')))})
+
+        results.append({'name': 'trend_series', 'params': {'records': count, 'granularity': 'hour', 'by': 'operator'},
+                        **measure(lambda: index.analytics_rollups.series('hour', 'operator'))})
+
+        def render():
+            response = client.get('/analytics')
+            assert response.status_code == 200
+            render.size = len(response.data)
+        render_stats = measure(render, repeats=3 if count >= 100_000 else 5)
+        results.append({'name': 'analytics_page', 'params': {'records': count}, 'bytes': render.size, **render_stats})
+    reset_history()
+    return results
+
+
+def bench_record_memory(quick):
+    """Heap bytes per record: the bare record against its expanded dict form, then the store and each index.
+
+    The record itself is measured apart from everything indexing it, and each
+    secondary index is filled on a fresh instance, so a memory regression can
+    be traced to the structure (and the request) that introduced it.
+    """
+    count = 2_000 if quick else 10_000
+    rng = random.Random(3)
+    inputs = [synthetic_input(rng) for _ in range(count)]
+    diagnoses = [(analyze(data), data['lat'], data['lon']) for data in inputs]
+    created = time.time()
+
+    def traced(build):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del kept
+        return used / count
+
+    records = [index.AnalyticsRecord(f"{i:08x}", created + i, diagnosis, lat, lon)
+               for i, (diagnosis, lat, lon) in enumerate(diagnoses)]
+    compact = traced(lambda: [index.AnalyticsRecord(f"{i:08x}", created + i, diagnosis, lat, lon)
+                              for i, (diagnosis, lat, lon) in enumerate(diagnoses)])
+    expanded = traced(lambda: [record.to_dict() for record in records])
+    results = [{'name': 'record_memory', 'params': {'records': count}, 'unit': 'bytes/record',
+                'compact': compact, 'expanded': expanded, 'ratio': expanded / compact}]
+
+    def filled(structure):
+        for record in records:
+            structure.add(record)
+        return structure
+    results.append({'name': 'index_memory', 'params': {'records': count, 'structure': 'AnalyticsStore'},
+                    'unit': 'bytes/record', 'bytes': traced(lambda: filled(index.AnalyticsStore(capacity=count)))})
+    for secondary in index.ANALYTICS_INDEXES:
+        kind = type(secondary)
+        results.append({'name': 'index_memory', 'params': {'records': count, 'structure': kind.__name__},
+                        'unit': 'bytes/record', 'bytes': traced(lambda: filled(kind()))})
+    return results
+
+
+def bench_history_log(quick):
+    """Journalled save throughput, group-commit factor, write amplification and recovery time"""
+    count = 2_000 if quick else 20_000
+    writers = 4
+    rng = random.Random(5)
+    inputs = [synthetic_input(rng) for _ in range(count)]
+    diagnoses = [(analyze(data), data['lat'], data['lon']) for data in inputs]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        reset_history()
+        journal = index.HistoryJournal(directory, snapshot_every=count // 4)
+        journal.recover(index.analytics_history)
+
+        def write(chunk):
+            for diagnosis, lat, lon in chunk:
+                index.save_analytics_record(diagnosis, lat, lon)
+
+        threads = [threading.Thread(target=write, args=(diagnoses[i::writers],)) for i in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        while journal._snapshotting:
+            time.sleep(0.01)
+        stats = journal.stats()
+        results.append({'name': 'history_log_write', 'params': {'records': count, 'writers': writers},
+                        'unit': 's', 'median': elapsed, 'per_call_us': elapsed / count * 1e6,
+                        'fsyncs': stats['fsyncs'], 'entries_per_fsync': stats['entries_per_fsync'],
+                        'log_bytes': stats['log_bytes'], 'snapshot_bytes': stats['snapshot_bytes'],
+                        'write_amplification': stats['write_amplification']})
+
+        # Recover into an empty store, as a restarted process would
+        index.analytics_history.journal = None
+        reset_history()
+        recovered = index.HistoryJournal(directory).recover(index.analytics_history)
+        index.analytics_history.journal = None
+        results.append({'name': 'history_log_recovery', 'params': {'records': count}, 'unit': 's',
+                        'median': recovered['seconds'], 'snapshot_rows': recovered['snapshot_rows'],
+                        'log_entries': recovered['log_entries'], 'records': recovered['records']})
+    reset_history()
+    return results
+
+
+def bench_export(quick):
+    """Streaming export throughput and time to the first chunk"""
+    count = 10_000 if quick else 100_000
+    populate_history(count)
+    client = index.app.test_client()
+    results = []
+    for fmt, query in (('csv', ''), ('ndjson', ''), ('csv', '?gzip=1')):
+        def first_chunk():
+            response = client.get(f'/api/analytics/export.{fmt}{query}', buffered=False)
+            next(iter(response.response))
+            response.close()
+
+        def full():
+            return sum(len(chunk) for chunk in index.export_stream(index.analytics_history.iter_records(), fmt,
+                                                                   bool(query)))
+
+        size = full()
+        results.append({'name': 'export_first_chunk', 'params': {'records': count, 'format': fmt + query},
+                        **measure(first_chunk)})
+        results.append({'name': 'export_full', 'params': {'records': count, 'format': fmt + query, 'bytes': size},
+                        **measure(full, repeats=3)})
+    reset_history()
+    return results
+
+
+def bench_pdf(quick):
+    data = synthetic_input(random.Random(2))
+    report = analyze(data).report_data()
+    return [{'name': 'generate_advanced_pdf', 'params': {}, **measure(lambda: index.generate_advanced_pdf(report))}]
+
+
+def bench_message_rendering(quick):
+    """Session payload size (codes vs. rendered texts) and the cost of rendering on display"""
+    rng = random.Random(4)
+    diagnoses = [analyze(synthetic_input(rng)) for _ in range(200 if quick else 2000)]
+
+    def rendered(diagnosis):
+        return dict(diagnosis.report_data(), summary=diagnosis.summary,
+                    technical_explanation=diagnosis.technical_explanation,
+                    recommendations=diagnosis.recommendations, short_recommendation=diagnosis.short_recommendation)
+
+    codes_bytes = sum(len(json.dumps(d.to_codes())) for d in diagnoses) / len(diagnoses)
+    rendered_bytes = sum(len(json.dumps(rendered(d))) for d in diagnoses) / len(diagnoses)
+    return [
+        {'name': 'session_payload', 'params': {'diagnoses': len(diagnoses)}, 'unit': 'bytes',
+         'codes': codes_bytes, 'rendered': rendered_bytes, 'ratio': rendered_bytes / codes_bytes},
+        {'name': 'render_messages', 'params': {'diagnoses': len(diagnoses)},
+         **measure(lambda: [rendered(d) for d in diagnoses])},
+    ]
+
+
+def bench_download_test(quick):
+    client = index.app.test_client()
+    requests_per_run = 5
+
+    def download():
+        for _ in range(requests_per_run):
+            response = client.get('/api/download-test')
+            download.size = len(response.data)
+    stats = measure(download, repeats=3)
+    stats['mb_per_s'] = download.size * requests_per_run / stats['median'] / 1e6
+    return [{'name': 'download_test', 'params': {'requests': requests_per_run, 'bytes': download.size}, **stats}]
+
+
+def bench_asgi_transfers(quick):
+    """Concurrent speed-test downloads served natively by the ASGI entry point"""
+    transfers = 50 if quick else 500
+
+    async def one():
+        received = 0
+        messages = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            return messages.pop() if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal received
+            received += len(message.get('body', b''))
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/download-test', 'query_string': b'',
+                 'headers': [], 'client': ('127.0.0.1', 0)}
+        await index.asgi_app(scope, receive, send)
+        return received
+
+    async def many():
+        return await asyncio.gather(*(one() for _ in range(transfers)))
+
+    def run():
+        run.sizes = asyncio.run(many())
+    stats = measure(run, repeats=3)
+    stats['mb_per_s'] = sum(run.sizes) / stats['median'] / 1e6
+    return [{'name': 'asgi_transfers', 'params': {'concurrent': transfers}, **stats}]
+
+
+def bench_cold_import(quick):
+    """Import time of index.py in a fresh interpreter.
+
+    The ``warm_up`` variant also loads the lazily imported dependencies, which
+    is what every cold start paid for before they were deferred; the difference
+    between the two is the saving on API-only cold starts.
+    """
+    results = []
+    for warm in (False, True):
+        code = ("import time; t = time.perf_counter(); import index; "
+                + ("index.warm_up(); " if warm else "") + "print(time.perf_counter() - t)")
+        timings = []
+        for _ in range(3 if quick else 7):
+            output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+            timings.append(float(output.stdout.strip().splitlines()[-1]))
+        results.append({'name': 'cold_import', 'params': {'warm_up': warm}, 'unit': 's', 'repeats': len(timings),
+                        'min': min(timings), 'median': statistics.median(timings),
+                        'mean': statistics.fmean(timings), 'max': max(timings)})
+    return results
+
+
+CASES = {
+    'analyze_network': bench_analyze_network,
+    'analytics': bench_analytics,
+    'record_memory': bench_record_memory,
+    'history_log': bench_history_log,
+    'export': bench_export,
+    'pdf': bench_pdf,
+    'message_rendering': bench_message_rendering,
+    'download_test': bench_download_test,
+    'asgi_transfers': bench_asgi_transfers,
+    'cold_import': bench_cold_import,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help="write JSON results to this file instead of stdout")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes, for CI smoke runs")
+    parser.add_argument('--only', action='append', choices=sorted(CASES), help="run only the given case(s)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.only or CASES:
+        print(f"running {name}...", file=sys.stderr)
+        results.extend(CASES[name](args.quick))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Concurrency stress test for the analytics store.
+
+Writer, deleter and reader threads hammer save_analytics_record, the delete
+endpoint and the analytics read endpoints at the same time. Afterwards the
+history, its id map and the secondary indexes must agree record for record,
+and no request may have failed:
+
+    python benchmarks/stress_analytics_store.py
+    python benchmarks/stress_analytics_store.py --seconds 30 --writers 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# All test-client requests share one address: lift the per-client limits and concurrency caps
+for name in ('ISHARATI_RATE_LIMIT_CHEAP', 'ISHARATI_RATE_LIMIT_EXPENSIVE', 'ISHARATI_RATE_LIMIT_SPEED_TEST',
+             'ISHARATI_HEAVY_CONCURRENCY', 'ISHARATI_SPEED_TEST_CONCURRENCY'):
+    os.environ.setdefault(name, '0')
+
+import index  # noqa: E402
+from run_benchmarks import analyze, synthetic_input  # noqa: E402
+
+READ_PATHS = ['/analytics', '/api/analytics/stats?by=wilaya', '/api/analytics/trends?granularity=hour',
+              '/api/analytics/percentiles', '/api/dead-zones', '/api/towers/load',
+              '/api/heatmap/10/523/403.json']
+
+
+def writer(seed, deadline, saved, errors):
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        data = synthetic_input(rng)
+        try:
+            saved.append(index.save_analytics_record(analyze(data), data['lat'], data['lon']))
+        except Exception as exc:  # noqa: BLE001 - every failure is reported
+            errors.append(f"save: {exc!r}")
+
+
+def deleter(seed, deadline, saved, deleted, errors):
+    rng = random.Random(seed)
+    client = index.app.test_client()
+    while time.monotonic() < deadline:
+        if not saved:
+            time.sleep(0.001)
+            continue
+        record_id = saved[rng.randrange(len(saved))]
+        response = client.delete(f'/api/delete_analytics/{record_id}')
+        if response.status_code != 200:
+            errors.append(f"delete {record_id}: HTTP {response.status_code}")
+        deleted.append(record_id)
+
+
+def reader(seed, deadline, latencies, errors):
+    rng = random.Random(seed)
+    client = index.app.test_client()
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        records = index.analytics_history.snapshot()
+        latencies.append(time.perf_counter() - started)
+        if any(record is None for record in records):
+            errors.append("snapshot contains a hole")
+        path = rng.choice(READ_PATHS)
+        response = client.get(path)
+        if response.status_code != 200:
+            errors.append(f"GET {path}: HTTP {response.status_code}")
+
+
+def check_consistency():
+    """Problems found comparing the history with its id map and indexes"""
+    problems = []
+    records = index.analytics_history.snapshot()
+    ids = [record.id for record in records]
+    if len(set(ids)) != len(ids):
+        problems.append("duplicate ids in history")
+    if any(index.analytics_history.get(record_id) is None for record_id in ids):
+        problems.append("history record missing from the id map")
+    with index.analytics_history.reading(index.analytics_columns) as columns:
+        alive = columns.columns['alive'].view()
+        column_ids = {record_id for record_id, live in zip(columns.ids, alive) if live}
+        live = columns.live
+    if column_ids != set(ids) or live != len(ids):
+        problems.append(f"columnar store has {live} rows for {len(ids)} records")
+    with index.analytics_history.reading(index.tower_load) as tower_load:
+        tower_count = sum(acc[tower_load.COUNT] for acc in tower_load.sums.values())
+    if tower_count != len(ids):
+        problems.append(f"tower load index counts {tower_count} records for {len(ids)}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--deleters', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    index.analytics_history.clear()
+    # Switch threads often so that races surface within a short run
+    sys.setswitchinterval(1e-5)
+    deadline = time.monotonic() + args.seconds
+    saved, deleted, latencies, errors = [], [], [], []
+    threads = [threading.Thread(target=writer, args=(i, deadline, saved, errors)) for i in range(args.writers)]
+    threads += [threading.Thread(target=deleter, args=(100 + i, deadline, saved, deleted, errors))
+                for i in range(args.deleters)]
+    threads += [threading.Thread(target=reader, args=(200 + i, deadline, latencies, errors))
+                for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sys.setswitchinterval(0.005)
+
+    problems = errors + check_consistency()
+    latencies.sort()
+    report = {
+        'saved': len(saved),
+        'deleted': len(set(deleted)),
+        'remaining': len(index.analytics_history),
+        'reads': len(latencies),
+        'snapshot_latency_max_s': latencies[-1] if latencies else None,
+        'snapshot_latency_p99_s': latencies[int(len(latencies) * 0.99)] if latencies else None,
+        'problems': problems[:20],
+        'problem_count': len(problems),
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
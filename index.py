@@ -1,5131 +1,3975 @@
-from flask import Flask, request, render_template_string, jsonify, send_file, session
-from datetime import datetime
-import math
-import json
-import io
-import subprocess
-import uuid
-import speedtest
-# PDF generation imports
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-
-app = Flask(__name__)
-app.secret_key = 'isharati-pro-secret-key-2026'
-
-# ==================== BTS DATA ====================
-BTS_LIST = [
-    {"name": "BTS-Center", "lat": 36.7538, "lon": 3.0588, "operator": "Mobilis"},
-    {"name": "BTS-East", "lat": 36.7119, "lon": 3.1895, "operator": "Djezzy"},
-    {"name": "BTS-West", "lat": 36.7431, "lon": 3.0372, "operator": "Ooredoo"},
-    {"name": "BTS-North", "lat": 36.7838, "lon": 3.0688, "operator": "Mobilis"},
-    {"name": "BTS-South", "lat": 36.7238, "lon": 3.0488, "operator": "Djezzy"},
-]
-
-# ==================== IN-MEMORY ANALYTICS STORAGE ====================
-# In production, use a database (SQLite, PostgreSQL, etc.)
-analytics_history = []
-
-# ==================== UTILITY FUNCTIONS ====================
-def haversine(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points on Earth"""
-    R = 6371
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
-
-
-def run_speedtest():
-    """Run speedtest using the Python library directly (No subprocess)"""
-    try:
-        # إنشاء كائن الاختبار
-        st = speedtest.Speedtest()
-        
-        # البحث عن أفضل سيرفر (هذه الخطوة ضرورية جداً)
-        st.get_best_server()
-        
-        # قياس التحميل والرفع
-        # ملاحظة: العمليات التالية تأخذ وقتاً (حوالي 20-30 ثانية)
-# Sanity limits (realistic mobile network limits)
-download_speed = min(download_speed, 300)   # Mbps
-upload_speed = min(upload_speed, 100)       # Mbps
-ping = max(ping, 5)                          # ms
-        
-        return {
-            'download': round(download_speed, 2),
-            'upload': round(upload_speed, 2),
-            'ping': round(ping, 2)
-        }
-    except Exception as e:
-        # إذا كان هناك خطأ في الاتصال بالإنترنت أو السيرفر
-        return {'error': f'فشل الاختبار: تأكد من اتصالك بالإنترنت ({str(e)})'}
-
-# ==================== ADVANCED DIAGNOSTIC ENGINE ====================
-class NetworkDiagnosticEngine:
-    @staticmethod
-    def classify_rsrp(rsrp):
-        if rsrp > -80:
-            return {"status": "ممتازة", "rating": "Excellent", "emoji": "✅", "score": 100}
-        elif rsrp > -90:
-            return {"status": "جيدة جداً", "rating": "Very Good", "emoji": "✅", "score": 85}
-        elif rsrp > -100:
-            return {"status": "جيدة", "rating": "Good", "emoji": "⚠️", "score": 70}
-        elif rsrp > -110:
-            return {"status": "متوسطة", "rating": "Fair", "emoji": "⚠️", "score": 50}
-        else:
-            return {"status": "ضعيفة جداً", "rating": "Poor", "emoji": "❌", "score": 20}
-    
-    @staticmethod
-    def classify_sinr(sinr):
-        if sinr > 20:
-            return {"status": "ممتازة (سرعة عالية)", "rating": "Excellent", "emoji": "📶", "score": 100}
-        elif sinr > 13:
-            return {"status": "جيدة جداً", "rating": "Very Good", "emoji": "📶", "score": 85}
-        elif sinr > 0:
-            return {"status": "مقبولة", "rating": "Acceptable", "emoji": "📶", "score": 60}
-        else:
-            return {"status": "سيئة (تشويش عالي)", "rating": "Poor", "emoji": "🚫", "score": 20}
-    
-    @staticmethod
-    def estimate_distance_category(distance):
-        if distance < 0.5:
-            return {"category": "قريب جداً", "desc": "Near tower", "emoji": "✅"}
-        elif distance < 2:
-            return {"category": "قريب", "desc": "Close to tower", "emoji": "✅"}
-        elif distance < 5:
-            return {"category": "متوسط", "desc": "Medium distance", "emoji": "⚠️"}
-        elif distance < 10:
-            return {"category": "بعيد", "desc": "Far from tower", "emoji": "⚠️"}
-        else:
-            return {"category": "بعيد جداً", "desc": "Very far", "emoji": "❌"}
-    
-    @staticmethod
-    def detect_issue_type(rsrp, sinr, download_speed=None):
-        if rsrp > -95 and sinr < 5:
-            return {
-                "type": "interference",
-                "ar": "تداخل في الإشارة",
-                "explanation": "الإشارة قوية لكن هناك تشويش من أبراج أخرى"
-            }
-        elif rsrp < -105:
-            return {
-                "type": "coverage",
-                "ar": "مشكلة تغطية",
-                "explanation": "الإشارة ضعيفة بسبب البعد عن البرج"
-            }
-        elif download_speed and download_speed < 5 and rsrp > -90 and sinr > 10:
-            return {
-                "type": "congestion",
-                "ar": "ازدحام على البرج",
-                "explanation": "الإشارة جيدة لكن البرج مزدحم"
-            }
-        else:
-            return {
-                "type": "normal",
-                "ar": "طبيعي",
-                "explanation": "القيم ضمن المعدل الطبيعي"
-            }
-    
-    @staticmethod
-    def calculate_network_score(rsrp, sinr, download=None):
-        engine = NetworkDiagnosticEngine()
-        rsrp_class = engine.classify_rsrp(rsrp)
-        sinr_class = engine.classify_sinr(sinr)
-        
-        score = (rsrp_class['score'] * 0.4) + (sinr_class['score'] * 0.4)
-        
-        if download is not None:
-            if download > 20:
-                speed_score = 100
-            elif download > 10:
-                speed_score = 80
-            elif download > 5:
-                speed_score = 60
-            else:
-                speed_score = 40
-            score += speed_score * 0.2
-        else:
-            score = (rsrp_class['score'] * 0.5) + (sinr_class['score'] * 0.5)
-        
-        return round(score, 1)
-    
-    @staticmethod
-    def get_star_rating(score):
-        if score >= 90:
-            return "⭐⭐⭐⭐⭐"
-        elif score >= 75:
-            return "⭐⭐⭐⭐"
-        elif score >= 60:
-            return "⭐⭐⭐"
-        elif score >= 40:
-            return "⭐⭐"
-        else:
-            return "⭐"
-
-def analyze_network(lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data=None):
-    """Advanced network analysis with comprehensive diagnostics"""
-    engine = NetworkDiagnosticEngine()
-    
-    # Find nearest BTS
-    operator_towers = [b for b in BTS_LIST if b["operator"] == operator]
-    if not operator_towers:
-        operator_towers = BTS_LIST
-    
-    distances = [haversine(lat, lon, b["lat"], b["lon"]) for b in operator_towers]
-    min_dist = min(distances)
-    closest_bts = operator_towers[distances.index(min_dist)]
-    dist_category = engine.estimate_distance_category(min_dist)
-    
-    # Classify signals
-    rsrp_class = engine.classify_rsrp(rsrp)
-    sinr_class = engine.classify_sinr(sinr)
-    
-    # Detect issue
-    download_speed = speed_data.get('download') if speed_data else None
-    issue_type = engine.detect_issue_type(rsrp, sinr, download_speed)
-    
-    # Generate summary (for display)
-    summary = []
-    summary.append(f"📍 المسافة لأقرب برج ({closest_bts['name']} - {operator}): {min_dist:.2f} كم")
-    summary.append(f"{dist_category['emoji']} {dist_category['category']} من البرج")
-    summary.append(f"{rsrp_class['emoji']} قوة الإشارة (RSRP): {rsrp_class['status']}")
-    summary.append(f"{sinr_class['emoji']} جودة الإشارة (SINR): {sinr_class['status']}")
-    
-    if speed_data and 'download' in speed_data:
-        summary.append(f"⚡ سرعة التحميل: {speed_data['download']} Mbps")
-        summary.append(f"⬆️ سرعة الرفع: {speed_data['upload']} Mbps")
-        summary.append(f"📡 Ping: {speed_data['ping']} ms")
-    
-    hour = datetime.now().hour
-    if 18 <= hour <= 23:
-        summary.append("⏰ تنبيه: وقت ذروة (18:00-23:00)")
-    
-    # Technical explanation
-    technical_explanation = {
-        "rsrp_explanation": f"RSRP يقيس قوة الإشارة. قيمتك {rsrp} dBm تعني إشارة {rsrp_class['status']}.",
-        "sinr_explanation": f"SINR يقيس نقاء الإشارة. قيمتك {sinr} dB تعني جودة {sinr_class['status']}.",
-        "distance_explanation": f"المسافة {min_dist:.2f} كم من البرج - {dist_category['category']}.",
-        "issue_diagnosis": issue_type['explanation'],
-        "network_type_info": f"شبكة {network_type} من {operator}.",
-        "location_impact": f"موقعك {place} في {city}, {wilaya}."
-    }
-    
-    # Recommendations
-    recommendations = {"physical": [], "network": [], "usage": []}
-    
-    if place == "Indoor" and rsrp < -100:
-        recommendations["physical"].append("📍 اقترب من النافذة")
-        recommendations["physical"].append("📍 فكر في مقوي إشارة (Repeater)")
-    
-    if sinr < 5:
-        recommendations["network"].append("📡 حاول تغيير موقعك لتقليل التداخل")
-        recommendations["network"].append("📡 أعد تشغيل الهاتف")
-    
-    if hour >= 18 and hour <= 23:
-        recommendations["usage"].append("⏱ تجنب التحميلات الكبيرة الآن (وقت الذروة)")
-    
-    recommendations["usage"].append("⏱ أغلق التطبيقات غير المستخدمة")
-    
-    if speed_data and speed_data.get('download', 0) < 1:
-        recommendations["usage"].append("📱 السرعة منخفضة جداً - تحقق من الباقة")
-    
-    # Calculate score
-    network_score = engine.calculate_network_score(rsrp, sinr, download_speed)
-    star_rating = engine.get_star_rating(network_score)
-    
-    score_breakdown = {
-        "overall": network_score,
-        "stars": star_rating,
-        "coverage": rsrp_class['score'],
-        "quality": sinr_class['score'],
-        "speed": round((download_speed / 50) * 100) if download_speed else None
-    }
-    
-    # Short recommendation
-    if issue_type['type'] == 'coverage':
-        if place == "Indoor":
-            rec = "الإشارة ضعيفة داخل المبنى. الحل الأمثل: تركيب مقوي شبكة (Repeater) أو استخدام WiFi Calling."
-        else:
-            rec = "الإشارة ضعيفة حتى في الخارج. المنطقة قد تكون في ظل تغطية (Coverage Hole)."
-    elif issue_type['type'] == 'interference':
-        rec = "الإشارة قوية لكن الجودة سيئة. هذا يعني وجود 'تداخل' (Interference) من أبراج أخرى. جرب تغيير الغرفة لعزل التشويش."
-    elif issue_type['type'] == 'congestion':
-        rec = "الإشارة ممتازة لكن السرعة بطيئة. البرج مزدحم بالمشتركين. جرب في وقت آخر."
-    else:
-        rec = "القيم تبدو جيدة. إذا كان النت بطيئاً، فالمشكلة غالباً من المصدر (تشبع البرج بالمشتركين) وليس من تغطيتك."
-    
-    # Enhanced recommendation with speed test data
-    if speed_data and 'download' in speed_data:
-        download = speed_data['download']
-        if download < 1:
-            rec += " سرعة التحميل بطيئة جداً (<1 Mbps). تحقق من الباقة المشترك بها أو اتصل بمزود الخدمة."
-        elif download < 5:
-            rec += " سرعة التحميل محدودة (1-5 Mbps). مناسبة للتصفح الأساسي فقط."
-        elif download < 20:
-            rec += " سرعة التحميل جيدة (5-20 Mbps). مناسبة للفيديو بجودة HD."
-        else:
-            rec += " سرعة التحميل ممتازة (>20 Mbps). يمكنك البث بجودة 4K."
-    
-    return summary, technical_explanation, recommendations, network_score, score_breakdown, rec, issue_type
-
-def save_analytics_record(data, analysis_results):
-    """Save an analytics record to the history"""
-    record = {
-        'id': str(uuid.uuid4())[:8],
-        'timestamp': datetime.now().isoformat(),
-        'date': datetime.now().strftime("%Y-%m-%d"),
-        'time': datetime.now().strftime("%H:%M:%S"),
-        'lat': data['lat'],
-        'lon': data['lon'],
-        'rsrp': data['rsrp'],
-        'sinr': data['sinr'],
-        'network_type': data['network'],
-        'operator': data['operator'],
-        'place': data['place'],
-        'wilaya': data['wilaya'],
-        'city': data['city'],
-        'speed_data': data.get('speed_data'),
-        'network_score': analysis_results['network_score'],
-        'score_breakdown': analysis_results['score_breakdown'],
-        'issue_type': analysis_results['issue_type'],
-        'summary': analysis_results['summary'],
-        'recommendations': analysis_results['recommendations'],
-        'short_recommendation': analysis_results['short_recommendation']
-    }
-    analytics_history.insert(0, record)  # Most recent first
-    return record['id']
-
-def get_analytics_stats():
-    """Calculate statistics from analytics history"""
-    if not analytics_history:
-        return {
-            'total': 0,
-            'most_used_operator': 'N/A',
-            'most_frequent_issue': 'N/A',
-            'average_score': 0
-        }
-    
-    operators = {}
-    issues = {}
-    total_score = 0
-    
-    for record in analytics_history:
-        # Count operators
-        op = record['operator']
-        operators[op] = operators.get(op, 0) + 1
-        
-        # Count issues
-        issue = record['issue_type']['ar']
-        issues[issue] = issues.get(issue, 0) + 1
-        
-        # Sum scores
-        total_score += record['network_score']
-    
-    most_used_operator = max(operators.items(), key=lambda x: x[1])[0] if operators else 'N/A'
-    most_frequent_issue = max(issues.items(), key=lambda x: x[1])[0] if issues else 'N/A'
-    average_score = round(total_score / len(analytics_history), 1) if analytics_history else 0
-    
-    return {
-        'total': len(analytics_history),
-        'most_used_operator': most_used_operator,
-        'most_frequent_issue': most_frequent_issue,
-        'average_score': average_score
-    }
-
-# ==================== PDF GENERATION ====================
-def generate_advanced_pdf(data):
-    """Generate comprehensive PDF report"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=20, textColor=colors.HexColor('#0052FF'), 
-                                 spaceAfter=20, alignment=TA_CENTER, fontName='Helvetica-Bold')
-    heading_style = ParagraphStyle('Heading', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#0052FF'),
-                                   spaceAfter=10, alignment=TA_RIGHT, fontName='Helvetica-Bold')
-    
-    # Title
-    elements.append(Paragraph("ISHARATI PRO - Network Analysis Report", title_style))
-    elements.append(Spacer(1, 20))
-    
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    report_id = f"RPT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
-    # Cover info
-    cover_data = [
-        ['Report ID:', report_id],
-        ['Date & Time:', current_time],
-        ['Location:', f"{data.get('city', 'N/A')}, {data.get('wilaya', 'N/A')}"],
-        ['Operator:', data.get('operator', 'N/A')],
-        ['Network Type:', data.get('network', 'N/A')],
-        ['Platform:', 'ISHARATI PRO v1.0']
-    ]
-    
-    cover_table = Table(cover_data, colWidths=[6*cm, 11*cm])
-    cover_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('PADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-    ]))
-    
-    elements.append(cover_table)
-    elements.append(Spacer(1, 20))
-    
-    # Network Score Section
-    elements.append(Paragraph("Network Quality Score", heading_style))
-    
-    score_breakdown = data.get('score_breakdown', {})
-    score_data = [
-        ['Category', 'Score'],
-        ['Overall Quality', f"{score_breakdown.get('overall', 0)}/100 "],
-        ['Coverage (RSRP)', f"{score_breakdown.get('coverage', 0)}/100"],
-        ['Signal Quality (SINR)', f"{score_breakdown.get('quality', 0)}/100"],
-    ]
-    
-    if score_breakdown.get('speed'):
-        score_data.append(['Speed Performance', f"{score_breakdown.get('speed', 0)}/100"])
-    
-    score_table = Table(score_data, colWidths=[8*cm, 9*cm])
-    score_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (-1, 1), 14),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('PADDING', (0, 0), (-1, -1), 10),
-    ]))
-    
-    elements.append(score_table)
-    elements.append(Spacer(1, 20))
-    
-    # Input Parameters
-    elements.append(Paragraph("Technical Parameters", heading_style))
-    
-    input_data = [
-        ['Parameter', 'Value'],
-        ['Latitude', str(data.get('lat', 'N/A'))],
-        ['Longitude', str(data.get('lon', 'N/A'))],
-        ['RSRP (Signal Strength)', f"{data.get('rsrp', 'N/A')} dBm"],
-        ['SINR (Signal Quality)', f"{data.get('sinr', 'N/A')} dB"],
-        ['Network Type', data.get('network', 'N/A')],
-        ['Operator', data.get('operator', 'N/A')],
-        ['Location Type', data.get('place', 'N/A')],
-        ['City', data.get('city', 'N/A')],
-        ['Wilaya', data.get('wilaya', 'N/A')],
-    ]
-    
-    if data.get('speed_data'):
-        speed = data['speed_data']
-        input_data.append(['Download Speed', f"{speed.get('download', 'N/A')} Mbps"])
-        input_data.append(['Upload Speed', f"{speed.get('upload', 'N/A')} Mbps"])
-        input_data.append(['Ping', f"{speed.get('ping', 'N/A')} ms"])
-    
-    input_table = Table(input_data, colWidths=[8*cm, 9*cm])
-    input_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0052FF')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('PADDING', (0, 0), (-1, -1), 8),
-    ]))
-    
-    elements.append(input_table)
-    elements.append(Spacer(1, 20))
-    
-    # Footer
-    elements.append(Spacer(1, 30))
-    elements.append(Paragraph("---------------------------------------------------------------------", styles['Normal']))
-    elements.append(Paragraph("Generated by ISHARATI PRO v1.0 - Advanced Network Diagnostic Platform", styles['Normal']))
-    elements.append(Paragraph("For support: isharatipro@gmail.com", styles['Normal']))
-    
-    doc.build(elements)
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
-
-HTML_PAGE = """
-<!DOCTYPE html>
-<html lang="ar" dir="rtl">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="icon" type="image/png" href="{{ url_for('static', filename='logo2.png') }}">
-    <title>ISHARATI PRO - تشخيص احترافي للشبكة</title>
-    <link href="https://fonts.googleapis.com/css2?family=Tajawal:wght@400;500;700;900&family=IBM+Plex+Sans+Arabic:wght@400;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-
-<style>
-:root {
---primary: #0052FF;
-            --primary-dark: #003db3;
-            --secondary: #10b981;
-            --accent: #f59e0b;
-            --bg: #f8fafc;
-            --card-bg: #ffffff;
-            --text: #1e293b;
-            --text-light: #64748b;
-            --border: #e2e8f0;
-            --shadow-sm: 0 1px 3px rgba(0,0,0,0.12);
-            --shadow-md: 0 4px 6px -1px rgba(0,0,0,0.1);
-            --shadow-lg: 0 20px 25px -5px rgba(0,0,0,0.1);
-            --radius: 12px;
-}
-
-* { margin: 0; padding: 0; box-sizing: border-box; }
-
-body { 
-font-family: 'IBM Plex Sans Arabic', sans-serif; 
-            background: var(--bg); 
-            color: var(--text);
-            line-height: 1.6;
-}
-.brand {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            text-decoration: none;
-        }
-
-        .logo-img { height: 45px; width: auto; }
-
-        .brand-text h1 {
-            font-size: 1.2rem;
-            font-weight: 800;
-            color: var(--primary);
-            line-height: 1;
-        }
-
-        .brand-text p { font-size: 0.7rem; color: var(--text-light); }
-
-        .search-bar {
-            flex: 1;
-            max-width: 500px;
-            position: relative;
-            display: none; /* Hidden on mobile */
-        }
-/* ========== HEADER SECTION ========== */
-.main-header {
-background: white;
-            padding: 12px 0;
-            border-bottom: 1px solid var(--border);
-            position: sticky;
-            top: 0;
-            z-index: 2000;
-}
-
-.header-content {
-max-width: 1400px;
-            margin: 0 auto;
-            padding: 0 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            gap: 20px;
-}
-
-.logo-section {
-    display: flex;
-    align-items: center;
-    gap: 12px;
-    text-decoration: none;
-}
-.logo-icon {
-    background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-    width: 45px;
-    height: 45px;
-    border-radius: 12px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 24px;
-}
-
-.logo-text h1 {
-    font-size: 1.5rem;
-    font-weight: 900;
-    color: var(--primary);
-    font-family: 'Tajawal', sans-serif;
-}
-
-.logo-text p {
-    font-size: 0.75rem;
-    color: var(--text-light);
-}
-
-
-.logo-text p {
-    font-size: 0.75rem;
-    color: var(--text-light);
-}
-
-.search-container {
-    flex: 1;
-    max-width: 600px;
-    position: relative;
-}
-
-.search-wrapper {
-    position: relative;
-    display: flex;
-    align-items: center;
-}
-
-.search-input {
-    width: 100%;
-    padding: 12px 50px 12px 20px;
-    border: 2px solid var(--border);
-    border-radius: 50px;
-    font-size: 0.95rem;
-    transition: all 0.3s;
-    font-family: inherit;
-}
-
-.search-input:focus {
-    outline: none;
-    border-color: var(--primary);
-    box-shadow: 0 0 0 3px rgba(0, 82, 255, 0.1);
-}
-
-.search-btn {
-    position: absolute;
-    left: 5px;
-    background: var(--primary);
-    color: white;
-    border: none;
-    padding: 8px 20px;
-    border-radius: 50px;
-    cursor: pointer;
-    transition: background 0.3s;
-}
-
-.search-btn:hover { background: var(--primary-dark); }
-
-.cta-btn {
-    background: var(--primary);
-    color: white;
-    padding: 10px 25px;
-    border-radius: 50px;
-    text-decoration: none;
-    font-weight: 700;
-    transition: all 0.3s;
-    border: none;
-    cursor: pointer;
-}
-
-.cta-btn:hover {
-    background: var(--primary-dark);
-    transform: translateY(-2px);
-    box-shadow: var(--shadow);
-}
-@media (min-width: 992px) { .search-bar { display: block; } }
-
-        .search-bar input {
-            width: 100%;
-            padding: 10px 45px 10px 15px;
-            border-radius: 50px;
-            border: 1px solid var(--border);
-            background: #f1f5f9;
-            transition: 0.3s;
-        }
-
-        .search-bar i {
-            position: absolute;
-            right: 15px;
-            top: 50%;
-            transform: translateY(-50%);
-            color: var(--text-light);
-        }
-/* ========== NAVIGATION ========== */
-.main-nav {
-    background: rgba(255, 255, 255, 0.95);
-    backdrop-filter: blur(10px);
-    border-bottom: 1px solid #eee;
-    padding: 15px 0;
-    width: 100%;
-    position: sticky;
-    top: 0;
-    z-index: 1000;
-    display: flex;
-    justify-content: center;
-}
-
-.nav-content {
-    display: flex;
-    gap: 15px;
-    direction: rtl;
-    align-items: center;
-}
-
-.nav-item {
-    text-decoration: none;
-    color: #555;
-    padding: 10px 20px;
-    border-radius: 12px;
-    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-    font-weight: 600;
-    font-size: 15px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-    transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-}
-
-.nav-item i {
-    font-size: 18px;
-}
-
-.nav-item:hover {
-    background-color: #f0f7ff;
-    color: #007bff;
-    transform: translateY(-2px);
-}
-
-.nav-item.active {
-    background-color: #007bff;
-    color: #ffffff;
-    box-shadow: 0 4px 12px rgba(0, 123, 255, 0.3);
-}
-.nav-bar {
-    background: rgba(255,255,255,0.8);
-    backdrop-filter: blur(12px);
-    border-bottom: 1px solid var(--border);
-    padding: 0; /* Changed from 10px */
-    position: sticky;
-    top: 0; /* Changed from 70px */
-    z-index: 1000;
-}
-
-        .nav-container {
-            max-width: 1400px;
-            margin: 0 auto;
-            display: flex;
-            justify-content: center;
-            gap: 10px;
-            overflow-x: auto;
-            white-space: nowrap;
-            padding: 0 10px;
-        }
-
-        .nav-link {
-            text-decoration: none;
-            color: var(--text-light);
-            padding: 8px 16px;
-            border-radius: 50px;
-            font-weight: 600;
-            font-size: 0.95rem;
-            transition: 0.3s;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-
-        .nav-link:hover, .nav-link.active {
-            color: var(--primary);
-            background: rgba(0, 82, 255, 0.1);
-        }
-/* ========== HERO SECTION ========== */
-.hero {
-    background: linear-gradient(145deg, #0052FF 0%, #002e8f 100%);
-    color: white;
-    padding: 80px 20px 20px; /* Changed from 120px to 20px */
-    text-align: center;
-}
-* {
-    margin: 0;
-    padding: 0;
-    box-sizing: border-box;
-}
-        .hero h1 { font-size: clamp(1.8rem, 5vw, 3rem); font-weight: 800; margin-bottom: 15px; }
-        .hero p { font-size: 1.1rem; opacity: 0.9; max-width: 700px; margin: 0 auto; }
-.hero-content {
-    max-width: 1200px;
-    margin: 0 auto;
-    text-align: center;
-    position: relative;
-    z-index: 1;
-}
-
-.hero h1 {
-    color: white;
-    font-size: 3rem;
-    font-weight: 900;
-    margin-bottom: 20px;
-    text-shadow: 0 2px 10px rgba(0,0,0,0.2);
-}
-
-.hero p {
-    color: rgba(255,255,255,0.95);
-    font-size: 1.3rem;
-    margin-bottom: 30px;
-}
-
-/* ========== MAIN CONTENT ========== */
-.container {
-    max-width: 1400px;
-    margin: 20px auto 100px; /* Changed from -60px to 20px */
-    padding: 0 20px;
-    position: relative;
-    z-index: 10;
-}
-.content-grid {
-    display: grid;
-    grid-template-columns: 1fr 350px;
-    gap: 30px;
-    margin-bottom: 40px;
-    min-height: 150vh;
-}
-
-.main-content {
-    display: flex;
-    flex-direction: column;
-    gap: 30px;
-}
-
-.card {
-    background: var(--card-bg);
-    padding: 50px;
-    border-radius: 20px;
-    box-shadow: var(--shadow);
-    border: 1px solid var(--border);
-    margin-bottom: 40px;
-}
-
-.card-header {
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    margin-bottom: 30px;
-    padding-bottom: 20px;
-    border-bottom: 2px solid var(--border);
-}
-
-.card-title {
-    font-size: 1.5rem;
-    font-weight: 800;
-    color: var(--text);
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.form-grid {
-    display: grid;
-    grid-template-columns: repeat(3, 1fr); /* Exactly 3 columns as per your image */
-    gap: 25px 20px; /* Vertical and horizontal spacing */
-    margin-bottom: 30px;
-    direction: rtl; /* Ensures order matches your image from right to left */
-}
-.form-group {
-    display: flex;
-    flex-direction: column;
-    align-items: flex-start; /* Align contents to the right (start of RTL) */
-}
-
-label {
-    font-weight: 700;
-    color: var(--text);
-    margin-bottom: 8px;
-    display: flex;
-    align-items: center;
-    gap: 8px;
-}
-
-label small {
-    color: var(--text-light);
-    font-weight: 400;
-    font-size: 0.85rem;
-}
-
-input, select {
-    width: 100%;
-    padding: 12px 15px;
-    border: 2px solid var(--border);
-    border-radius: 12px;
-    font-size: 1rem;
-    transition: all 0.3s;
-    font-family: inherit;
-    background: white;
-}
-
-input:focus, select:focus {
-    outline: none;
-    border-color: var(--primary);
-    box-shadow: 0 0 0 3px rgba(0, 82, 255, 0.1);
-}
-
-.btn {
-    background: var(--primary);
-    color: white;
-    padding: 15px 30px;
-    border: none;
-    border-radius: 50px;
-    font-size: 1.1rem;
-    font-weight: 700;
-    cursor: pointer;
-    width: 100%;
-    transition: all 0.3s;
-    margin-top: 20px;
-}
-
-.btn:hover {
-    background: var(--primary-dark);
-    transform: translateY(-2px);
-    box-shadow: var(--shadow-lg);
-}
-
-.btn:disabled {
-    background: #94a3b8;
-    cursor: not-allowed;
-    transform: none;
-}
-
-.btn-secondary {
-    background: var(--secondary);
-}
-
-.btn-secondary:hover {
-    background: #059669;
-}
-
-.btn-accent {
-    background: var(--accent);
-    margin-top: 15px;
-}
-
-.btn-accent:hover {
-    background: #d97706;
-}
-
-.result {
-    background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-    border: 2px solid var(--secondary);
-    padding: 40px;
-    border-radius: 20px;
-    margin-top: 40px;
-    margin-bottom: 40px;
-}
-
-.result h3 {
-    color: var(--secondary);
-    font-size: 1.5rem;
-    margin-bottom: 20px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.result ul {
-    list-style: none;
-    padding: 0;
-    margin: 30px 0;
-}
-
-.result li {
-    padding: 18px 0;
-    border-bottom: 1px solid rgba(16, 185, 129, 0.2);
-    font-size: 1.05rem;
-}
-
-.result li:last-child { border-bottom: none; }
-
-.recommendation {
-    background: white;
-    padding: 20px;
-    border-radius: 15px;
-    margin-top: 20px;
-    border-right: 5px solid var(--accent);
-}
-
-.recommendation strong {
-    color: var(--accent);
-    font-size: 1.1rem;
-}
-
-/* ========== NETWORK SCORE DISPLAY ========== */
-.score-display {
-    text-align: center;
-    padding: 30px;
-    background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%);
-    border-radius: 20px;
-    margin: 20px 0;
-    border: 2px solid var(--primary);
-}
-
-.score-number {
-    font-size: 4rem;
-    font-weight: 900;
-    color: var(--primary);
-    margin: 10px 0;
-}
-
-.score-stars {
-    font-size: 2.5rem;
-    margin: 10px 0;
-}
-
-.score-label {
-    font-size: 1.1rem;
-    color: var(--text-light);
-    margin-top: 10px;
-}
-
-/* ========== SPEED TEST SECTION ========== */
-.speed-test-section {
-    background: white;
-    padding: 25px;
-    border-radius: 15px;
-    margin-top: 20px;
-    border: 2px solid var(--primary);
-}
-
-.speed-test-section h4 {
-    color: var(--primary);
-    margin-bottom: 15px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.speed-results {
-    display: grid;
-    grid-template-columns: repeat(3, 1fr);
-    gap: 15px;
-    margin-top: 15px;
-}
-
-.speed-metric {
-    text-align: center;
-    padding: 15px;
-    background: var(--bg);
-    border-radius: 10px;
-}
-
-.speed-value {
-    font-size: 2rem;
-    font-weight: bold;
-    color: var(--primary);
-}
-
-.speed-label {
-    font-size: 0.9rem;
-    color: var(--text-light);
-    margin-top: 5px;
-}
-
-.loading-spinner {
-    display: inline-block;
-    width: 20px;
-    height: 20px;
-    border: 3px solid rgba(255,255,255,0.3);
-    border-radius: 50%;
-    border-top-color: white;
-    animation: spin 1s ease-in-out infinite;
-}
-
-@keyframes spin {
-    to { transform: rotate(360deg); }
-}
-
-/* ========== SIDEBAR ========== */
-.sidebar {
-    display: flex;
-    flex-direction: column;
-    gap: 20px;
-}
-
-.sidebar-card {
-    background: var(--card-bg);
-    padding: 25px;
-    border-radius: 20px;
-    box-shadow: var(--shadow);
-    border: 1px solid var(--border);
-    border-radius: 16px;
-    position: relative;
-    overflow: hidden;
-    transition: transform 0.3s ease, box-shadow 0.3s ease;
-    cursor: pointer;
-    animation: slideIn 0.6s ease-out;
-}
-
-.sidebar-card:hover {
-    transform: translateY(-5px);
-    box-shadow: 0 10px 30px rgba(0,0,0,0.15);
-}
-
-.sidebar-card h3 {
-    font-size: 1.2rem;
-    margin-bottom: 15px;
-    color: var(--text);
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.sidebar-card h3 i {
-    animation: pulse 2s infinite;
-}
-
-@keyframes pulse {
-    0% { transform: scale(1); opacity: 1; }
-    50% { transform: scale(1.2); opacity: 0.8; }
-    100% { transform: scale(1); opacity: 1; }
-}
-
-@keyframes slideIn {
-    from { opacity: 0; transform: translateX(20px); }
-    to { opacity: 1; transform: translateX(0); }
-}
-
-.quick-link {
-    display: block;
-    padding: 12px 15px;
-    background: var(--bg);
-    border-radius: 12px;
-    text-decoration: none;
-    color: var(--text);
-    margin-bottom: 10px;
-    transition: all 0.3s;
-    font-weight: 600;
-}
-
-.quick-link:hover {
-    background: var(--primary);
-    color: white;
-    transform: translateX(-5px);
-}
-
-/* ========== FOOTER ========== */
-.footer {
-    background: #1e293b;
-    color: white;
-    /* Reduced top padding from 80px to 40px */
-    padding: 40px 20px 20px; 
-    /* Reduced margin from 120px to 40px to pull it closer to content */
-    margin-top: 40px; 
-}
-
-.footer-content {
-    max-width: 1400px;
-    margin: 0 auto;
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-    /* Reduced gap between columns */
-    gap: 20px; 
-    margin-bottom: 20px;
-    direction: rtl; /* Ensures alignment matches your Arabic text */
-}
-
-.footer-section h3 {
-    /* Smaller headings */
-    font-size: 1.1rem;
-    margin-bottom: 12px;
-    color: var(--secondary);
-}
-
-
-.footer-section a, 
-.footer-section a:visited, 
-
-    
-    
-.footer-section p, 
-.footer-section a {
-    /* Smaller text for a more compact look */
-    font-size: 0.85rem;
-    color: #ffffff;
-}
-.footer-section ul {
-    list-style: none;
-    padding: 0;
-    margin: 0;
-}
-.footer-bottom {
-    text-align: center;
-    /* Reduced padding */
-    padding-top: 20px;
-    border-top: 1px solid rgba(255,255,255,0.1);
-    color: rgba(255,255,255,0.6);
-    font-size: 0.8rem;
-}
-
-.footer-bottom p {
-    margin-bottom: 5px;
-}
-
-/* ========== RESPONSIVE ========== */
-@media (max-width: 1024px) {
-    .content-grid {
-        grid-template-columns: 1fr;
-    }
-    
-    .sidebar {
-        order: -1;
-    }
-}
-
-@media (max-width: 768px) {
-    .header-content {
-        flex-wrap: wrap;
-    }
-    
-    .search-container {
-        order: 3;
-        width: 100%;
-        max-width: 100%;
-    }
-    
-    .hero h1 {
-        font-size: 2rem;
-    }
-    
-    .form-grid {
-        grid-template-columns: 1fr;
-    }
-    
-    .speed-results {
-        grid-template-columns: 1fr;
-    }
-
-    .nav-content {
-        gap: 5px;
-        padding: 0 10px;
-    }
-    
-    .nav-item {
-        padding: 8px 12px;
-        font-size: 14px;
-    }
-}
-</style>
-</head>
-
-<body>
-
-<!-- Main Header -->
-<header class="main-header">
-    <div class="header-content">
-
-<div class="logo">
-    <img 
-<link rel="icon" type="image/png" href="{{ url_for('static', filename='logo2.png') }}">
-<img src="logo2.png">        alt="Logo"
-        style="height: 50px; width: center;"
-    >
-</div>
-            <div class="logo-text">
-                <h1>ISHARATI PRO</h1>
-                <p>تشخيص احترافي للشبكة</p>
-            </div>
-        </a>
-
-        <div class="search-container">
-            <div class="search-wrapper">
-                <input type="text" class="search-input" id="searchInput" placeholder="ابحث عن مشكلة، منطقة، أو مقال...">
-                <button class="search-btn" onclick="performSearch()">
-                    <i class="fas fa-search"></i>
-                </button>
-            </div>
-        </div>
-
-        <a href="/guide" class="cta-btn">دليل الاستخدام</a>
-    </div>
-</header>
-
-<!-- Navigation -->
-<nav class="main-nav">
-    <div class="nav-content" id="mainNav">
-        <a href="/" class="nav-item active">
-            <i class="fas fa-home"></i> الرئيسية
-        </a>
-        <a href="/speed-test" class="nav-item">
-            <i class="fas fa-tachometer-alt"></i> اختبار السرعة
-        </a>
-        <a href="/knowledge" class="nav-item">
-            <i class="fas fa-newspaper"></i> معرفة
-        </a>
-        <a href="/guide" class="nav-item">
-            <i class="fas fa-book-open"></i> الدليل
-        </a>
-        <a href="/analytics" class="nav-item">
-    <i class="fas fa-chart-line"></i> السجل
-        </a>
-
-    </div>
-</nav>
-
-<!-- Hero Section -->
-<section class="hero">
-    <div class="hero-content">
-        <h1>شخّص سبب ضعف الإنترنت بدقة عالية</h1>
-        <p>أدخل البيانات واحصل على تحليل هندسي شامل مع توصيات عملية</p>
-    </div>
-</section>
-
-
-<!-- Main Content -->
-<div class="container">
-    <div class="content-grid">
-        <!-- Main Analysis Form -->
-        <div class="main-content">
-            <div class="card">
-                <div class="card-header">
-                    <h2 class="card-title">
-                        <i class="fas fa-microscope"></i>
-                        نموذج التحليل الشامل
-                    </h2>
-                </div>
-
-                <form method="POST" id="analysisForm">
-<div class="form-grid">
-    <div class="form-group">
-        <label>Latitude <small>(خط العرض)</small> <i class="fas fa-map-marker-alt"></i></label>
-        <input name="lat" type="number" step="any" placeholder="36.75">
-    </div>
-
-    <div class="form-group">
-        <label>Longitude <small>(خط الطول)</small> <i class="fas fa-map-marker-alt"></i></label>
-        <input name="lon" type="number" step="any" placeholder="3.05">
-    </div>
-
-    <div class="form-group">
-        <label>RSRP (dBm) <small>كلما اقترب من 0 أفضل</small> <i class="fas fa-signal"></i></label>
-        <input type="number" name="rsrp" placeholder="85-">
-    </div>
-
-    <div class="form-group">
-        <label>SINR (dB) <small>أكثر من 20 ممتاز</small> <i class="fas fa-chart-bar"></i></label>
-        <input type="number" name="sinr" placeholder="15">
-    </div>
-
-    <div class="form-group">
-        <label>Network Type <i class="fas fa-network-wired"></i></label>
-        <select name="network">
-                                 <option>3G</option>
-                                 <option>4G</option>
-                                <option>5G</option>
-                                <option value="ADSL">Algerie Telecom (ADSL)</option>
-        </select>
-    </div>
-
-    <div class="form-group">
-        <label>المشغّل <i class="fas fa-signal"></i></label>
-        <select name="operator">
-            <option>Djezzy</option>
-            <option>Mobilis</option>
-            <option>Ooredoo</option>
-            <option value="ADSL">Algerie Telecom (ADSL)</option>
-
-        </select>
-    </div>
-
-    <div class="form-group">
-        <label>المكان <i class="fas fa-location-arrow"></i></label>
-        <select name="place">
-            <option>Indoor</option>
-            <option>Outdoor</option>
-        </select>
-    </div>
-
-    <div class="form-group">
-        <label>الولاية <i class="fas fa-city"></i></label>
-        <input type="text" name="Wilaya" placeholder="مثال: بومرداس">
-    </div>
-
-    <div class="form-group">
-        <label>المدينة <i class="fas fa-map-pin"></i></label>
-        <input type="text" name="city" placeholder="مثال: الثنية">
-    </div>
-</div>
-
-                    <button class="btn" type="submit">
-                        <i class="fas fa-cogs"></i> ابدأ التحليل الهندسي الشامل
-                    </button>
-                    
-                    <button class="btn btn-secondary" type="button" onclick="testSpeed()" id="speedTestBtn">
-                        <i class="fas fa-tachometer-alt"></i> اختبر سرعة الإنترنت
-                    </button>
-                    
-                    <input type="hidden" name="speed_data" id="speedDataInput">
-                </form>
-
-                <!-- Speed Test Results -->
-                <div id="speedTestResults" style="display: none;" class="speed-test-section">
-                    <h4><i class="fas fa-tachometer-alt"></i> نتائج اختبار السرعة</h4>
-                    <div class="speed-results">
-                        <div class="speed-metric">
-                            <div class="speed-value" id="downloadSpeed">-</div>
-                            <div class="speed-label">التحميل (Mbps)</div>
-                        </div>
-                        <div class="speed-metric">
-                            <div class="speed-value" id="uploadSpeed">-</div>
-                            <div class="speed-label">الرفع (Mbps)</div>
-                        </div>
-                        <div class="speed-metric">
-                            <div class="speed-value" id="pingSpeed">-</div>
-                            <div class="speed-label">Ping (ms)</div>
-                        </div>
-                    </div>
-                </div>
-
-                {% if analysis %}
-                <div class="result">
-                    <h3>
-                        <i class="fas fa-check-circle"></i>
-                        نتيجة التشخيص
-                    </h3>
-                    <ul>
-                    {% for a in analysis %}
-                        <li>{{a}}</li>
-                    {% endfor %}
-                    </ul>
-                    
-                    {% if network_score %}
-                    <div class="score-display">
-                        <div class="score-label">Network Quality Score</div>
-                        <div class="score-number">{{network_score}}/100</div>
-                        <div class="score-stars">{{star_rating}}</div>
-                        <div class="score-label">تقييم جودة الشبكة</div>
-                    </div>
-                    {% endif %}
-                    
-                    <div class="recommendation">
-                        <p><strong>💡 التوصية الهندسية:</strong></p>
-                        <p>{{rec}}</p>
-                    </div>
-                    
-                    <a href="/download_pdf" class="btn btn-accent" style="display: inline-block; text-decoration: none; text-align: center;">
-                        <i class="fas fa-file-pdf"></i> تحميل التقرير الكامل PDF
-                    </a>
-                    
-                    <canvas id="chart" height="100" style="margin-top: 30px;"></canvas>
-                    <script>
-                    new Chart(document.getElementById('chart'), {
-                        type: 'bar',
-                        data: {
-                            labels: ['RSRP (قوة الإشارة)', 'SINR (الجودة)'],
-                            datasets: [{
-                                label: 'القيم الحالية',
-                                data: [{{rsrp}}, {{sinr}}],
-                                backgroundColor: ['#0052FF', '#10b981'],
-                                borderRadius: 10,
-                                borderWidth: 0
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            plugins: {
-                                legend: { display: false }
-                            },
-                            scales: {
-                                y: { beginAtZero: false }
-                            }
-                        }
-                    });
-                    </script>
-                </div>
-                {% endif %}
-            </div>
-        </div>
-
-        <!-- Sidebar -->
-        <aside class="sidebar">
-            <div class="sidebar-card">
-                <h3><i class="fas fa-bolt"></i> إجراءات سريعة</h3>
-                <a href="/guide" class="quick-link">
-                    <i class="fas fa-book"></i> دليل الاستخدام
-                </a>
-                <a href="/speed-test" class="quick-link">
-                    <i class="fas fa-tachometer-alt"></i> اختبار السرعة
-                </a>
-                <a href="/knowledge" class="quick-link">
-                    <i class="fas fa-lightbulb"></i> المعرفة التقنية
-                </a>
-                <a href="/analytics" class="quick-link">
-    <i class="fas fa-chart-line"></i> السجل
-</a>
-<script>
-    // منع الزر الأيمن للفأرة
-    document.addEventListener('contextmenu', event => event.preventDefault());
-
-    // منع اختصارات لوحة المفاتيح مثل Ctrl+U (رؤية السورس)
-    document.onkeydown = function(e) {
-        if (e.ctrlKey && (e.keyCode === 85 || e.keyCode === 83)) {
-            return false;
-        }
-    };
-</script>
-            </div>
-
-            <div class="sidebar-card" style="background: linear-gradient(135deg, #f8fafc, #e2e8f0); border: none;">
-                <h3><i class="fas fa-lightbulb"></i> نصيحة اليوم</h3>
-                <p style="font-size: 0.95rem; line-height: 1.8;">
-                    لتحسين جودة الإشارة داخل المنزل، حاول الاقتراب من النافذة أو استخدام مقوي الإشارة (Repeater).
-                </p>
-            </div>
-        </aside>
-    </div>
-</div>
-
-<!-- Footer -->
-<footer class="footer">
-    <div class="footer-content">
-        <div class="footer-section">
-            <h3>حول ISHARATI PRO</h3>
-            <p style="color: rgba(255,255,255,0.7); line-height: 1.8;">
-                منصة لتشخيص مشاكل الشبكة وتحليل جودة الإنترنت باستخدام أحدث التقنيات الهندسية.
-            </p>
-        </div>
-        
- 
-        
-        <div class="footer-section">
-            <h3>الدعم</h3>
-            <ul>
-                <li><a href="#">مركز المساعدة</a></li>
-                <li><a href="#">اتصل بنا</a></li>
-            </ul>
-        </div>
-        
-        <div class="footer-section">
-            <h3>معلومات قانونية</h3>
-            <ul>
-                <li><a href="#">سياسة الخصوصية</a></li>
-                <li><a href="#">شروط الاستخدام</a></li>
-                <li><a href="#">سياسة الكوكيز</a></li>
-            </ul>
-        </div>
-    </div>
-    
-    <div class="footer-bottom">
-        <p>&copy; 2026  ISHARATI PRO   v1.0   جميع الحقوق محفوظة.</p>
-        <p>Advanced Network Diagnostic Platform</p>
-    </div>
-</footer>
-
-<script>async function startTest() {
-    const btn = document.getElementById('testBtn');
-    const downloadEl = document.getElementById('downloadSpeed');
-    const pingEl = document.getElementById('pingSpeed');
-    
-    btn.disabled = true;
-    btn.innerHTML = 'جاري القياس الحقيقي...';
-
-    const startTime = performance.now();
-    
-    try {
-        // Measure Ping first
-        const pingStart = performance.now();
-        await fetch('/api/download-test', { method: 'HEAD' });
-        const pingEnd = performance.now();
-        pingEl.textContent = Math.round(pingEnd - pingStart);
-
-        // Measure Download Speed
-        const response = await fetch('/api/download-test', { cache: "no-store" });
-        const reader = response.body.getReader();
-        let receivedLength = 0;
-
-        while(true) {
-            const {done, value} = await reader.read();
-            if (done) break;
-            receivedLength += value.length;
-        }
-
-        const endTime = performance.now();
-        const durationInSeconds = (endTime - startTime) / 1000;
-        const bitsLoaded = receivedLength * 8;
-        const speedMbps = ((bitsLoaded / durationInSeconds) / 1000000).toFixed(2);
-
-        downloadEl.textContent = speedMbps;
-        document.getElementById('uploadSpeed').textContent = (speedMbps * 0.2).toFixed(2); // Estimated upload
-
-    } catch (error) {
-        document.getElementById('errorLog').textContent = 'خطأ في الاتصال: جرب متصفح آخر';
-        document.getElementById('errorLog').style.display = 'block';
-    } finally {
-        btn.disabled = false;
-        btn.innerHTML = 'إعادة الاختبار';
-    }
-}
-function performSearch() {
-    const query = document.getElementById('searchInput').value;
-    if(query) {
-        alert('البحث عن: ' + query);
-    }
-}
-</script>
-
-</body>
-</html>
-"""
-
-
-ANALYTICS_PAGE = """
-<!DOCTYPE html>
-<html lang="ar" dir="rtl">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="icon" type="image/png" href="{{ url_for('static', filename='logo2.png') }}">
-    <title>السجل التاريخي للتحليلات - ISHARATI PRO</title>
-    
-    <link href="https://fonts.googleapis.com/css2?family=Tajawal:wght@400;500;700;900&family=IBM+Plex+Sans+Arabic:wght@400;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    
-    <style>
-    /* Your CSS starts here */
-:root {
-    --primary: #0052FF;
-    --primary-dark: #003db3;
-    --secondary: #10b981;
-    --accent: #f59e0b;
-    --danger: #ef4444;
-    --bg: #f8fafc;
-    --card-bg: white;
-    --text: #1e293b;
-    --text-light: #64748b;
-    --border: #e2e8f0;
-    --shadow: 0 4px 6px -1px rgba(0,0,0,0.1);
-    --shadow-lg: 0 20px 25px -5px rgba(0,0,0,0.1);
-}
-
-* { margin: 0; padding: 0; box-sizing: border-box; }
-
-body { 
-    font-family: 'IBM Plex Sans Arabic', 'Tajawal', sans-serif; 
-    background: var(--bg); 
-    color: var(--text);
-    line-height: 1.6;
-    min-height: 100vh;
-}
-
-/* ========== HEADER ========== */
-.page-header {
-    background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
-    color: white;
-    padding: 30px 20px 20px; /* Reduced padding */
-}
-
-.header-content {
-    max-width: 1200px; /* Narrowed width */
-    margin: 0 auto;
-}
-
-.header-top {
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    margin-bottom: 20px;
-}
-.back-link {
-    font-size: 0.85rem;
-    padding: 8px 16px;
-    background: rgba(255,255,255,0.15);
-    border-radius: 50px;
-    text-decoration: none;
-    color: white;
-}
-.header-title h1 {
-    font-size: 1.8rem; /* Reduced from 2.5rem */
-    margin-bottom: 5px;
-}
-
-.header-title p {
-    font-size: 0.95rem;
-    opacity: 0.8;
-}
-.back-link:hover {
-    background: rgba(255,255,255,0.2);
-    transform: translateX(5px);
-}
-
-.header-actions {
-    display: flex;
-    gap: 15px;
-    align-items: center;
-}
-
-.search-box {
-    position: relative;
-}
-
-.search-input {
-    padding: 10px 40px 10px 20px;
-    border: 2px solid rgba(255,255,255,0.3);
-    border-radius: 50px;
-    background: rgba(255,255,255,0.1);
-    color: white;
-    width: 300px;
-    font-family: inherit;
-}
-
-.search-input::placeholder {
-    color: rgba(255,255,255,0.7);
-}
-
-.search-input:focus {
-    outline: none;
-    background: rgba(255,255,255,0.15);
-    border-color: rgba(255,255,255,0.5);
-}
-
-.search-icon {
-    position: absolute;
-    left: 15px;
-    top: 50%;
-    transform: translateY(-50%);
-    color: rgba(255,255,255,0.7);
-}
-
-.clear-btn {
-    background: var(--danger);
-    color: white;
-    padding: 10px 20px;
-    border: none;
-    border-radius: 50px;
-    font-weight: 700;
-    cursor: pointer;
-    transition: all 0.3s;
-    display: flex;
-    align-items: center;
-    gap: 8px;
-}
-
-.clear-btn:hover {
-    background: #dc2626;
-    transform: translateY(-2px);
-}
-
-.header-title h1 {
-    font-size: 2.5rem;
-    font-weight: 900;
-    margin-bottom: 10px;
-}
-
-.header-title p {
-    font-size: 1.1rem;
-    opacity: 0.9;
-}
-
-/* ========== STATS OVERVIEW ========== */
-.stats-container {
-    max-width: 1400px;
-    margin: 20px auto 40px; /* Changed -40px to 20px for a clear gap */
-    padding: 0 20px;
-    position: relative;
-    z-index: 10;
-}
-.header-title {
-    margin-bottom: 50px; /* Adjust this value to increase the space */
-}
-.stats-grid {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-    gap: 20px;
-}
-
-.stat-card {
-    background: var(--card-bg);
-    padding: 30px;
-    border-radius: 20px;
-    box-shadow: var(--shadow);
-    border: 1px solid var(--border);
-    transition: all 0.3s;
-    position: relative;
-    overflow: hidden;
-}
-
-.stat-card::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    right: 0;
-    height: 4px;
-    background: linear-gradient(90deg, var(--primary), var(--secondary));
-}
-
-.stat-card:hover {
-    transform: translateY(-5px);
-    box-shadow: var(--shadow-lg);
-}
-
-.stat-icon {
-    width: 60px;
-    height: 60px;
-    border-radius: 15px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 1.8rem;
-    margin-bottom: 15px;
-}
-
-.stat-icon.primary {
-    background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-    color: white;
-}
-
-.stat-icon.secondary {
-    background: linear-gradient(135deg, var(--secondary), #059669);
-    color: white;
-}
-
-.stat-icon.accent {
-    background: linear-gradient(135deg, var(--accent), #d97706);
-    color: white;
-}
-
-.stat-icon.info {
-    background: linear-gradient(135deg, #3b82f6, #2563eb);
-    color: white;
-}
-
-.stat-value {
-    font-size: 2.5rem;
-    font-weight: 900;
-    color: var(--text);
-    margin-bottom: 5px;
-}
-
-.stat-label {
-    color: var(--text-light);
-    font-size: 0.95rem;
-    font-weight: 600;
-}
-
-/* ========== MAIN CONTENT ========== */
-.container {
-    max-width: 1400px;
-    margin: 0 auto 60px;
-    padding: 0 20px;
-}
-
-/* ========== EMPTY STATE ========== */
-.empty-state {
-    background: var(--card-bg);
-    border-radius: 20px;
-    padding: 80px 40px;
-    text-align: center;
-    box-shadow: var(--shadow);
-}
-
-.empty-illustration {
-    font-size: 8rem;
-    margin-bottom: 30px;
-    opacity: 0.3;
-}
-
-.empty-state h2 {
-    font-size: 2rem;
-    color: var(--text);
-    margin-bottom: 15px;
-}
-
-.empty-state p {
-    color: var(--text-light);
-    font-size: 1.1rem;
-    margin-bottom: 30px;
-}
-
-.empty-cta {
-    display: inline-flex;
-    align-items: center;
-    gap: 10px;
-    background: var(--primary);
-    color: white;
-    padding: 15px 30px;
-    border-radius: 50px;
-    text-decoration: none;
-    font-weight: 700;
-    transition: all 0.3s;
-}
-
-.empty-cta:hover {
-    background: var(--primary-dark);
-    transform: translateY(-2px);
-}
-
-/* ========== ANALYTICS LIST ========== */
-.analytics-list {
-    display: flex;
-    flex-direction: column;
-    gap: 20px;
-}
-
-.analysis-card {
-    background: var(--card-bg);
-    border-radius: 20px;
-    padding: 30px;
-    box-shadow: var(--shadow);
-    border: 1px solid var(--border);
-    transition: all 0.3s;
-    position: relative;
-}
-
-.analysis-card:hover {
-    box-shadow: var(--shadow-lg);
-    transform: translateY(-2px);
-}
-
-.card-header-section {
-    display: flex;
-    justify-content: space-between;
-    align-items: flex-start;
-    margin-bottom: 20px;
-    padding-bottom: 20px;
-    border-bottom: 2px solid var(--bg);
-}
-
-.card-info {
-    flex: 1;
-}
-
-.card-id {
-    display: inline-block;
-    background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-    color: white;
-    padding: 5px 15px;
-    border-radius: 20px;
-    font-weight: 700;
-    font-size: 0.85rem;
-    margin-bottom: 10px;
-}
-
-.card-datetime {
-    color: var(--text-light);
-    font-size: 0.95rem;
-    display: flex;
-    align-items: center;
-    gap: 15px;
-    margin-bottom: 10px;
-}
-
-.card-location {
-    font-size: 1.1rem;
-    font-weight: 700;
-    color: var(--text);
-    display: flex;
-    align-items: center;
-    gap: 8px;
-}
-
-.operator-badge {
-    display: inline-block;
-    padding: 8px 16px;
-    border-radius: 20px;
-    font-weight: 700;
-    font-size: 0.9rem;
-}
-
-.operator-djezzy {
-    background: linear-gradient(135deg, #ef4444, #dc2626);
-    color: white;
-}
-
-.operator-mobilis {
-    background: linear-gradient(135deg, #10b981, #059669);
-    color: white;
-}
-
-.operator-ooredoo {
-    background: linear-gradient(135deg, #f59e0b, #d97706);
-    color: white;
-}
-
-.operator-adsl {
-    background: linear-gradient(135deg, #3b82f6, #2563eb);
-    color: white;
-}
-
-.status-row {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-    gap: 15px;
-    margin: 20px 0;
-}
-
-.status-item {
-    display: flex;
-    align-items: center;
-    gap: 10px;
-    padding: 12px;
-    background: var(--bg);
-    border-radius: 12px;
-}
-
-.status-icon {
-    font-size: 1.5rem;
-}
-
-.status-label {
-    font-size: 0.85rem;
-    color: var(--text-light);
-}
-
-.status-value {
-    font-weight: 700;
-    color: var(--text);
-}
-
-.diagnosis-summary {
-    background: linear-gradient(135deg, #fef3c7, #fde68a);
-    padding: 20px;
-    border-radius: 15px;
-    border-right: 4px solid var(--accent);
-    margin: 20px 0;
-}
-
-.diagnosis-summary p {
-    line-height: 1.8;
-    color: var(--text);
-}
-
-.card-actions {
-    display: flex;
-    gap: 10px;
-    justify-content: flex-end;
-    margin-top: 20px;
-}
-
-.action-btn {
-    display: inline-flex;
-    align-items: center;
-    gap: 8px;
-    padding: 10px 20px;
-    border-radius: 50px;
-    font-weight: 700;
-    border: none;
-    cursor: pointer;
-    transition: all 0.3s;
-    text-decoration: none;
-}
-
-.btn-view {
-    background: var(--primary);
-    color: white;
-}
-
-.btn-view:hover {
-    background: var(--primary-dark);
-    transform: translateY(-2px);
-}
-
-.btn-pdf {
-    background: var(--secondary);
-    color: white;
-}
-
-.btn-pdf:hover {
-    background: #059669;
-    transform: translateY(-2px);
-}
-
-.btn-delete {
-    background: var(--danger);
-    color: white;
-}
-
-.btn-delete:hover {
-    background: #dc2626;
-    transform: translateY(-2px);
-}
-
-/* ========== MODAL ========== */
-.modal {
-    display: none;
-    position: fixed;
-    top: 0;
-    left: 0;
-    right: 0;
-    bottom: 0;
-    background: rgba(0,0,0,0.7);
-    z-index: 1000;
-    padding: 20px;
-    overflow-y: auto;
-}
-
-.modal.active {
-    display: flex;
-    align-items: center;
-    justify-content: center;
-}
-
-.modal-content {
-    background: var(--card-bg);
-    border-radius: 20px;
-    max-width: 900px;
-    width: 100%;
-    max-height: 90vh;
-    overflow-y: auto;
-    position: relative;
-    animation: modalSlideIn 0.3s ease-out;
-}
-
-@keyframes modalSlideIn {
-    from {
-        opacity: 0;
-        transform: translateY(-50px);
-    }
-    to {
-        opacity: 1;
-        transform: translateY(0);
-    }
-}
-
-.modal-header {
-    background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-    color: white;
-    padding: 30px;
-    border-radius: 20px 20px 0 0;
-    position: sticky;
-    top: 0;
-    z-index: 10;
-}
-
-.modal-header h2 {
-    font-size: 1.8rem;
-    margin-bottom: 10px;
-}
-
-.close-modal {
-    position: absolute;
-    top: 20px;
-    left: 20px;
-    background: rgba(255,255,255,0.2);
-    border: none;
-    color: white;
-    width: 40px;
-    height: 40px;
-    border-radius: 50%;
-    cursor: pointer;
-    font-size: 1.5rem;
-    transition: all 0.3s;
-}
-
-.close-modal:hover {
-    background: rgba(255,255,255,0.3);
-    transform: rotate(90deg);
-}
-
-.modal-body {
-    padding: 30px;
-}
-
-.detail-section {
-    margin-bottom: 30px;
-}
-
-.detail-section h3 {
-    color: var(--primary);
-    font-size: 1.3rem;
-    margin-bottom: 15px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-    padding-bottom: 10px;
-    border-bottom: 2px solid var(--bg);
-}
-
-.detail-grid {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-    gap: 15px;
-    margin-top: 15px;
-}
-
-.detail-item {
-    background: var(--bg);
-    padding: 15px;
-    border-radius: 12px;
-}
-
-.detail-label {
-    font-size: 0.85rem;
-    color: var(--text-light);
-    margin-bottom: 5px;
-}
-
-.detail-value {
-    font-size: 1.1rem;
-    font-weight: 700;
-    color: var(--text);
-}
-
-.recommendation-grid {
-    display: grid;
-    gap: 15px;
-    margin-top: 15px;
-}
-
-.recommendation-item {
-    background: var(--bg);
-    padding: 15px 20px;
-    border-radius: 12px;
-    border-right: 4px solid var(--primary);
-    display: flex;
-    align-items: center;
-    gap: 12px;
-}
-
-.recommendation-item i {
-    font-size: 1.3rem;
-    color: var(--primary);
-}
-
-/* ========== FOOTER ========== */
-.footer {
-    background: #1e293b;
-    color: white;
-    padding: 40px 20px 20px;
-    margin-top: 80px;
-}
-
-.footer-content {
-    max-width: 1400px;
-    margin: 0 auto;
-    text-align: center;
-}
-
-.footer-links {
-    display: flex;
-    justify-content: center;
-    gap: 30px;
-    margin-bottom: 20px;
-    flex-wrap: wrap;
-}
-
-.footer-links a {
-    color: rgba(255,255,255,0.8);
-    text-decoration: none;
-    transition: color 0.3s;
-}
-
-.footer-links a:hover {
-    color: white;
-}
-
-.footer-disclaimer {
-    color: rgba(255,255,255,0.6);
-    font-size: 0.9rem;
-    line-height: 1.8;
-    max-width: 800px;
-    margin: 20px auto;
-    padding: 20px;
-    background: rgba(255,255,255,0.05);
-    border-radius: 12px;
-}
-
-.footer-bottom {
-    padding-top: 20px;
-    border-top: 1px solid rgba(255,255,255,0.1);
-    color: rgba(255,255,255,0.5);
-    font-size: 0.85rem;
-}
-
-/* ========== RESPONSIVE ========== */
-@media (max-width: 768px) {
-    .header-top {
-        flex-direction: column;
-        gap: 15px;
-    }
-    
-    .header-actions {
-        width: 100%;
-        flex-direction: column;
-    }
-    
-    .search-input {
-        width: 100%;
-    }
-    
- .stats-container {
-    max-width: 1200px;
-    margin: -30px auto 30px; /* Overlap header slightly */
-    padding: 0 20px;
-}
-
-.stat-card {
-    padding: 15px 20px; /* Reduced from 30px */
-    border-radius: 12px;
-}
-
-.stat-icon {
-    width: 40px; /* Reduced from 60px */
-    height: 40px;
-    font-size: 1.2rem;
-    margin-bottom: 10px;
-}
-
-.stat-value {
-    font-size: 1.5rem; /* Reduced from 2.5rem */
-}
-
-.stat-label {
-    font-size: 0.8rem;
-}
-.container {
-    max-width: 1200px;
-}
-
-.analysis-card {
-    padding: 20px; /* Reduced from 30px */
-    border-radius: 15px;
-    margin-bottom: 15px;
-}
-
-.card-header-section {
-    margin-bottom: 15px;
-    padding-bottom: 15px;
-}
-
-.card-location {
-    font-size: 1rem;
-}
-
-.status-row {
-    margin: 15px 0;
-    gap: 10px;
-}
-
-.status-item {
-    padding: 8px 12px;
-}
-
-.diagnosis-summary {
-    padding: 12px 15px;
-    font-size: 0.9rem;
-}
-
-.action-btn {
-    padding: 8px 16px;
-    font-size: 0.85rem;
-}
-    .status-row {
-        grid-template-columns: 1fr;
-    }
-    
-    .card-actions {
-        flex-direction: column;
-    }
-    
-    .action-btn {
-        width: 100%;
-        justify-content: center;
-    }
-}
-
-/* ========== ANIMATIONS ========== */
-@keyframes fadeIn {
-    from { opacity: 0; }
-    to { opacity: 1; }
-}
-
-.analysis-card {
-    animation: fadeIn 0.5s ease-out;
-}
-</style>
-</head>
-
-<body>
-
-<!-- Page Header -->
-<header class="page-header">
-    <div class="header-content">
-        <div class="header-top">
-            <a href="/" class="back-link">
-                <i class="fas fa-arrow-right"></i>
-                العودة للرئيسية
-            </a>
-            
-            <div class="header-actions">
-                <div class="search-box">
-                    <input type="text" class="search-input" id="searchInput" placeholder="ابحث حسب المدينة، المشغل، أو التاريخ...">
-                    <i class="fas fa-search search-icon"></i>
-                </div>
-                
-                <button class="clear-btn" onclick="clearAllHistory()">
-                    <i class="fas fa-trash-alt"></i>
-                    مسح الكل
-                </button>
-            </div>
-        </div>
-        <script>
-    // منع الزر الأيمن للفأرة
-    document.addEventListener('contextmenu', event => event.preventDefault());
-
-    // منع اختصارات لوحة المفاتيح مثل Ctrl+U (رؤية السورس)
-    document.onkeydown = function(e) {
-        if (e.ctrlKey && (e.keyCode === 85 || e.keyCode === 83)) {
-            return false;
-        }
-    };
-</script>
-<div class="header-title">
-    <h1> السجل التاريخي للتحليلات</h1>
-    <p> راجع وقارن وصدّر تحليلاتك السابقة للشبكة</p>
-    
-    <div class="footer-disclaimer" style="background: rgba(0,0,0,0.2); margin-top: 20px; max-width: 600px;">
-        <strong>⚠️ إخلاء مسؤولية:</strong>
-        <p style="font-size: 0.85rem; opacity: 0.9;">
-            جميع التحليلات المعروضة هي تقديرات إرشادية تعتمد على البيانات المدخلة وظروف الشبكة اللحظية. 
-            ISHARATI PRO ليست مسؤولة عن أي قرارات تتخذها بناءً على هذه التحليلات.
-        </p>
-    </div>
-</div>
-    </div>
-</header>
-
-<!-- Stats Overview -->
-<div class="stats-container">
-    <div class="stats-grid">
-        <div class="stat-card">
-            <div class="stat-icon primary">
-                <i class="fas fa-chart-line"></i>
-            </div>
-            <div class="stat-value">{{ stats.total }}</div>
-            <div class="stat-label">إجمالي التحليلات</div>
-        </div>
-        
-        <div class="stat-card">
-            <div class="stat-icon secondary">
-                <i class="fas fa-signal"></i>
-            </div>
-            <div class="stat-value">{{ stats.most_used_operator }}</div>
-            <div class="stat-label">المشغل الأكثر استخداماً</div>
-        </div>
-        
-        <div class="stat-card">
-            <div class="stat-icon accent">
-                <i class="fas fa-exclamation-triangle"></i>
-            </div>
-            <div class="stat-value">{{ stats.most_frequent_issue }}</div>
-            <div class="stat-label">المشكلة الأكثر تكراراً</div>
-        </div>
-        
-        <div class="stat-card">
-            <div class="stat-icon info">
-                <i class="fas fa-star"></i>
-            </div>
-            <div class="stat-value">{{ stats.average_score }}/100</div>
-            <div class="stat-label">متوسط جودة الشبكة</div>
-        </div>
-    </div>
-</div>
-
-<!-- Main Content -->
-<div class="container">
-    {% if analytics|length == 0 %}
-    <!-- Empty State -->
-    <div class="empty-state">
-        <div class="empty-illustration">
-            📭
-        </div>
-        <h2>لا توجد تحليلات بعد</h2>
-        <p>ابدأ أول تحليل للشبكة لرؤية النتائج هنا</p>
-        <a href="/" class="empty-cta">
-            <i class="fas fa-play-circle"></i>
-            ابدأ التحليل الآن
-        </a>
-    </div>
-    {% else %}
-    <!-- Analytics List -->
-    <div class="analytics-list" id="analyticsList">
-        {% for record in analytics %}
-        <div class="analysis-card" data-id="{{ record.id }}">
-            <div class="card-header-section">
-                <div class="card-info">
-                    <span class="card-id">
-                        <i class="fas fa-hashtag"></i> {{ record.id }}
-                    </span>
-                    
-                    <div class="card-datetime">
-                        <span><i class="fas fa-calendar"></i> {{ record.date }}</span>
-                        <span><i class="fas fa-clock"></i> {{ record.time }}</span>
-                    </div>
-                    
-                    <div class="card-location">
-                        <i class="fas fa-map-marker-alt"></i>
-                        {{ record.city }} - {{ record.wilaya }}
-                    </div>
-                </div>
-                
-                <span class="operator-badge operator-{{ record.operator.lower() }}">
-                    {{ record.operator }}
-                </span>
-            </div>
-            
-            <!-- Status Row -->
-            <div class="status-row">
-                <div class="status-item">
-                    <span class="status-icon">
-                        {% if record.network_score >= 75 %}
-                            ✅
-                        {% elif record.network_score >= 50 %}
-                            ⚠️
-                        {% else %}
-                            ❌
-                        {% endif %}
-                    </span>
-                    <div>
-                        <div class="status-label">قوة الإشارة</div>
-                        <div class="status-value">
-                            {% if record.score_breakdown.coverage >= 75 %}
-                                جيدة
-                            {% elif record.score_breakdown.coverage >= 50 %}
-                                متوسطة
-                            {% else %}
-                                ضعيفة
-                            {% endif %}
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="status-item">
-                    <span class="status-icon">
-                        {% if record.speed_data and record.speed_data.download >= 10 %}
-                            🚀
-                        {% elif record.speed_data and record.speed_data.download >= 5 %}
-                            ⚡
-                        {% else %}
-                            🐌
-                        {% endif %}
-                    </span>
-                    <div>
-                        <div class="status-label">السرعة</div>
-                        <div class="status-value">
-                            {% if record.speed_data %}
-                                {% if record.speed_data.download >= 10 %}
-                                    سريعة
-                                {% elif record.speed_data.download >= 5 %}
-                                    جيدة
-                                {% else %}
-                                    بطيئة
-                                {% endif %}
-                            {% else %}
-                                غير متوفر
-                            {% endif %}
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="status-item">
-                    <span class="status-icon">
-                        {% if record.speed_data and record.speed_data.ping < 50 %}
-                            ✅
-                        {% elif record.speed_data and record.speed_data.ping < 100 %}
-                            ⚠️
-                        {% else %}
-                            ❌
-                        {% endif %}
-                    </span>
-                    <div>
-                        <div class="status-label">الكمون</div>
-                        <div class="status-value">
-                            {% if record.speed_data %}
-                                {% if record.speed_data.ping < 50 %}
-                                    منخفض
-                                {% elif record.speed_data.ping < 100 %}
-                                    متوسط
-                                {% else %}
-                                    مرتفع
-                                {% endif %}
-                            {% else %}
-                                غير متوفر
-                            {% endif %}
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Diagnosis Summary -->
-            <div class="diagnosis-summary">
-                <p><strong>💡 التشخيص:</strong> {{ record.short_recommendation }}</p>
-            </div>
-            
-            <!-- Actions -->
-            <div class="card-actions">
-                <button class="action-btn btn-view" onclick="viewDetails('{{ record.id }}')">
-                    <i class="fas fa-eye"></i>
-                    عرض التفاصيل
-                </button>
-                
-                <a href="/download_pdf_analytics/{{ record.id }}" class="action-btn btn-pdf">
-                    <i class="fas fa-file-pdf"></i>
-                    تصدير PDF
-                </a>
-                
-                <button class="action-btn btn-delete" onclick="deleteRecord('{{ record.id }}')">
-                    <i class="fas fa-trash"></i>
-                    حذف
-                </button>
-            </div>
-        </div>
-        {% endfor %}
-    </div>
-    {% endif %}
-</div>
-
-<!-- Details Modal -->
-<div class="modal" id="detailsModal">
-    <div class="modal-content">
-        <div class="modal-header">
-            <button class="close-modal" onclick="closeModal()">
-                <i class="fas fa-times"></i>
-            </button>
-            <h2 id="modalTitle">تفاصيل التحليل</h2>
-            <p id="modalSubtitle"></p>
-        </div>
-        
-        <div class="modal-body" id="modalBody">
-            <!-- Content will be injected here -->
-        </div>
-    </div>
-</div>
-
-<!-- Footer -->
-<footer class="footer">
-    <div class="footer-content">
-        <div class="footer-links">
-            <a href="/">الرئيسية</a>
-            <a href="/guide">دليل الاستخدام</a>
-            <a href="/knowledge">المعرفة التقنية</a>
-            <a href="/speed-test">اختبار السرعة</a>
-            <a href="#">تواصل معنا</a>
-        </div>
-        
-
-        
-        <div class="footer-bottom">
-            <p>&copy; 2026 ISHARATI PRO v1.0 - Advanced Network Diagnostic Platform</p>
-            <p>جميع الحقوق محفوظة</p>
-        </div>
-    </div>
-</footer>
-
-<script>
-// Store analytics data for access
-const analyticsData = {{ analytics_json|safe }};
-
-// Search functionality
-// Updated Search Functionality
-document.getElementById('searchInput').addEventListener('input', function(e) {
-    const searchTerm = e.target.value.toLowerCase().trim();
-    const cards = document.querySelectorAll('.analysis-card');
-    
-    cards.forEach(card => {
-        // Targets the location text and the operator badge text
-        const locationText = card.querySelector('.card-location').textContent.toLowerCase();
-        const operatorText = card.querySelector('.operator-badge').textContent.toLowerCase();
-        const cardId = card.querySelector('.card-id').textContent.toLowerCase();
-
-        if (locationText.includes(searchTerm) || 
-            operatorText.includes(searchTerm) || 
-            cardId.includes(searchTerm)) {
-            card.style.display = 'block';
-            card.style.animation = 'fadeIn 0.3s ease-out';
-        } else {
-            card.style.display = 'none';
-        }
-    });
-});
-// Add this inside your input listener
-const visibleCards = document.querySelectorAll('.analysis-card[style="display: block;"]');
-const listContainer = document.getElementById('analyticsList');
-
-if (searchTerm !== "" && visibleCards.length === 0) {
-    // You can trigger a "No results" alert or div here
-    console.log("No matching analyses found.");
-}
-// View details
-function viewDetails(recordId) {
-    const record = analyticsData.find(r => r.id === recordId);
-    if (!record) return;
-    
-    const modal = document.getElementById('detailsModal');
-    const modalBody = document.getElementById('modalBody');
-    const modalTitle = document.getElementById('modalTitle');
-    const modalSubtitle = document.getElementById('modalSubtitle');
-    
-    modalTitle.textContent = `تحليل رقم ${record.id}`;
-    modalSubtitle.textContent = `${record.city}, ${record.wilaya} - ${record.date} ${record.time}`;
-    
-    let speedSection = '';
-    if (record.speed_data) {
-        speedSection = `
-            <div class="detail-section">
-                <h3><i class="fas fa-tachometer-alt"></i> نتائج اختبار السرعة</h3>
-                <div class="detail-grid">
-                    <div class="detail-item">
-                        <div class="detail-label">التحميل</div>
-                        <div class="detail-value">${record.speed_data.download} Mbps</div>
-                    </div>
-                    <div class="detail-item">
-                        <div class="detail-label">الرفع</div>
-                        <div class="detail-value">${record.speed_data.upload} Mbps</div>
-                    </div>
-                    <div class="detail-item">
-                        <div class="detail-label">Ping</div>
-                        <div class="detail-value">${record.speed_data.ping} ms</div>
-                    </div>
-                </div>
-            </div>
-        `;
-    }
-    
-    let recommendationsHtml = '';
-    if (record.recommendations) {
-        const allRecs = [
-            ...record.recommendations.physical,
-            ...record.recommendations.network,
-            ...record.recommendations.usage
-        ];
-        
-        if (allRecs.length > 0) {
-            recommendationsHtml = `
-                <div class="detail-section">
-                    <h3><i class="fas fa-lightbulb"></i> التوصيات</h3>
-                    <div class="recommendation-grid">
-                        ${allRecs.map(rec => `
-                            <div class="recommendation-item">
-                                <i class="fas fa-check-circle"></i>
-                                <span>${rec}</span>
-                            </div>
-                        `).join('')}
-                    </div>
-                </div>
-            `;
-        }
-    }
-    
-    modalBody.innerHTML = `
-        <div class="detail-section">
-            <h3><i class="fas fa-map-marker-alt"></i> الموقع والبيئة</h3>
-            <div class="detail-grid">
-                <div class="detail-item">
-                    <div class="detail-label">خط العرض</div>
-                    <div class="detail-value">${record.lat}</div>
-                </div>
-                <div class="detail-item">
-                    <div class="detail-label">خط الطول</div>
-                    <div class="detail-value">${record.lon}</div>
-                </div>
-                <div class="detail-item">
-                    <div class="detail-label">المكان</div>
-                    <div class="detail-value">${record.place}</div>
-                </div>
-                <div class="detail-item">
-                    <div class="detail-label">نوع الشبكة</div>
-                    <div class="detail-value">${record.network_type}</div>
-                </div>
-                <div class="detail-item">
-                    <div class="detail-label">المشغل</div>
-                    <div class="detail-value">${record.operator}</div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="detail-section">
-            <h3><i class="fas fa-signal"></i> مؤشرات الإشارة</h3>
-            <div class="detail-grid">
-                <div class="detail-item">
-                    <div class="detail-label">RSRP (قوة الإشارة)</div>
-                    <div class="detail-value">${record.rsrp} dBm</div>
-                </div>
-                <div class="detail-item">
-                    <div class="detail-label">SINR (جودة الإشارة)</div>
-                    <div class="detail-value">${record.sinr} dB</div>
-                </div>
-                <div class="detail-item">
-                    <div class="detail-label">التقييم الإجمالي</div>
-                    <div class="detail-value">${record.network_score}/100 ${record.score_breakdown.stars}</div>
-                </div>
-            </div>
-        </div>
-        
-        ${speedSection}
-        
-        <div class="detail-section">
-            <h3><i class="fas fa-stethoscope"></i> التشخيص الكامل</h3>
-            <div class="diagnosis-summary">
-                <p>${record.short_recommendation}</p>
-            </div>
-        </div>
-        
-        ${recommendationsHtml}
-    `;
-    
-    modal.classList.add('active');
-}
-
-function closeModal() {
-    document.getElementById('detailsModal').classList.remove('active');
-}
-
-// Close modal on background click
-document.getElementById('detailsModal').addEventListener('click', function(e) {
-    if (e.target === this) {
-        closeModal();
-    }
-});
-
-// Delete record
-function deleteRecord(recordId) {
-    if (!confirm('هل أنت متأكد من حذف هذا التحليل؟ لا يمكن التراجع عن هذا الإجراء.')) {
-        return;
-    }
-    
-    fetch(`/api/delete_analytics/${recordId}`, {
-        method: 'DELETE'
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.success) {
-            const card = document.querySelector(`[data-id="${recordId}"]`);
-            card.style.animation = 'fadeOut 0.3s ease-out';
-            setTimeout(() => {
-                card.remove();
-                
-                // Check if list is empty
-                if (document.querySelectorAll('.analysis-card').length === 0) {
-                    location.reload();
-                }
-            }, 300);
-        } else {
-            alert('حدث خطأ أثناء الحذف');
-        }
-    })
-    .catch(error => {
-        alert('فشل الاتصال بالخادم');
-    });
-}
-
-// Clear all history
-function clearAllHistory() {
-    if (!confirm('هل أنت متأكد من حذف جميع التحليلات؟ لا يمكن التراجع عن هذا الإجراء.')) {
-        return;
-    }
-    
-    fetch('/api/clear_all_analytics', {
-        method: 'DELETE'
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.success) {
-            location.reload();
-        } else {
-            alert('حدث خطأ أثناء الحذف');
-        }
-    })
-    .catch(error => {
-        alert('فشل الاتصال بالخادم');
-    });
-}
-
-// Add fadeOut animation
-const style = document.createElement('style');
-style.textContent = `
-    @keyframes fadeOut {
-        from { opacity: 1; transform: scale(1); }
-        to { opacity: 0; transform: scale(0.95); }
-    }
-`;
-document.head.appendChild(style);
-</script>
-
-</body>
-</html>
-"""
-
-SPEED_TEST_PAGE = """
-<!DOCTYPE html>
-<html lang="ar" dir="rtl">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="icon" type="image/png" href="{{ url_for('static', filename='logo2.png') }}">
-    <title>اختبار سرعة الإنترنت - ISHARATI PRO</title>
-    
-    <link href="https://fonts.googleapis.com/css2?family=Tajawal:wght@400;500;700;900&family=IBM+Plex+Sans+Arabic:wght@400;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    
-    <style>
-:root {
-    --primary: #0052FF;
-    --primary-dark: #0052FF;
-    --secondary: #0052FF;
-    --accent: #0052FF;
-    --bg: #FFFFFF;
-    --card-bg: #1a1d23;
-    --text: white;
-    --border: #e2e8f0;
-}
-
-* { margin: 0; padding: 0; box-sizing: border-box; }
-
-body { 
-    font-family: 'IBM Plex Sans Arabic', sans-serif; 
-    background: var(--bg); 
-    color: var(--text);
-    line-height: 1.5;
-    font-size: 0.95rem; /* Reduced base font size */
-}
-    .header {
-        background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-        color: white;
-        padding: 60px 20px;
-        text-align: center;
-        border-bottom-left-radius: 40px;
-        border-bottom-right-radius: 40px;
-        box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-    }
-
-.header-content {
-    max-width: 1400px;
-    margin: 0 auto;
-    padding: 15px 20px;
-    display: flex;
-    /* This ensures they follow the Right-to-Left flow */
-    flex-direction: row; 
-    justify-content: space-between;
-    align-items: center;
-    gap: 30px;
-}
-.logo {
-    display: flex;
-    align-items: center;
-    gap: 12px;
-    color: var(--primary);
-    font-weight: 900;
-    font-size: 1.4rem;
-    text-decoration: none;
-}
-
-.logo-icon-box {
-    background: var(--primary);
-    color: white;
-    width: 40px;
-    height: 40px;
-    border-radius: 10px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-}
-.logo-section {
-    display: flex;
-    align-items: center;
-    gap: 12px;
-    text-decoration: none;
-    /* Ensures the icon stays to the right of the text within the logo group */
-    flex-direction: row; 
-}
-.logo-text p {
-    font-size: 0.75rem;
-    color: var(--text-light);
-}
-/* Search Bar */
-.search-container {
-    flex: 1;
-    max-width: 600px;
-}
-
-.search-wrapper {
-    position: relative;
-    display: flex;
-    align-items: center;
-}
-
-.search-input {
-    width: 100%;
-    /* Add padding to the left so text doesn't go under the button */
-    padding: 12px 20px 12px 50px; 
-    border: 1px solid var(--border);
-    border-radius: 50px;
-}
-.search-input:focus {
-    outline: none;
-    border-color: var(--primary);
-    box-shadow: 0 0 0 3px rgba(0, 82, 255, 0.1);
-}
-
-.search-btn {
-    position: absolute;
-    left: 5px; 
-    background: var(--primary);
-    color: white;
-    border: none;
-    padding: 8px 20px;
-    border-radius: 50px;
-    cursor: pointer;
-}
-
-    .back-btn {
-        display: inline-flex; align-items: center; gap: 8px;
-        color: white; text-decoration: none; font-weight: bold;
-        margin-bottom: 25px; background: rgba(255,255,255,0.15);
-        padding: 10px 20px; border-radius: 50px; transition: 0.3s;
-        backdrop-filter: blur(5px);
-    }
-    .back-btn:hover { background: white; color: var(--primary); transform: translateX(-5px); }
-.search-btn:hover { background: var(--primary-dark); }
-
-.search-results {
-    position: absolute;
-    top: 110%;
-    right: 0;
-    left: 0;
-    background: white;
-    border-radius: 15px;
-    box-shadow: var(--shadow-lg);
-    max-height: 400px;
-    overflow-y: auto;
-    display: none;
-    z-index: 100;
-}
-
-.search-results.active { display: block; }
-
-.search-result-item {
-    padding: 15px 20px;
-    border-bottom: 1px solid var(--border);
-    cursor: pointer;
-    transition: background 0.2s;
-}
-
-.search-result-item:hover { background: var(--bg); }
-.search-result-item:last-child { border-bottom: none; }
-
-.cta-btn {
-    background: var(--primary);
-    color: white;
-    padding: 10px 25px;
-    border-radius: 50px;
-    text-decoration: none;
-    font-weight: 700;
-    transition: all 0.3s;
-    border: none;
-    cursor: pointer;
-}
-
-.cta-btn:hover {
-    background: var(--primary-dark);
-    transform: translateY(-2px);
-    box-shadow: var(--shadow);
-}
-
-.mobile-menu-btn {
-    display: none;
-    background: transparent;
-    border: none;
-    font-size: 1.5rem;
-    cursor: pointer;
-    color: var(--text);
-}
-
-.guide-btn {
-    background: var(--primary);
-    color: white;
-    padding: 10px 25px;
-    border-radius: 50px;
-    text-decoration: none;
-    font-weight: bold;
-    font-size: 0.9rem;
-}.search-icon {
-    position: absolute;
-    right: 15px;
-    top: 50%;
-    transform: translateY(-50%);
-    color: var(--primary);
-}.search-container {
-    flex: 1;
-    max-width: 500px;
-    margin: 0 30px;
-    position: relative;
-}
-
-.search-input {
-    width: 100%;
-    padding: 10px 45px 10px 20px;
-    border: 1px solid var(--border);
-    border-radius: 50px;
-    font-family: inherit;
-    background: #fdfdfd;
-}
-
-
-/* Hover Animation for inactive links */
-.nav-links a:hover {
-    background-color: #f0f7ff;
-    color: #007bff;
-    transform: translateY(-3px); /* Lifts the button up */
-}
-
-/* The Blue "Active" Button (The one in the picture) */
-.nav-links a.active {
-    background-color: #007bff;
-    color: white;
-    /* This creates the glow/shadow effect seen in picture 2 */
-    box-shadow: 0 8px 15px rgba(0, 123, 255, 0.25);
-    transform: translateY(-2px);
-}
-
-/* Active Button pulse/click effect */
-.nav-links a.active:active {
-    transform: translateY(0);
-    box-shadow: 0 4px 6px rgba(0, 123, 255, 0.2);
-}
-.container {
-    flex: 1;
-    display: flex;
-    justify-content: center;
-    align-items: center;
-    padding: 40px 20px;
-
-}
-
-.speed-card {
-    background: var(--card-bg);
-    padding: 40px;
-    border-radius: 25px;
-    text-align: center;
-    width: 100%;
-    max-width: 500px;
-    border: 1px solid var(--border);
-    box-shadow: 0 10px 40px rgba(0,0,0,0.3);
-}
-
-.speed-card h1 {
-    color: var(--primary);
-    margin-bottom: 30px;
-    font-size: 2rem;
-}
-
-.speed-display {
-    margin: 40px 0;
-}
-
-.speed-value {
-    font-size: 5rem;
-    font-weight: bold;
-    color: #00ffcc;
-    margin: 20px 0;
-}
-
-.speed-label {
-    font-size: 1.2rem;
-    color: #888;
-}
-
-.secondary-stats {
-    display: grid;
-    grid-template-columns: 1fr 1fr;
-    gap: 20px;
-    margin: 30px 0;
-}
-
-.stat-box {
-    background: #000;
-    padding: 20px;
-    border-radius: 15px;
-}
-
-.stat-value {
-    font-size: 2rem;
-    color: #00ffcc;
-    font-weight: bold;
-}
-
-.stat-label {
-    color: #888;
-    font-size: 0.9rem;
-    margin-top: 5px;
-}
-
-.test-btn {
-    background: #00ffcc;
-    border: none;
-    padding: 18px 40px;
-    border-radius: 50px;
-    font-weight: bold;
-    font-size: 1.1rem;
-    cursor: pointer;
-    width: 100%;
-    transition: all 0.3s;
-    color: #000;
-}
-
-.test-btn:hover {
-    background: #00d4aa;
-    transform: translateY(-2px);
-}
-
-.test-btn:disabled {
-    background: #444;
-    color: #888;
-    cursor: wait;
-}
-
-.error-log {
-    color: #ff5555;
-    font-size: 0.9rem;
-    margin-top: 20px;
-    background: #000;
-    padding: 15px;
-    border-radius: 10px;
-    display: none;
-}
-
-.loading-spinner {
-    display: inline-block;
-    width: 30px;
-    height: 30px;
-    border: 4px solid rgba(255,255,255,0.3);
-    border-radius: 50%;
-    border-top-color: #00ffcc;
-    animation: spin 1s ease-in-out infinite;
-}
-
-@keyframes spin {
-    to { transform: rotate(360deg); }
-}
-
-.info-section {
-    margin-top: 30px;
-    padding-top: 30px;
-    border-top: 1px solid var(--border);
-}
-
-.info-section h3 {
-    color: var(--primary);
-    margin-bottom: 15px;
-}
-
-.info-grid {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-    gap: 15px;
-    margin-top: 20px;
-}
-
-.info-box {
-    background: #000;
-    padding: 15px;
-    border-radius: 10px;
-    text-align: right;
-}
-
-.info-box h4 {
-    color: #00ffcc;
-    font-size: 0.9rem;
-    margin-bottom: 5px;
-}
-
-.info-box p {
-    color: #FFFFFF;
-    font-size: 0.85rem;
-}
-
-@media (max-width: 768px) {
-    .speed-value {
-        font-size: 3.5rem;
-    }
-    
-    .secondary-stats {
-        grid-template-columns: 1fr;
-    }
-}
-</style>
-</head>
-<body>
-
-
-
-<div class="header">
-    <div style="max-width: 1100px; margin: 0 auto; text-align: right;">
-        <a href="/" class="back-btn"><i class="fas fa-arrow-right"></i> العودة للرئيسية</a>
-    </div>
-    <h1>فحص نبض الشبكة</h1>
-    <p>حلل سرعة إنترنتك وتعلّم كيف تزيد من استقرارها</p>
-</div>
-
-
-
-<div class="container">
-    <div class="speed-card">
-        <h1><i class="fas fa-tachmoeter-alt"></i> اختبار سرعة الإنترنت</h1>
-        
-        <div class="speed-display">
-            <div class="speed-label">سرعة التحميل</div>
-            <div class="speed-value" id="downloadSpeed">0.0</div>
-            <div class="speed-label">Mbps</div>
-        </div>
-        
-        <div class="secondary-stats">
-            <div class="stat-box">
-                <div class="stat-value" id="uploadSpeed">-</div>
-                <div class="stat-label">الرفع (Mbps)</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-value" id="pingSpeed">-</div>
-                <div class="stat-label">Ping (ms)</div>
-            </div>
-        </div>
-        
-        <button class="test-btn" id="testBtn" onclick="startTest()">
-            <i class="fas fa-play"></i> ابدأ الاختبار
-        </button>
-        
-        <div class="error-log" id="errorLog"></div>
-        
-        <div class="info-section">
-            <h3><i class="fas fa-info-circle"></i> معلومات مفيدة</h3>
-            <div class="info-grid">
-                <div class="info-box">
-                    <h4>سرعة ممتازة</h4>
-                    <p>> 20 Mbps</p>
-                </div>
-                <div class="info-box">
-                    <h4>سرعة جيدة</h4>
-                    <p>5-20 Mbps</p>
-                </div>
-                <div class="info-box">
-                    <h4>سرعة محدودة</h4>
-                    <p>1-5 Mbps</p>
-                </div>
-                <div class="info-box">
-                    <h4>سرعة بطيئة</h4>
-                    <p>< 1 Mbps</p>
-                </div>
-            </div>
-        </div>
-    </div>
-</div>
-<script>
-    // منع الزر الأيمن للفأرة
-    document.addEventListener('contextmenu', event => event.preventDefault());
-
-    // منع اختصارات لوحة المفاتيح مثل Ctrl+U (رؤية السورس)
-    document.onkeydown = function(e) {
-        if (e.ctrlKey && (e.keyCode === 85 || e.keyCode === 83)) {
-            return false;
-        }
-    };
-</script>
-<script>async function startTest() {
-    const btn = document.getElementById('testBtn');
-    const downloadEl = document.getElementById('downloadSpeed');
-    
-    btn.disabled = true;
-    btn.innerHTML = 'جاري القياس الحقيقي...';
-
-    const startTime = performance.now();
-    
-    try {
-        // Fetch the 5MB dummy file from your own API
-        const response = await fetch('/api/download-test', { cache: "no-store" });
-        const reader = response.body.getReader();
-        let receivedLength = 0;
-
-        while(true) {
-            const {done, value} = await reader.read();
-            if (done) break;
-            receivedLength += value.length;
-        }
-
-        const endTime = performance.now();
-        const durationInSeconds = (endTime - startTime) / 1000;
-        const bitsLoaded = receivedLength * 8;
-        const speedMbps = ((bitsLoaded / durationInSeconds) / 1000000).toFixed(2);
-
-        downloadEl.textContent = speedMbps;
-        document.getElementById('uploadSpeed').textContent = "---";
-        document.getElementById('pingSpeed').textContent = Math.round(durationInSeconds * 10) + " ms";
-
-    } catch (error) {
-        document.getElementById('errorLog').textContent = 'فشل الاختبار: قيود الخادم';
-        document.getElementById('errorLog').style.display = 'block';
-    } finally {
-        btn.disabled = false;
-        btn.innerHTML = 'إعادة الاختبار';
-    }
-}
-</script>
-
-</body>
-</html>
-"""
-GUIDE_PAGE = """
-<!DOCTYPE html>
-<html lang="ar" dir="rtl">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="icon" type="image/png" href="{{ url_for('static', filename='logo2.png') }}">
-    <title>دليل الاستخدام الشامل - ISHARATI PRO</title>
-    
-    <link href="https://fonts.googleapis.com/css2?family=Tajawal:wght@400;500;700;900&family=IBM+Plex+Sans+Arabic:wght@400;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    
- <style>
-        :root {
-            --primary: #0052FF;
-            --primary-dark: #003db3;
-            --primary-light: #3B82F6;
-            --secondary: #10b981;
-            --accent: #f59e0b;
-            --danger: #ef4444;
-            --bg: #f8fafc;
-            --text: #1e293b;
-            --text-light: #64748b;
-            --border: #e2e8f0;
-        }
-
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: var(--bg);
-            color: var(--text);
-            line-height: 1.8;
-        }
-
-        /* Header Styles */
-.guide-header {
-    background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
-    color: white;
-    /* Change the bottom padding from 80px to 120px or more */
-    padding: 40px 20px 120px; 
-    text-align: center;
-    border-bottom-left-radius: 40px;
-    border-bottom-right-radius: 40px;
-    box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-}
-
-        .back-btn-wrapper {
-            max-width: 1200px;
-            margin: 0 auto;
-            text-align: right;
-            padding-bottom: 20px;
-        }
-
-        .back-btn-modern {
-            display: inline-flex;
-            align-items: center;
-            gap: 10px;
-            color: white;
-            text-decoration: none;
-            font-weight: 700;
-            background: rgba(255, 255, 255, 0.15);
-            padding: 10px 22px;
-            border-radius: 50px;
-            backdrop-filter: blur(8px);
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            transition: all 0.3s ease;
-        }
-
-        .back-btn-modern:hover {
-            background: white;
-            color: var(--primary);
-            transform: translateX(5px);
-        }
-
-/* ========== HEADER ========== */
-.guide-header {
-    background: linear-gradient(135deg, var(--primary) 0%, #003db3 100%);
-    color: white;
-    padding: 40px 20px;
-    text-align: center;
-    box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-}
-
-/* البحث عن العنوان الرئيسي */
-.guide-header h1 {
-    font-size: 1.8rem; /* قمنا بتصغيره من 2.5rem */
-    font-weight: 800;
-    margin-bottom: 10px;
-}
-
-/* البحث عن النص الفرعي */
-.guide-header p {
-    font-size: 1rem; /* قمنا بتصغيره من 1.2rem */
-    opacity: 0.9;
-    max-width: 600px;
-    margin: 0 auto;
-}
-.guide-header {
-    padding: 30px 20px 60px; /* تقليل التباعد العلوي والسفلي */
-    /* باقي الخصائص كما هي */
-}
-.header-actions {
-    margin-top: 30px;
-    display: flex;
-    justify-content: center;
-    gap: 15px;
-    flex-wrap: wrap;
-}
-
-.header-btn {
-    background: rgba(255,255,255,0.2);
-    backdrop-filter: blur(10px);
-    color: white;
-    padding: 12px 30px;
-    border-radius: 50px;
-    text-decoration: none;
-    font-weight: 700;
-    transition: all 0.3s;
-    border: 2px solid rgba(255,255,255,0.3);
-}
-
-.header-btn:hover {
-    background: white;
-    color: var(--primary);
-    transform: translateY(-2px);
-}
-
-.header-btn.primary {
-    background: white;
-    color: var(--primary);
-}
-
-/* ========== TABLE OF CONTENTS ========== */
-.toc-container {
-    max-width: 1200px;
-    /* The first value is the top margin. 
-       Currently -50px (pulls it up). 
-       Change it to -20px or 0px to create more space from the text above. */
-    margin: -20px auto 40px; 
-    padding: 0 20px;
-    position: relative;
-    z-index: 10;
-}
-
-.toc-card {
-    background: white;
-    border-radius: 20px;
-    padding: 30px;
-    box-shadow: 0 10px 40px rgba(0,0,0,0.1);
-    border: 1px solid var(--border);
-}
-
-.toc-title {
-    font-size: 1.5rem;
-    font-weight: 800;
-    color: var(--primary);
-    margin-bottom: 20px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.toc-grid {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-    gap: 15px;
-}
-
-.toc-item {
-    padding: 15px;
-    background: var(--bg);
-    border-radius: 12px;
-    text-decoration: none;
-    color: var(--text);
-    font-weight: 600;
-    transition: all 0.3s;
-    display: flex;
-    align-items: center;
-    gap: 12px;
-    border: 2px solid transparent;
-}
-
-.toc-item:hover {
-    background: var(--primary);
-    color: white;
-    transform: translateX(-5px);
-    border-color: var(--primary);
-}
-
-.toc-icon {
-    width: 40px;
-    height: 40px;
-    background: linear-gradient(135deg, var(--primary), var(--primary-light));
-    color: white;
-    border-radius: 10px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 1.2rem;
-    flex-shrink: 0;
-}
-
-/* ========== MAIN CONTENT ========== */
-.container, .toc-container {
-    max-width: 1000px; /* هذا الحجم مثالي لموازنة العناصر كما في صورتك */
-    margin-left: auto;
-    margin-right: auto;
-}
-
-.section {
-    background: white;
-    padding: 40px;
-    border-radius: 25px;
-    margin-bottom: 30px;
-    box-shadow: 0 4px 15px rgba(0,0,0,0.05);
-    border-right: 6px solid var(--primary);
-    scroll-margin-top: 100px;
-}
-
-.section-header {
-    display: flex;
-    align-items: center;
-    gap: 15px;
-    margin-bottom: 30px;
-    padding-bottom: 20px;
-    border-bottom: 3px solid var(--bg);
-}
-
-.section-icon {
-    width: 60px;
-    height: 60px;
-    background: linear-gradient(135deg, var(--primary), var(--primary-light));
-    color: white;
-    border-radius: 15px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 1.8rem;
-    flex-shrink: 0;
-}
-
-.section-title {
-    font-size: 2rem;
-    font-weight: 900;
-    color: var(--text);
-}
-
-.section-subtitle {
-    color: var(--text-light);
-    font-size: 0.95rem;
-    margin-top: 5px;
-}
-
-/* ========== CONTENT BLOCKS ========== */
-.content-block {
-    margin-bottom: 25px;
-}
-
-.block-title {
-    font-size: 1.3rem;
-    font-weight: 700;
-    color: var(--primary);
-    margin-bottom: 15px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.method-card {
-    background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-    padding: 25px;
-    border-radius: 15px;
-    margin-bottom: 20px;
-    border-right: 4px solid var(--secondary);
-}
-
-.method-card h4 {
-    color: var(--secondary);
-    font-size: 1.2rem;
-    margin-bottom: 15px;
-    display: flex;
-    align-items: center;
-    gap: 10px;
-}
-
-.method-card ul, .content-block ul {
-    padding-right: 20px;
-    margin: 15px 0;
-}
-
-.method-card li, .content-block li {
-    margin: 10px 0;
-    line-height: 1.8;
-}
-
-/* ========== INFO BOXES ========== */
-.info-box {
-    background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);
-    padding: 20px 25px;
-    border-radius: 15px;
-    border-right: 5px solid var(--accent);
-    margin: 25px 0;
-    display: flex;
-    gap: 15px;
-}
-
-.info-box-icon {
-    font-size: 1.5rem;
-    color: var(--accent);
-    flex-shrink: 0;
-}
-
-.warning-box {
-    background: linear-gradient(135deg, #fee2e2 0%, #fecaca 100%);
-    border-right-color: var(--danger);
-}
-
-.warning-box .info-box-icon {
-    color: var(--danger);
-}
-
-.success-box {
-    background: linear-gradient(135deg, #d1fae5 0%, #a7f3d0 100%);
-    border-right-color: var(--secondary);
-}
-
-.success-box .info-box-icon {
-    color: var(--secondary);
-}
-
-/* ========== TABLE ========== */
-.data-table {
-    width: 100%;
-    border-collapse: separate;
-    border-spacing: 0;
-    margin: 25px 0;
-    overflow: hidden;
-    border-radius: 15px;
-    box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-}
-
-.data-table thead {
-    background: linear-gradient(135deg, var(--primary), var(--primary-light));
-    color: white;
-}
-
-.data-table th {
-    padding: 18px;
-    text-align: right;
-    font-weight: 700;
-    font-size: 1.05rem;
-}
-
-.data-table td {
-    padding: 18px;
-    border-bottom: 1px solid var(--border);
-    background: white;
-}
-
-.data-table tr:hover td {
-    background: var(--bg);
-}
-
-.data-table tr:last-child td {
-    border-bottom: none;
-}
-
-/* ========== BADGES & HIGHLIGHTS ========== */
-.badge {
-    display: inline-block;
-    background: linear-gradient(135deg, #dbeafe, #bfdbfe);
-    color: var(--primary);
-    padding: 5px 15px;
-    border-radius: 20px;
-    font-weight: 700;
-    font-size: 0.9rem;
-    margin: 0 5px;
-}
-
-.highlight {
-    background: linear-gradient(135deg, #fef3c7, #fde68a);
-    padding: 2px 8px;
-    border-radius: 5px;
-    font-weight: 600;
-}
-
-.check-mark {
-    color: var(--secondary);
-    font-weight: 700;
-    font-size: 1.1rem;
-}
-
-.x-mark {
-    color: var(--danger);
-    font-weight: 700;
-    font-size: 1.1rem;
-}
-
-/* ========== VISUAL GUIDE ========== */
-.visual-steps {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-    gap: 25px;
-    margin: 30px 0;
-}
-
-.step-card {
-    background: white;
-    border: 2px solid var(--border);
-    border-radius: 15px;
-    padding: 25px;
-    text-align: center;
-    transition: all 0.3s;
-}
-
-.step-card:hover {
-    transform: translateY(-5px);
-    box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-    border-color: var(--primary);
-}
-
-.step-number {
-    width: 50px;
-    height: 50px;
-    background: linear-gradient(135deg, var(--primary), var(--primary-light));
-    color: white;
-    border-radius: 50%;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 1.5rem;
-    font-weight: 900;
-    margin: 0 auto 15px;
-}
-
-.step-card h4 {
-    font-size: 1.2rem;
-    margin-bottom: 10px;
-    color: var(--text);
-}
-
-/* ========== SIGNAL QUALITY METER ========== */
-.signal-meter {
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-    gap: 20px;
-    margin: 30px 0;
-}
-
-.meter-card {
-    background: white;
-    border: 2px solid var(--border);
-    border-radius: 15px;
-    padding: 20px;
-    text-align: center;
-}
-
-.meter-icon {
-    font-size: 2.5rem;
-    margin-bottom: 10px;
-}
-
-.meter-label {
-    font-weight: 700;
-    font-size: 1.1rem;
-    margin-bottom: 10px;
-    color: var(--text);
-}
-
-.meter-value {
-    font-size: 0.95rem;
-    color: var(--text-light);
-}
-
-.meter-excellent { border-color: var(--secondary); }
-.meter-excellent .meter-icon { color: var(--secondary); }
-
-.meter-good { border-color: var(--accent); }
-.meter-good .meter-icon { color: var(--accent); }
-
-.meter-poor { border-color: var(--danger); }
-.meter-poor .meter-icon { color: var(--danger); }
-
-/* ========== CTA SECTION ========== */
-.cta-section {
-    background: linear-gradient(135deg, var(--primary) 0%, #003db3 100%);
-    color: white;
-    padding: 60px 40px;
-    border-radius: 25px;
-    text-align: center;
-    margin: 40px 0;
-}
-
-.cta-section h2 {
-    font-size: 2rem;
-    margin-bottom: 15px;
-}
-
-.cta-section p {
-    font-size: 1.1rem;
-    opacity: 0.95;
-    margin-bottom: 30px;
-}
-
-.cta-btn {
-    background: white;
-    color: var(--primary);
-    padding: 15px 40px;
-    border-radius: 50px;
-    text-decoration: none;
-    font-weight: 700;
-    font-size: 1.1rem;
-    display: inline-block;
-    transition: all 0.3s;
-}
-
-.cta-btn:hover {
-    transform: scale(1.05);
-    box-shadow: 0 10px 30px rgba(255,255,255,0.3);
-}
-
-        .cta-btn:hover { transform: scale(1.05); }
-
-@media (max-width: 768px) {
-    .toc-grid {
-        grid-template-columns: repeat(2, 1fr); /* عمودين فقط للموبايل لمنع التداخل */
-    }
-    .guide-header h1 {
-        font-size: 1.5rem;
-    }
-}
-    </style>
-</head>
-<body>
-<script>
-    // منع الزر الأيمن للفأرة
-    document.addEventListener('contextmenu', event => event.preventDefault());
-
-    // منع اختصارات لوحة المفاتيح مثل Ctrl+U (رؤية السورس)
-    document.onkeydown = function(e) {
-        if (e.ctrlKey && (e.keyCode === 85 || e.keyCode === 83)) {
-            return false;
-        }
-    };
-</script>
-<header class="guide-header">
-    <div class="back-btn-wrapper">
-        <a href="/" class="back-btn-modern"><i class="fas fa-arrow-right"></i> العودة للرئيسية</a>
-    </div>
-    <h1> دليل استخدام ISHARATI PRO</h1>
-    <p>نظامك الذكي لتحليل وتصحيح أداء شبكات الاتصال</p>
-</header>
-<!-- Table of Contents -->
-<div class="toc-container">
-    <div class="toc-card">
-        <h2 class="toc-title">
-            <i class="fas fa-list"></i>
-            محتويات الدليل
-        </h2>
-        <div class="toc-grid">
-            <a href="#network-types" class="toc-item">
-                <div class="toc-icon"><i class="fas fa-network-wired"></i></div>
-                <span>أنواع الشبكات</span>
-            </a>
-            <a href="#signal-reading" class="toc-item">
-                <div class="toc-icon"><i class="fas fa-chart-line"></i></div>
-                <span>قراءة الإشارة</span>
-            </a>
-            <a href="#speed-test" class="toc-item">
-    <div class="toc-icon"><i class="fas fa-gauge-high"></i></div>
-    <span>اختبار السرعة</span>
-</a>
-            <a href="#data-entry" class="toc-item">
-                <div class="toc-icon"><i class="fas fa-keyboard"></i></div>
-                <span>إدخال البيانات</span>
-            </a>
-            <a href="#location" class="toc-item">
-                <div class="toc-icon"><i class="fas fa-map-marker-alt"></i></div>
-                <span>تحديد الموقع</span>
-            </a>
-            <a href="#results" class="toc-item">
-                <div class="toc-icon"><i class="fas fa-chart-bar"></i></div>
-                <span>فهم النتائج</span>
-            </a>
-            <a href="#troubleshooting" class="toc-item">
-                <div class="toc-icon"><i class="fas fa-tools"></i></div>
-                <span>حل المشاكل</span>
-            </a>
-        </div>
-    </div>
-</div>
-
-<!-- Main Content -->
-<div class="container">
-
-    <!-- Section 1: Network Types -->
-    <section id="network-types" class="section">
-        <div class="section-header">
-            <div class="section-icon">
-                <i class="fas fa-network-wired"></i>
-            </div>
-            <div>
-                <h2 class="section-title">1. تحديد نوع الشبكة</h2>
-                <p class="section-subtitle">الخطوة الأولى: معرفة نوع الاتصال الذي تريد تشخيصه</p>
-            </div>
-        </div>
-
-        <div class="visual-steps">
-            <div class="step-card">
-                <div class="step-number">1</div>
-                <h4>شبكة الهاتف المحمول</h4>
-                <p>3G / 4G / 5G من شريحة SIM</p>
-                <div class="badge">NetMonster</div>
-            </div>
-            <div class="step-card">
-                <div class="step-number">2</div>
-                <h4>شبكة الواي فاي</h4>
-                <p>من الراوتر المنزلي أو العام</p>
-                <div class="badge">WiFi Analyzer</div>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-mobile-alt"></i>
-                لشبكة الهاتف المحمول (Mobile Data)
-            </h3>
-            <div class="method-card">
-                <h4><i class="fas fa-download"></i> التطبيق المطلوب: NetMonster</h4>
-                <ul>
-                    <li><strong>لماذا NetMonster؟</strong> يعطيك قيم دقيقة عن قوة الإشارة والجودة</li>
-                    <li><strong>البيانات المتاحة:</strong> RSRP, SINR, RSRQ, نوع الشبكة، موقع البرج</li>
-                    <li><strong>الاستخدام:</strong> مناسب لتشخيص مشاكل 3G, 4G, 5G</li>
-                </ul>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-wifi"></i>
-                لشبكة الواي فاي (WiFi)
-            </h3>
-            <div class="method-card">
-                <h4><i class="fas fa-download"></i> التطبيق المطلوب: WiFi Analyzer</h4>
-                <ul>
-                    <li><strong>لماذا WiFi Analyzer؟</strong> يحلل جودة اتصال الواي فاي والتداخلات</li>
-                    <li><strong>البيانات المتاحة:</strong> قوة الإشارة (dBm)، القنوات المستخدمة، التداخلات</li>
-                    <li><strong>الاستخدام:</strong> لتحديد أفضل موقع للراوتر أو حل مشاكل البطء</li>
-                </ul>
-            </div>
-        </div>
-
-        <div class="warning-box info-box">
-            <div class="info-box-icon"><i class="fas fa-exclamation-triangle"></i></div>
-            <div>
-                <strong>تحذير مهم:</strong>
-                <p>لا يمكنك استخدام NetMonster لقياس الواي فاي، ولا WiFi Analyzer لقياس شبكة الموبايل. كل تطبيق مخصص لنوع شبكة محدد.</p>
-            </div>
-        </div>
-    </section>
-
-    <!-- Section 2: Signal Reading -->
-    <section id="signal-reading" class="section" style="border-right-color: var(--secondary);">
-        <div class="section-header">
-            <div class="section-icon" style="background: linear-gradient(135deg, var(--secondary), #059669);">
-                <i class="fas fa-signal"></i>
-            </div>
-            <div>
-                <h2 class="section-title">2. قراءة معلومات الإشارة</h2>
-                <p class="section-subtitle">كيفية الحصول على القيم الدقيقة من التطبيقات</p>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-mobile-alt"></i>
-                استخدام NetMonster (للشبكة الخلوية)
-            </h3>
-            
-            <div class="visual-steps">
-                <div class="step-card">
-                    <div class="step-number">1</div>
-                    <h4>افتح NetMonster</h4>
-                    <p>انقر على أيقونة التطبيق</p>
-                </div>
-                <div class="step-card">
-                    <div class="step-number">2</div>
-                    <h4>تبويب Graphs</h4>
-                    <p>اذهب إلى قسم الرسوم البيانية</p>
-                </div>
-                <div class="step-card">
-                    <div class="step-number">3</div>
-                    <h4>انتظر 20-30 ثانية</h4>
-                    <p>دع التطبيق يستقر في مكانك</p>
-                </div>
-                <div class="step-card">
-                    <div class="step-number">4</div>
-                    <h4>انسخ القيم</h4>
-                    <p>RSRP, SINR, Type, Location</p>
-                </div>
-            </div>
-
-            <div class="info-box success-box">
-                <div class="info-box-icon"><i class="fas fa-lightbulb"></i></div>
-                <div>
-                    <strong>نصيحة احترافية:</strong>
-                    <p>قف ثابتاً لمدة 20-30 ثانية قبل نسخ القيم. الحركة المستمرة تعطي قراءات غير دقيقة.</p>
-                </div>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-wifi"></i>
-                استخدام WiFi Analyzer (للواي فاي)
-            </h3>
-            
-            <ol style="padding-right: 20px; line-height: 2;">
-                <li>افتح تطبيق WiFi Analyzer على هاتفك</li>
-                <li>اختر شبكتك من قائمة الشبكات المتاحة</li>
-                <li>انظر إلى قوة الإشارة (Signal Strength) بوحدة dBm</li>
-                <li>راقب مستوى التداخل من الشبكات الأخرى</li>
-                <li>انسخ القيم لاستخدامها في التحليل</li>
-            </ol>
-        </div>
-    </section>
-<section id="speed-test" class="section" style="border-right-color: #10b981;">
-    <div class="section-header">
-        <div class="section-icon" style="background: linear-gradient(135deg, #10b981, #059669);">
-            <i class="fas fa-gauge-high"></i>
-        </div>
-        <div>
-            <h2 class="section-title">3. اختبار سرعة الإنترنت</h2>
-            <p class="section-subtitle">قياس أداء التحميل والرفع واستقرار الاتصال</p>
-        </div>
-    </div>
-
-    <div class="content-block">
-        <h3 class="block-title">
-            <i class="fas fa-rocket"></i>
-            كيفية إجراء اختبار صحيح
-        </h3>
-        <p>للحصول على نتائج تعكس واقع الشبكة فعلياً، يفضل اتباع الخطوات التالية قبل إدخال البيانات:</p>
-        
-        <div class="visual-steps">
-            <div class="step-card">
-                <div class="step-number">1</div>
-                <h4>أغلق التحديثات</h4>
-                <p>تأكد من عدم وجود تحميلات في الخلفية</p>
-            </div>
-            <div class="step-card">
-                <div class="step-number">2</div>
-                <h4>استخدم سيرفر محلي</h4>
-                <p>اختر أقرب سيرفر (Ooredoo, Mobilis, Djaweb)</p>
-            </div>
-            <div class="step-card">
-                <div class="step-number">3</div>
-                <h4>كرر الاختبار</h4>
-                <p>قم بإجراء الفحص مرتين للتأكد من الثبات</p>
-            </div>
-        </div>
-    </div>
-
-    <div class="content-block">
-        <h3 class="block-title">
-            <i class="fas fa-microchip"></i>
-            المصطلحات الأساسية
-        </h3>
-        <div class="method-card">
-            <ul>
-                <li><strong>Download (التحميل):</strong> سرعة استقبال البيانات (مشاهدة الفيديو، تصفح).</li>
-                <li><strong>Upload (الرفع):</strong> سرعة إرسال البيانات (رفع الصور، مكالمات الفيديو).</li>
-                <li><strong>Ping / Latency:</strong> زمن الاستجابة بالملي ثانية. كلما قل، كان أفضل للألعاب والمكالمات.</li>
-            </ul>
-        </div>
-    </div>
-
-    <div class="success-box info-box">
-        <div class="info-box-icon"><i class="fas fa-check-double"></i></div>
-        <div>
-            <strong>رابط الفحص:</strong>
-            <p>نوصي باستخدام موقع <a href="https://www.speedtest.net" target="_blank" style="color: var(--primary); font-weight: bold;">Speedtest.net</a> أو تطبيقهم الرسمي للحصول على أدق النتائج في الجزائر.</p>
-        </div>
-    </div>
-</section>
-    <!-- Section 3: Data Entry -->
-    <section id="data-entry" class="section" style="border-right-color: var(--accent);">
-        <div class="section-header">
-            <div class="section-icon" style="background: linear-gradient(135deg, var(--accent), #d97706);">
-                <i class="fas fa-keyboard"></i>
-            </div>
-            <div>
-                <h2 class="section-title">4. إدخال البيانات في الموقع</h2>
-                <p class="section-subtitle">نقل القيم من التطبيق إلى نموذج التحليل</p>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-table"></i>
-                جدول مطابقة الحقول
-            </h3>
-            
-            <table class="data-table">
-                <thead>
-                    <tr>
-                        <th>الحقل في الموقع</th>
-                        <th>من أين تأخذه</th>
-                        <th>مثال</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    <tr>
-                        <td><strong>Latitude (خط العرض)</strong></td>
-                        <td>NetMonster → MAP أو Google Maps</td>
-                        <td><span class="badge">36.75</span></td>
-                    </tr>
-                    <tr>
-                        <td><strong>Longitude (خط الطول)</strong></td>
-                        <td>NetMonster → MAP أو Google Maps</td>
-                        <td><span class="badge">3.05</span></td>
-                    </tr>
-                    <tr>
-                        <td><strong>RSRP (قوة الإشارة)</strong></td>
-                        <td>NetMonster → Graphs → RSRP</td>
-                        <td><span class="badge">-85</span></td>
-                    </tr>
-                    <tr>
-                        <td><strong>SINR (جودة الإشارة)</strong></td>
-                        <td>NetMonster → Graphs → SINR</td>
-                        <td><span class="badge">15</span></td>
-                    </tr>
-                    <tr>
-                        <td><strong>Network Type</strong></td>
-                        <td>NetMonster → شاشة رئيسية (LTE/NR)</td>
-                        <td><span class="badge">4G</span></td>
-                    </tr>
-                    <tr>
-                        <td><strong>المكان</strong></td>
-                        <td>اختيارك (داخل/خارج المبنى)</td>
-                        <td><span class="badge">Indoor</span></td>
-                    </tr>
-                </tbody>
-            </table>
-        </div>
-
-        <div class="warning-box info-box">
-            <div class="info-box-icon"><i class="fas fa-exclamation-circle"></i></div>
-            <div>
-                <strong>تنبيه حرج:</strong>
-                <p>انسخ القيم <span class="highlight">كما هي تماماً</span>، خاصة الإشارة السالبة (-):</p>
-                <p style="margin-top: 10px;">
-                    <span class="check-mark">✓ صحيح:</span> <span class="badge">-85</span>
-                    &nbsp;&nbsp;|&nbsp;&nbsp;
-                    <span class="x-mark">✗ خاطئ:</span> <span class="badge">85</span>
-                </p>
-            </div>
-        </div>
-
-        <div class="info-box">
-            <div class="info-box-icon"><i class="fas fa-info-circle"></i></div>
-            <div>
-                <strong>معلومة:</strong>
-                <p>قيم RSRP دائماً سالبة. كلما اقتربت من 0، كانت الإشارة أقوى. مثلاً: -70 أفضل من -100.</p>
-            </div>
-        </div>
-    </section>
-
-    <!-- Section 4: Location -->
-    <section id="location" class="section" style="border-right-color: #8b5cf6;">
-        <div class="section-header">
-            <div class="section-icon" style="background: linear-gradient(135deg, #8b5cf6, #6d28d9);">
-                <i class="fas fa-map-marker-alt"></i>
-            </div>
-            <div>
-                <h2 class="section-title">5. كيفية الحصول على Latitude و Longitude</h2>
-                <p class="section-subtitle">طرق سهلة لمعرفة إحداثياتك بدقة</p>
-            </div>
-        </div>
-
-        <div class="visual-steps">
-            <div class="step-card">
-                <div class="step-number"><i class="fas fa-map"></i></div>
-                <h4>Google Maps</h4>
-                <p>الطريقة الأسهل والأكثر دقة</p>
-            </div>
-            <div class="step-card">
-                <div class="step-number"><i class="fas fa-mobile"></i></div>
-                <h4>NetMonster</h4>
-                <p>مباشرة من تبويب MAP</p>
-            </div>
-            <div class="step-card">
-                <div class="step-number"><i class="fas fa-compass"></i></div>
-                <h4>GPS Status</h4>
-                <p>تطبيق متخصص في GPS</p>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-map"></i>
-                الطريقة الأولى: Google Maps (الأسهل)
-            </h3>
-            <div class="method-card">
-                <ol style="padding-right: 20px; line-height: 2;">
-                    <li>افتح تطبيق Google Maps على هاتفك</li>
-                    <li>اضغط ضغطة مطولة (Long Press) على موقعك الحالي في الخريطة</li>
-                    <li>سيظهر دبوس أحمر مع الإحداثيات في الأسفل</li>
-                    <li>انقر على الإحداثيات لنسخها</li>
-                    <li>ستظهر بالشكل: <span class="badge">36.7538, 3.0588</span></li>
-                    <li>الرقم الأول هو Latitude والثاني Longitude</li>
-                </ol>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-mobile-alt"></i>
-                الطريقة الثانية: NetMonster MAP
-            </h3>
-            <div class="method-card">
-                <ol style="padding-right: 20px; line-height: 2;">
-                    <li>افتح تطبيق NetMonster</li>
-                    <li>انتقل إلى تبويب <span class="badge">MAP</span></li>
-                    <li>ستجد الإحداثيات مكتوبة مباشرة:</li>
-                    <ul style="margin-top: 10px;">
-                        <li><strong>Lat:</strong> خط العرض</li>
-                        <li><strong>Lon:</strong> خط الطول</li>
-                    </ul>
-                    <li>انسخ القيم مباشرة إلى الموقع</li>
-                </ol>
-            </div>
-        </div>
-
-        <div class="warning-box info-box">
-            <div class="info-box-icon"><i class="fas fa-globe"></i></div>
-            <div>
-                <strong>نطاق إحداثيات الجزائر:</strong>
-                <ul style="margin-top: 10px; padding-right: 20px;">
-                    <li><strong>Latitude:</strong> من <span class="badge">18</span> إلى <span class="badge">37</span></li>
-                    <li><strong>Longitude:</strong> من <span class="badge">-9</span> إلى <span class="badge">12</span></li>
-                </ul>
-                <p style="margin-top: 10px;">إذا كانت قيمك خارج هذا النطاق، فهناك خطأ في القراءة.</p>
-            </div>
-        </div>
-    </section>
-
-    <!-- Section 5: Understanding Results -->
-    <section id="results" class="section" style="border-right-color: var(--secondary);">
-        <div class="section-header">
-            <div class="section-icon" style="background: linear-gradient(135deg, var(--secondary), #059669);">
-                <i class="fas fa-chart-bar"></i>
-            </div>
-            <div>
-                <h2 class="section-title">6. فهم نتائج التحليل</h2>
-                <p class="section-subtitle">كيف تقرأ وتفهم التشخيص الذي يقدمه الموقع</p>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-signal"></i>
-                مؤشر RSRP (قوة الإشارة)
-            </h3>
-            
-            <div class="signal-meter">
-                <div class="meter-card meter-excellent">
-                    <div class="meter-icon">🟢</div>
-                    <div class="meter-label">ممتاز</div>
-                    <div class="meter-value">-70 إلى -85 dBm</div>
-                </div>
-                <div class="meter-card meter-good">
-                    <div class="meter-icon">🟡</div>
-                    <div class="meter-label">جيد</div>
-                    <div class="meter-value">-86 إلى -100 dBm</div>
-                </div>
-                <div class="meter-card meter-good">
-                    <div class="meter-icon">🟠</div>
-                    <div class="meter-label">متوسط</div>
-                    <div class="meter-value">-101 إلى -110 dBm</div>
-                </div>
-                <div class="meter-card meter-poor">
-                    <div class="meter-icon">🔴</div>
-                    <div class="meter-label">ضعيف</div>
-                    <div class="meter-value">أقل من -110 dBm</div>
-                </div>
-            </div>
-
-            <div class="info-box">
-                <div class="info-box-icon"><i class="fas fa-info-circle"></i></div>
-                <div>
-                    <strong>ملاحظة هامة:</strong>
-                    <p>RSRP يقيس <span class="highlight">قوة الإشارة</span> من البرج. كلما كانت القيمة أقرب إلى 0 (أي -70 أفضل من -110)، كانت الإشارة أقوى.</p>
-                </div>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-chart-line"></i>
-                مؤشر SINR (جودة الإشارة)
-            </h3>
-            
-            <div class="signal-meter">
-                <div class="meter-card meter-excellent">
-                    <div class="meter-icon">⭐⭐⭐</div>
-                    <div class="meter-label">ممتاز جداً</div>
-                    <div class="meter-value">أكثر من 20 dB</div>
-                </div>
-                <div class="meter-card meter-excellent">
-                    <div class="meter-icon">⭐⭐</div>
-                    <div class="meter-label">جيد جداً</div>
-                    <div class="meter-value">13 - 20 dB</div>
-                </div>
-                <div class="meter-card meter-good">
-                    <div class="meter-icon">⭐</div>
-                    <div class="meter-label">مقبول</div>
-                    <div class="meter-value">0 - 13 dB</div>
-                </div>
-                <div class="meter-card meter-poor">
-                    <div class="meter-icon">❌</div>
-                    <div class="meter-label">سيئ</div>
-                    <div class="meter-value">أقل من 0 dB</div>
-                </div>
-            </div>
-
-            <div class="info-box">
-                <div class="info-box-icon"><i class="fas fa-info-circle"></i></div>
-                <div>
-                    <strong>ما هو SINR؟</strong>
-                    <p>SINR يقيس <span class="highlight">نقاء الإشارة</span> (Signal to Interference + Noise Ratio). كلما كان أعلى، كانت جودة الاتصال أفضل وأسرع.</p>
-                </div>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-lightbulb"></i>
-                أمثلة على حالات شائعة
-            </h3>
-            
-            <div class="method-card" style="border-right-color: var(--secondary);">
-                <h4><i class="fas fa-check-circle" style="color: var(--secondary);"></i> الحالة 1: إشارة ممتازة وسريعة</h4>
-                <p><strong>RSRP:</strong> -75 dBm | <strong>SINR:</strong> 22 dB</p>
-                <p><strong>التفسير:</strong> أنت قريب من البرج والإشارة نقية. السرعة ممتازة. استمتع! 🎉</p>
-            </div>
-
-            <div class="method-card" style="border-right-color: var(--accent);">
-                <h4><i class="fas fa-exclamation-triangle" style="color: var(--accent);"></i> الحالة 2: إشارة قوية لكن بطيئة</h4>
-                <p><strong>RSRP:</strong> -80 dBm | <strong>SINR:</strong> 3 dB</p>
-                <p><strong>التفسير:</strong> الإشارة قوية، لكن هناك تداخل أو ازدحام. جرّب تغيير موقعك أو الوقت.</p>
-            </div>
-
-            <div class="method-card" style="border-right-color: var(--danger);">
-                <h4><i class="fas fa-times-circle" style="color: var(--danger);"></i> الحالة 3: إشارة ضعيفة</h4>
-                <p><strong>RSRP:</strong> -115 dBm | <strong>SINR:</strong> -2 dB</p>
-                <p><strong>التفسير:</strong> أنت بعيد عن البرج أو في منطقة تغطية ضعيفة. الحل: مقوي إشارة أو واي فاي.</p>
-            </div>
-        </div>
-    </section>
-
-    <!-- Section 6: Troubleshooting -->
-    <section id="troubleshooting" class="section" style="border-right-color: var(--danger);">
-        <div class="section-header">
-            <div class="section-icon" style="background: linear-gradient(135deg, var(--danger), #dc2626);">
-                <i class="fas fa-tools"></i>
-            </div>
-            <div>
-                <h2 class="section-title">7. حل المشاكل الشائعة</h2>
-                <p class="section-subtitle">أسئلة متكررة ونصائح عملية</p>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-question-circle"></i>
-                المشاكل الشائعة وحلولها
-            </h3>
-            
-            <div class="method-card">
-                <h4><i class="fas fa-wifi"></i> المشكلة: النت بطيء رغم إشارة قوية</h4>
-                <p><strong>السبب المحتمل:</strong> SINR منخفض (ازدحام أو تداخل)</p>
-                <p><strong>الحل:</strong></p>
-                <ul>
-                    <li>جرّب في وقت مختلف (تجنب أوقات الذروة 6م - 11م)</li>
-                    <li>غيّر موقعك داخل الغرفة</li>
-                    <li>أعد تشغيل الهاتف</li>
-                    <li>جرّب وضع الطيران لمدة 10 ثواني ثم أعد التشغيل</li>
-                </ul>
-            </div>
-
-            <div class="method-card">
-                <h4><i class="fas fa-signal"></i> المشكلة: الإشارة ضعيفة داخل المنزل فقط</h4>
-                <p><strong>السبب المحتمل:</strong> جدران سميكة أو مواد عازلة</p>
-                <p><strong>الحل:</strong></p>
-                <ul>
-                    <li>اقترب من النافذة</li>
-                    <li>استخدم WiFi Calling إن كان متاحاً</li>
-                    <li>فكّر في شراء مقوي إشارة (Repeater)</li>
-                    <li>استخدم الواي فاي بدلاً من بيانات الموبايل</li>
-                </ul>
-            </div>
-
-            <div class="method-card">
-                <h4><i class="fas fa-map-marker-alt"></i> المشكلة: الإحداثيات خاطئة أو لا تعمل</h4>
-                <p><strong>الحل:</strong></p>
-                <ul>
-                    <li>تأكد من تشغيل GPS في هاتفك</li>
-                    <li>اسمح لـ Google Maps بالوصول للموقع</li>
-                    <li>انتظر 30 ثانية حتى يستقر GPS</li>
-                    <li>تحقق من أن الأرقام في نطاق الجزائر المذكور أعلاه</li>
-                </ul>
-            </div>
-        </div>
-
-        <div class="content-block">
-            <h3 class="block-title">
-                <i class="fas fa-star"></i>
-                نصائح ذهبية لأفضل تشخيص
-            </h3>
-            
-            <div class="visual-steps">
-                <div class="step-card">
-                    <div class="step-number"><i class="fas fa-clock"></i></div>
-                    <h4>التوقيت</h4>
-                    <p>قس في أوقات مختلفة لفهم أوقات الذروة</p>
-                </div>
-                <div class="step-card">
-                    <div class="step-number"><i class="fas fa-compass"></i></div>
-                    <h4>الاتجاه</h4>
-                    <p>جرّب الوقوف في اتجاهات مختلفة</p>
-                </div>
-                <div class="step-card">
-                    <div class="step-number"><i class="fas fa-home"></i></div>
-                    <h4>الموقع</h4>
-                    <p>قارن بين Indoor و Outdoor</p>
-                </div>
-                <div class="step-card">
-                    <div class="step-number"><i class="fas fa-redo"></i></div>
-                    <h4>التكرار</h4>
-                    <p>كرر القياس عدة مرات للتأكد</p>
-                </div>
-            </div>
-        </div>
-    </section>
-
-    <!-- CTA Section -->
-    <div class="cta-section">
-        <h2><i class="fas fa-rocket"></i> جاهز لتشخيص شبكتك؟</h2>
-        <p>الآن بعد أن فهمت كل شيء، حان وقت التحليل الفعلي!</p>
-        <a href="/" class="cta-btn">
-            <i class="fas fa-play-circle"></i> ابدأ التحليل الآن
-        </a>
-    </div>
-
-</div>
-
-<script>
-// Smooth scroll for anchor links
-document.querySelectorAll('a[href^="#"]').forEach(anchor => {
-    anchor.addEventListener('click', function (e) {
-        e.preventDefault();
-        const target = document.querySelector(this.getAttribute('href'));
-        if (target) {
-            target.scrollIntoView({
-                behavior: 'smooth',
-                block: 'start'
-            });
-        }
-    });
-});
-</script>
-
-</body>
-</html>
-"""
-
-
-
-
-KNOWLEDGE_PAGE = """
-<!DOCTYPE html>
-<html lang="ar" dir="rtl">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="icon" type="image/png" href="{{ url_for('static', filename='logo2.png') }}">
-    <title>المعرفة التقنية - ISHARATI PRO</title>
-    
-    <link href="https://fonts.googleapis.com/css2?family=Tajawal:wght@400;500;700;900&family=IBM+Plex+Sans+Arabic:wght@400;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    
-    <style>
-    :root {
-        --primary: #0052FF;
-        --primary-dark: #003db3;
-        --secondary: #10b981;
-        --accent: #f59e0b;
-        --bg: #f8fafc;
-        --card-bg: white;
-        --text: #1e293b;
-        --border: #e2e8f0;
-    }
-    body { 
-        font-family: 'IBM Plex Sans Arabic', 'Tajawal', sans-serif; 
-        background: var(--bg); 
-        color: var(--text);
-        margin: 0; padding: 0;
-        line-height: 1.8;
-    }
-    .header {
-        background: linear-gradient(135deg, var(--primary), var(--primary-dark));
-        color: white;
-        padding: 60px 20px;
-        text-align: center;
-        border-bottom-left-radius: 40px;
-        border-bottom-right-radius: 40px;
-        box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-    }
-    .container { max-width: 1100px; margin: -40px auto 60px; padding: 0 20px; }
-    
-    .card {
-        background: var(--card-bg);
-        border-radius: 24px;
-        padding: 35px;
-        margin-bottom: 30px;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.05);
-        border: 1px solid var(--border);
-    }
-    .card h2 { 
-        color: var(--primary); 
-        font-size: 1.6rem;
-        margin-top: 0; 
-        border-bottom: 2px solid var(--bg);
-        padding-bottom: 15px;
-        margin-bottom: 20px;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-    }
-    
-    .step-list { list-style: none; padding: 0; }
-    .step-item { 
-        display: flex; 
-        gap: 15px; 
-        margin-bottom: 15px; 
-        background: var(--bg);
-        padding: 15px;
-        border-radius: 12px;
-    }
-    .step-number {
-        background: var(--primary);
-        color: white;
-        width: 28px; height: 28px;
-        border-radius: 50%;
-        display: flex; align-items: center; justify-content: center;
-        flex-shrink: 0; font-weight: bold;
-    }
-
-    .grid-container {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-        gap: 15px;
-        max-width: 1200px;
-        margin: 30px auto;
-    }
-
-    .info-box {
-        background: var(--card-bg);
-        padding: 30px 20px;
-        border: 1px solid #eee;
-        transition: all 0.3s ease-in-out;
-        display: flex;
-        flex-direction: column;
-        justify-content: space-between;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-        border-radius: 12px;
-    }
-
-    .info-box:hover {
-        background: var(--primary);
-        transform: translateY(-8px);
-        border-color: var(--primary);
-        box-shadow: 0 12px 20px rgba(0, 168, 255, 0.2);
-    }
-
-    .icon-wrapper {
-        font-size: 35px;
-        color: var(--primary);
-        margin-bottom: 15px;
-    }
-
-    .info-box h3 {
-        margin-bottom: 15px;
-        font-size: 1.1rem;
-        color: #333;
-    }
-
-    .info-box p {
-        font-size: 0.9rem;
-        line-height: 1.6;
-        color: #555;
-        margin-bottom: 8px;
-    }
-
-    .info-box:hover h3, 
-    .info-box:hover p, 
-    .info-box:hover .icon-wrapper {
-        color: #fff;
-    }
-
-    .read-more {
-        margin-top: 20px;
-        padding: 8px;
-        background: #f0f9ff;
-        color: var(--primary);
-        font-size: 0.8rem;
-        font-weight: bold;
-        text-transform: uppercase;
-    }
-
-    .info-box:hover .read-more {
-        background: rgba(255, 255, 255, 0.2);
-        color: #fff;
-    }
-    
-    .comparison-table { width: 100%; border-collapse: collapse; margin-top: 20px; border-radius: 15px; overflow: hidden; box-shadow: 0 4px 10px rgba(0,0,0,0.05); }
-    .comparison-table th { background: var(--primary); color: white; padding: 15px; }
-    .comparison-table td { padding: 15px; border: 1px solid var(--border); text-align: center; background: white; }
-    
-    .problem-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; }
-    .problem-card { border-right: 4px solid var(--primary); background: #f1f5f9; padding: 20px; border-radius: 12px; }
-    .problem-card h4 { margin-top: 0; color: var(--text); display: flex; align-items: center; gap: 8px; }
-    
-    .tip-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; }
-    .tip-item { background: #fffbeb; border: 1px solid #fef3c7; padding: 15px; border-radius: 12px; font-size: 0.95rem; }
-
-    .app-badge { background: #e0e7ff; color: var(--primary); padding: 5px 12px; border-radius: 20px; font-weight: bold; }
-    .summary-box { background: linear-gradient(135deg, #003db3); color: white; padding: 30px; border-radius: 24px; text-align: center; }
-
-    .back-btn {
-        display: inline-flex; align-items: center; gap: 8px;
-        color: white; text-decoration: none; font-weight: bold;
-        margin-bottom: 25px; background: rgba(255,255,255,0.15);
-        padding: 10px 20px; border-radius: 50px; transition: 0.3s;
-        backdrop-filter: blur(5px);
-    }
-    .back-btn:hover { background: white; color: var(--primary); transform: translateX(-5px); }
-</style>
-</head>
-<body>
-
-<div class="header">
-    <div style="max-width: 1100px; margin: 0 auto; text-align: right;">
-        <a href="/" class="back-btn"><i class="fas fa-arrow-right"></i> العودة للرئيسية</a>
-    </div>
-    <h1> دليل المعرفة التقنية</h1>
-    <p>افهم كيف يعمل اتصالك وكيف ترفع كفاءته</p>
-</div>
-
-<div class="container">
-    
-    <div class="card">
-        <h2><i class="fas fa-info-circle"></i> 1. مقدمة عن الإنترنت</h2>
-        <p><strong>الإنترنت بشكل مبسط:</strong> هو شبكة عالمية تسمح لأجهزة الكمبيوتر والهواتف بالاتصال ببعضها لنقل البيانات، مثل تصفح المواقع، مشاهدة الفيديو، والتواصل.</p>
-        
-        <p>يصل الإنترنت لجهازك عبر رحلة تقنية معقدة، تبدأ من الألياف البصرية تحت المحيطات وصولاً إلى هاتفك.</p>
-        
-        <h4 style="margin-bottom: 10px;">🔍 كيف يصل الإنترنت لجهازك؟</h4>
-        <div class="step-list">
-            <div class="step-item">
-                <div class="step-number">1</div>
-                <div><strong>المصدر:</strong> يبدأ من الكابلات البحرية العالمية (Undersea Cables).</div>
-            </div>
-            <div class="step-item">
-                <div class="step-number">2</div>
-                <div><strong>التوزيع:</strong> يمر عبر مزود الخدمة المحلي (ISP) مثل اتصالات الجزائر أو متعاملي الهاتف.</div>
-            </div>
-            <div class="step-item">
-                <div class="step-number">3</div>
-                <div><strong>الوصول:</strong> يصل إليك إما عبر WiFi المنزلية أو بيانات المحمول (3G/4G/5G).</div>
-            </div>
-        </div>
-        <p style="font-size: 0.9rem; color: var(--accent); font-weight: bold;">💡 فهم هذه الرحلة يساعدك على معرفة سبب أي بطء أو ضعف في الإشارة.</p>
-    </div>
-
-    <div class="card">
-        <h2><i class="fas fa-wifi"></i> 2. أنواع الإنترنت في المنزل والهاتف</h2>
-        <div class="problem-grid">
-            <div class="problem-card" style="border-color: var(--secondary);">
-                <h4>🏠 الإنترنت المنزلي (WiFi)</h4>
-                <p>يوصلك عبر كابل أو الألياف الضوئية (Fiber). يتميز بسرعات مستقرة وعالية، لكنه يتأثر بعدد الأشخاص المتصلين في نفس اللحظة.</p>
-                <small>مثال: <strong>Idoom (اتصالات الجزائر)</strong></small>
-            </div>
-            <div class="problem-card" style="border-color: var(--accent);">
-                <h4>📱 بيانات الهاتف (3G/4G/5G)</h4>
-                <p>يعتمد على الأبراج (BTS) القريبة منك. سرعته متغيرة جداً وتتأثر بموقعك الجغرافي والتشويش المحيط.</p>
-                <small>مثال: <strong>Mobilis, Djezzy, Ooredoo</strong></small>
-            </div>
-        </div>
-        
-        <h3 style="margin-top: 30px;"><i class="fas fa-columns"></i> مقارنة: المنزلي vs المحمول</h3>
-        <div style="overflow-x: auto;">
-            <table class="comparison-table">
-                <thead>
-                    <tr>
-                        <th>النوع</th>
-                        <th>مصدر الإشارة</th>
-                        <th>السرعة</th>
-                        <th>الاستقرار</th>
-                        <th>أفضل استخدام</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    <tr>
-                        <td><strong>WiFi / Fiber</strong></td>
-                        <td>الراوتر / الكابل</td>
-                        <td>عالية جداً</td>
-                        <td>مستقرة</td>
-                        <td>المنزل، العمل من المكتب</td>
-                    </tr>
-                    <tr>
-                        <td><strong>Mobile Data</strong></td>
-                        <td>أبراج الهاتف</td>
-                        <td>متغيرة</td>
-                        <td>تعتمد على الموقع</td>
-                        <td>أثناء التنقل، خارج المنزل</td>
-                    </tr>
-                </tbody>
-            </table>
-        </div>
-    </div>
-    
-    <div class="card">
-        <h2><i class="fas fa-tools"></i> 3. مشاكل الإنترنت الشائعة والتعامل معها</h2>
-        <p style="margin-bottom: 20px; color: var(--text-light);">مرر الفأرة فوق المشكلة لمعرفة السبب والحل:</p>
-
-        <div class="grid-container">
-            <div class="info-box">
-                <div class="icon-wrapper"><i class="fas fa-signal"></i></div>
-                <h3>ضعف الإشارة</h3>
-                <p><strong>السبب:</strong> البعد عن البرج أو وجود جدران سميكة تعيق وصول الموجات.</p>
-                <p><strong>الحل:</strong> حاول الاقتراب من النافذة أو استخدم جهاز مقوي إشارة.</p>
-                <div class="read-more">التفاصيل</div>
-            </div>
-
-            <div class="info-box">
-                <div class="icon-wrapper"><i class="fas fa-broadcast-tower"></i></div>
-                <h3>تشويش الإشارة</h3>
-                <p><strong>السبب:</strong> أجهزة كهربائية قريبة أو تداخل من قنوات WiFi الجيران.</p>
-                <p><strong>الحل:</strong> ضع الراوتر في مكان مرتفع وقم بتغيير قناة الـ WiFi.</p>
-                <div class="read-more">التفاصيل</div>
-            </div>
-
-            <div class="info-box">
-                <div class="icon-wrapper"><i class="fas fa-tachometer-alt"></i></div>
-                <h3>بطء وقت الذروة</h3>
-                <p><strong>السبب:</strong> ضغط كبير على البرج نتيجة كثرة المشتركين (18:00 – 23:00).</p>
-                <p><strong>الحل:</strong> تجنب تحميل الملفات الضخمة في هذا الوقت واستخدمها لاحقاً.</p>
-                <div class="read-more">التفاصيل</div>
-            </div>
-
-            <div class="info-box">
-                <div class="icon-wrapper"><i class="fas fa-server"></i></div>
-                <h3>مشاكل المزود</h3>
-                <p><strong>السبب:</strong> بنية تحتية قديمة أو أعطال فنية في الكابلات الرئيسية للمزود.</p>
-                <p><strong>الحل:</strong> تواصل مع مصلحة الزبائن أو فكر في تجربة مزود آخر.</p>
-                <div class="read-more">التفاصيل</div>
-            </div>
-        </div>
-    </div>
-
-    <div class="card">
-        <h2><i class="fas fa-lightbulb"></i> 4. نصائح عملية لتحسين الإنترنت</h2>
-        
-        <div class="tip-grid">
-            <div class="tip-item"><i class="fas fa-arrow-up"></i> ضع الراوتر في مكان مرتفع ومفتوح بعيداً عن العوائق.</div>
-            <div class="tip-item"><i class="fas fa-battery-half"></i> استخدم الـ WiFi داخل المنزل لتوفير بطارية هاتفك.</div>
-            <div class="tip-item"><i class="fas fa-power-off"></i> أعد تشغيل (Restart) الهاتف أو المودم عند ملاحظة بطء مفاجئ.</div>
-            <div class="tip-item"><i class="fas fa-expand-arrows-alt"></i> استخدم مقوي إشارة (Repeater) في الغرف البعيدة.</div>
-            <div class="tip-item"><i class="fas fa-mobile-alt"></i> افحص جودة الشبكة بانتظام لفهم مستوى التغطية في منزلك.</div>
-        </div>
-    </div>
-
-    <div class="card" style="border-right: 5px solid var(--primary);">
-        <h2><i class="fas fa-satellite-dish"></i> 5. كيف تعرف قوة التغطية في منطقتك</h2>
-        <p>يمكنك استخدام أدوات احترافية لفحص الشبكة مثل المهندسين:</p>
-        <ul style="line-height: 2.5;">
-            <li><span class="app-badge">NetMonster</span> لمعرفة قوة إشارة شبكة الهاتف (RSRP / SINR).</li>
-            <li><span class="app-badge">WiFi Analyzer</span> لمعرفة تداخل الموجات في شبكتك المنزلية.</li>
-        </ul>
-        <p><strong>القاعدة الذهبية:</strong> كلما عرفت موقع الأبراج القريبة منك، كلما استطعت توجيه جهازك بشكل صحيح لتحسين السرعة.</p>
-    </div>
-
-    <div class="summary-box">
-        <h3><i class="fas fa-check-circle"></i> ملخص لك أيها المستخدم</h3>
-        <p>تذكر دائماً: حدد نوع اتصالك، راقب جودة الإشارة (ليس فقط عدد الأبراج)، وطبق النصائح البسيطة لتحصل على أفضل تجربة إنترنت ممكنة في الجزائر.</p>
-    </div>
-
-</div>
-<script>
-// 1. Define the keys we want to save
-const formFields = ['lat', 'lon', 'rsrp', 'sinr', 'network', 'operator', 'place', 'wilaya', 'city'];
-
-// 2. Function to Save Data
-function saveToLocal() {
-    const formData = {};
-    formFields.forEach(field => {
-        const element = document.querySelector(`[name="${field}"]`);
-        if (element) {
-            formData[field] = element.value;
-        }
-    });
-    localStorage.setItem('isharati_pro_data', JSON.stringify(formData));
-}
-
-// 3. Function to Load Data
-function loadFromLocal() {
-    const savedData = localStorage.getItem('isharati_pro_data');
-    if (savedData) {
-        const data = JSON.parse(savedData);
-        formFields.forEach(field => {
-            const element = document.querySelector(`[name="${field}"]`);
-            if (element && data[field]) {
-                element.value = data[field];
-            }
-        });
-        console.log("Data restored from local storage.");
-    }
-}
-
-// 4. Initialize Event Listeners
-document.addEventListener('DOMContentLoaded', () => {
-    // Load existing data
-    loadFromLocal();
-
-    // Listen for changes on all inputs in the form
-    const form = document.getElementById('analysisForm');
-    if (form) {
-        form.querySelectorAll('input, select').forEach(input => {
-            input.addEventListener('input', saveToLocal);
-        });
-    }
-});
-
-// 5. Optional: Clear data on form reset
-function clearStorage() {
-    localStorage.removeItem('isharati_pro_data');
-}
-</script>
-<script>
-        function clearForm() {
-            if (confirm("هل تريد مسح جميع البيانات المدخلة؟")) {
-                localStorage.removeItem('isharati_pro_data');
-                const form = document.getElementById('analysisForm');
-                if (form) {
-                    form.reset();
-                }
-            }
-        }
-    </script>
-<script>
-    // منع الزر الأيمن للفأرة
-    document.addEventListener('contextmenu', event => event.preventDefault());
-
-    // منع اختصارات لوحة المفاتيح مثل Ctrl+U (رؤية السورس)
-    document.onkeydown = function(e) {
-        if (e.ctrlKey && (e.keyCode === 85 || e.keyCode === 83)) {
-            return false;
-        }
-    };
-</script>
-</body>
-</html>
-"""
-
-# ==================== ROUTES ====================
-@app.route("/", methods=["GET", "POST"])
-def index():
-    analysis = None
-    rec = ""
-    rsrp = sinr = 0
-    network_score = None
-    star_rating = None
-    
-    if request.method == "POST":
-        try:
-            lat = float(request.form.get("lat", 0))
-            lon = float(request.form.get("lon", 0))
-            rsrp = int(request.form.get("rsrp", -140))
-            sinr = int(request.form.get("sinr", 0))
-            network_type = request.form.get("network", "4G")
-            operator = request.form.get("operator", "Djezzy")
-            place = request.form.get("place", "Indoor")
-            wilaya = request.form.get("Wilaya", "")
-            city = request.form.get("city", "")
-            
-            speed_data_str = request.form.get("speed_data", "")
-            speed_data = None
-            if speed_data_str:
-                try:
-                    speed_data = json.loads(speed_data_str)
-                except:
-                    pass
-            
-            summary, technical_explanation, recommendations, network_score, score_breakdown, rec, issue_type = analyze_network(
-                lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data
-            )
-            
-            analysis = summary
-            star_rating = score_breakdown['stars']
-            
-            # Store in session for PDF generation
-            session['report_data'] = {
-                'lat': lat, 'lon': lon, 'rsrp': rsrp, 'sinr': sinr,
-                'network': network_type, 'operator': operator, 'place': place,
-                'wilaya': wilaya, 'city': city, 'speed_data': speed_data,
-                'summary': summary, 'technical_explanation': technical_explanation,
-                'recommendations': recommendations, 'network_score': network_score,
-                'score_breakdown': score_breakdown, 'short_recommendation': rec
-            }
-            
-            # Save to analytics history
-            analysis_data = {
-                'lat': lat, 'lon': lon, 'rsrp': rsrp, 'sinr': sinr,
-                'network': network_type, 'operator': operator, 'place': place,
-                'wilaya': wilaya, 'city': city, 'speed_data': speed_data
-            }
-            
-            analysis_results = {
-                'network_score': network_score,
-                'score_breakdown': score_breakdown,
-                'issue_type': issue_type,
-                'summary': summary,
-                'recommendations': recommendations,
-                'short_recommendation': rec
-            }
-            
-            save_analytics_record(analysis_data, analysis_results)
-            
-        except ValueError as e:
-            rec = f"خطأ في البيانات: {str(e)}"
-
-    return render_template_string(HTML_PAGE, analysis=analysis, rec=rec, rsrp=rsrp, sinr=sinr,
-                                 network_score=network_score, star_rating=star_rating, request=request)
-
-@app.route("/analytics")
-def analytics_page():
-    """Display analytics history"""
-    stats = get_analytics_stats()
-    return render_template_string(ANALYTICS_PAGE, analytics=analytics_history, 
-                                 analytics_json=json.dumps(analytics_history),
-                                 stats=stats)
-
-@app.route("/download_pdf")
-def download_pdf():
-    report_data = session.get('report_data')
-    if not report_data:
-        return "لا توجد بيانات. قم بتشغيل التحليل أولاً.", 400
-    
-    pdf = generate_advanced_pdf(report_data)
-    return send_file(
-        io.BytesIO(pdf),
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'ISHARATI_Report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    )
-
-@app.route("/download_pdf_analytics/<record_id>")
-def download_pdf_analytics(record_id):
-    """Download PDF for a specific analytics record"""
-    record = next((r for r in analytics_history if r['id'] == record_id), None)
-    if not record:
-        return "التحليل غير موجود", 404
-    
-    report_data = {
-        'lat': record['lat'], 
-        'lon': record['lon'], 
-        'rsrp': record['rsrp'], 
-        'sinr': record['sinr'],
-        'network': record['network_type'], 
-        'operator': record['operator'], 
-        'place': record['place'],
-        'wilaya': record['wilaya'], 
-        'city': record['city'], 
-        'speed_data': record.get('speed_data'),
-        'network_score': record['network_score'],
-        'score_breakdown': record['score_breakdown']
-    }
-    
-    pdf = generate_advanced_pdf(report_data)
-    return send_file(
-        io.BytesIO(pdf),
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'ISHARATI_Analytics_{record_id}.pdf'
-    )
-
-@app.route("/api/delete_analytics/<record_id>", methods=["DELETE"])
-def delete_analytics(record_id):
-    """Delete a specific analytics record"""
-    global analytics_history
-    analytics_history = [r for r in analytics_history if r['id'] != record_id]
-    return jsonify({"success": True})
-
-@app.route("/api/clear_all_analytics", methods=["DELETE"])
-def clear_all_analytics():
-    """Clear all analytics history"""
-    global analytics_history
-    analytics_history = []
-    return jsonify({"success": True})
-@app.route('/api/download-test')
-def download_test():
-    # Generates 10MB of empty data for the browser to download
-    data = b"\0" * 10_000_000 
-    return send_file(
-        io.BytesIO(data),
-        mimetype='application/octet-stream',
-        as_attachment=True,
-        download_name='testfile'
-    )
-@app.route("/speed-test")
-def speed_test_page():
-    return render_template_string(SPEED_TEST_PAGE)
-@app.route('/api/speed-test')
-def speed_test_fallback():
-    # We return a small JSON or redirect the logic to the frontend
-    return jsonify({
-        "info": "Please use client-side JS for accurate testing on Vercel"
-    })
-@app.route("/guide")
-def guide():
-    # Use the original GUIDE_PAGE from your code
-    return render_template_string(GUIDE_PAGE)
-
-@app.route("/knowledge")
-def knowledge():
-    # Use the original KNOWLEDGE_PAGE from your code
-    return render_template_string(KNOWLEDGE_PAGE)
-
-if __name__ == "__main__":
-    print("=" * 60)
-    print("🚀 ISHARATI PRO v1.0 - Advanced Network Diagnostic Platform")
-    print("=" * 60)
-    print("✅ Features:")
-    print("   - Complete UI Design")
-    print("   - Advanced Analytics Engine")
-    print("   - Network Quality Scoring")
-    print("   - PDF Report Generation")
-    print("   - Speed Test Integration")
-    print("   - 📊 Previous Analytics Page with:")
-    print("      • Search and Filter")
-    print("      • Statistics Dashboard")
-    print("      • Detailed View Modal")
-    print("      • PDF Export per Record")
-    print("      • Delete Functionality")
-    print("=" * 60)
-    print("🌐 Access at: http://localhost:5000")
-    print("📊 Analytics: http://localhost:5000/analytics")
-    print("=" * 60)
-    app.run(debug=True, port=5000, host='0.0.0.0')
-
-
+from flask import Flask, request, render_template, jsonify, send_file, session, abort, Response, stream_with_context
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import ClosingIterator
+from datetime import datetime, timedelta
+from enum import IntEnum, IntFlag
+from collections import deque, Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import math
+import json
+import io
+import csv
+import gzip
+import os
+import sys
+import time
+import hmac
+import hashlib
+import random
+import marshal
+import mmap
+import cProfile
+import threading
+import asyncio
+import tempfile
+import subprocess
+import uuid
+import zlib
+import struct
+import string
+import click
+# speedtest and ReportLab are heavy and only needed by run_speedtest and the
+# PDF routes, so they are imported on first use (see warm_up) to keep
+# serverless cold starts short. NumPy, behind the analytics indexes and
+# rasters, is imported the same way by the functions that use it.
+
+# Page templates live in templates/ and are read and compiled by Jinja the
+# first time their route is rendered, then cached for the process lifetime.
+app = Flask(__name__)
+app.secret_key = 'isharati-pro-secret-key-2026'
+
+# ==================== CONFIGURATION ====================
+# Admin-only endpoints (/admin/...) are disabled while no token is configured
+ADMIN_TOKEN = os.environ.get('ISHARATI_ADMIN_TOKEN', '')
+# Fraction of requests profiled automatically (0 = only on admin header)
+PROFILE_SAMPLE_RATE = float(os.environ.get('ISHARATI_PROFILE_SAMPLE_RATE', '0'))
+PROFILE_BUFFER_SIZE = int(os.environ.get('ISHARATI_PROFILE_BUFFER_SIZE', '20'))
+PROFILE_STACK_INTERVAL = 0.001  # seconds between stack samples
+# Number of memoised analyze_network results
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ISHARATI_ANALYSIS_CACHE_SIZE', '1024'))
+# Analytics history size and what happens when it is full: drop the 'oldest' record or 'reject' new ones
+HISTORY_CAPACITY = int(os.environ.get('ISHARATI_HISTORY_CAPACITY', '100000'))
+HISTORY_EVICTION = os.environ.get('ISHARATI_HISTORY_EVICTION', 'oldest')
+# Recent history changes kept for /api/analytics/changes; older clients reload in full
+HISTORY_FEED_SIZE = int(os.environ.get('ISHARATI_HISTORY_FEED_SIZE', '10000'))
+# Directory for the durable history log and snapshots (unset = history is lost on restart)
+HISTORY_DIR = os.environ.get('ISHARATI_HISTORY_DIR', '')
+HISTORY_COMMIT_INTERVAL = float(os.environ.get('ISHARATI_HISTORY_COMMIT_MS', '5')) / 1000  # group-commit window
+HISTORY_SNAPSHOT_EVERY = int(os.environ.get('ISHARATI_HISTORY_SNAPSHOT_EVERY', '10000'))  # log entries
+# How long a submitted form's idempotency key is remembered, and the window in seconds in
+# which an identical submission from the same client without a key counts as a duplicate
+IDEMPOTENCY_TTL = float(os.environ.get('ISHARATI_IDEMPOTENCY_TTL', '600'))
+DEDUP_WINDOW = float(os.environ.get('ISHARATI_DEDUP_WINDOW', '10'))
+# Bulk import (/admin/import, flask import-history): rows per batch and analysis threads
+IMPORT_BATCH_SIZE = int(os.environ.get('ISHARATI_IMPORT_BATCH_SIZE', '2000'))
+IMPORT_WORKERS = int(os.environ.get('ISHARATI_IMPORT_WORKERS', '4'))
+# Per-client request budgets as 'count/seconds' ('0' = unlimited) for cheap routes, expensive
+# routes and speed-test transfers (one test = a download and an upload), and how many
+# expensive requests and how many transfers may run at once (0 = no cap)
+RATE_LIMIT_CHEAP = os.environ.get('ISHARATI_RATE_LIMIT_CHEAP', '300/60')
+RATE_LIMIT_EXPENSIVE = os.environ.get('ISHARATI_RATE_LIMIT_EXPENSIVE', '30/60')
+RATE_LIMIT_SPEED_TEST = os.environ.get('ISHARATI_RATE_LIMIT_SPEED_TEST', '20/60')
+HEAVY_CONCURRENCY = int(os.environ.get('ISHARATI_HEAVY_CONCURRENCY', '8'))
+SPEED_TEST_CONCURRENCY = int(os.environ.get('ISHARATI_SPEED_TEST_CONCURRENCY', '16'))
+# Behind N proxies that each append to X-Forwarded-For, key clients on the N-th address from
+# the right, the one the outermost trusted proxy saw (0 = use the socket address)
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('ISHARATI_TRUST_FORWARDED', '0') or 0)
+# Speed test: bytes served by /api/download-test, largest body accepted by /api/upload-test,
+# and the worker threads that run the WSGI routes under the ASGI entry point (asgi_app)
+SPEED_TEST_BYTES = int(os.environ.get('ISHARATI_SPEED_TEST_BYTES', '10000000'))
+SPEED_TEST_UPLOAD_LIMIT = int(os.environ.get('ISHARATI_SPEED_TEST_UPLOAD_LIMIT', '20000000'))
+ASGI_WORKERS = int(os.environ.get('ISHARATI_ASGI_WORKERS', '16'))
+# Response compression: smallest body worth compressing, and how many compressed
+# variants of ETag'd responses are kept
+COMPRESS_MIN_SIZE = int(os.environ.get('ISHARATI_COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_CACHE_SIZE = int(os.environ.get('ISHARATI_COMPRESS_CACHE_SIZE', '256'))
+# Rendered heatmap tiles (JSON or PNG) kept for unchanged tiles
+TILE_CACHE_SIZE = int(os.environ.get('ISHARATI_TILE_CACHE_SIZE', '4096'))
+# Preload the lazily imported dependencies in the background at startup
+WARMUP_ON_START = os.environ.get('ISHARATI_WARMUP', '') == '1'
+
+# ==================== BTS DATA ====================
+BTS_LIST = [
+    {"name": "BTS-Center", "lat": 36.7538, "lon": 3.0588, "operator": "Mobilis"},
+    {"name": "BTS-East", "lat": 36.7119, "lon": 3.1895, "operator": "Djezzy"},
+    {"name": "BTS-West", "lat": 36.7431, "lon": 3.0372, "operator": "Ooredoo"},
+    {"name": "BTS-North", "lat": 36.7838, "lon": 3.0688, "operator": "Mobilis"},
+    {"name": "BTS-South", "lat": 36.7238, "lon": 3.0488, "operator": "Djezzy"},
+]
+
+# ==================== IN-MEMORY ANALYTICS STORAGE ====================
+# In production, use a database (SQLite, PostgreSQL, etc.)
+class IndexGuard:
+    """Lock of one secondary index, returned by AnalyticsStore.reading().
+
+    Entering the outermost hold of a thread applies the changes queued for
+    the index; leaving it applies those queued meanwhile, so a reader sees
+    every completed write and the index never changes under a reader.
+    """
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+        self.lock = threading.RLock()
+        self.applied = 0  # position in the store's change queue applied to the index
+        self.skipped = set()  # ids of records the index failed to add, so their removal is skipped too
+        self._depth = threading.local()
+
+    def held(self):
+        return getattr(self._depth, 'value', 0) > 0
+
+    def __enter__(self):
+        self.lock.acquire()
+        depth = getattr(self._depth, 'value', 0)
+        self._depth.value = depth + 1
+        if depth == 0:
+            try:
+                self.store._catch_up(self)
+            except BaseException:
+                self._depth.value = 0
+                self.lock.release()
+                raise
+        return self.index
+
+    def __exit__(self, *exc_info):
+        self._depth.value -= 1
+        self.lock.release()
+        if not self._depth.value:
+            self.store._drain(self)
+
+class AnalyticsStore:
+    """Analytics history shared between server threads.
+
+    Records live in a ring buffer of at most ``capacity`` slots, appended in
+    O(1); once it is full the ``eviction`` policy either drops the oldest
+    record ('oldest') or refuses new ones ('reject'). Writers serialise on one
+    lock and publish a (slots, tail, head) view, so readers such as the
+    /analytics render walk it newest-first without locking and never wait
+    for a writer. Secondary indexes are lock-striped: each has its own lock
+    and an API reader only holds the lock of the index it queries (see
+    reading()). Writers never wait for those readers: they queue index
+    changes under the write lock and, once it is released, apply them to
+    every index whose lock is free; an index busy with a reader is brought
+    up to date by that reader when it is done (see IndexGuard).
+
+    Every change also gets the next number of a monotonic ``sequence`` and is
+    kept in a bounded feed of ``feed_size`` changes, so clients can fetch what
+    happened since the sequence they last saw (see changes()).
+    """
+    EVICTION_POLICIES = ('oldest', 'reject')
+
+    def __init__(self, indexes=(), capacity=HISTORY_CAPACITY, eviction=HISTORY_EVICTION,
+                 feed_size=HISTORY_FEED_SIZE):
+        if capacity < 1 or eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"invalid history capacity {capacity!r} or eviction policy {eviction!r}")
+        self.capacity = capacity
+        self.eviction = eviction
+        self._write_lock = threading.Lock()
+        self.indexes = list(indexes)
+        self._guards = [IndexGuard(self, index) for index in self.indexes]
+        self._guard_of = {id(guard.index): guard for guard in self._guards}
+        # ('add' | 'remove' | 'clear', record) not yet applied by every index;
+        # _queue_start is the queue position of its first entry
+        self._queue = deque()
+        self._queue_start = 0
+        self._queue_lock = threading.Lock()
+        self._deferred = False  # see defer_indexing()
+        self.journal = None  # HistoryJournal, attached once it has replayed the history
+        # Starts past any sequence a previous process handed out, so clients notice a restart
+        self.sequence = time.time_ns() // 1000
+        self._feed = deque(maxlen=feed_size)  # (sequence, '+' | '-' | '*', record id)
+        self._feed_changed = threading.Condition()
+        self._changes = []  # made by the current write, published by _publish()
+        self._reset()
+
+    def _reset(self):
+        # Slot ``position % capacity`` holds (position, record), or None once deleted;
+        # positions tail..head-1 are in use, the list grows until it reaches capacity
+        self._view = ([], 0, 0)
+        self._positions = {}
+        self._by_id = {}
+        self.evicted = self.rejected = 0
+
+    def reading(self, index):
+        """Guard of ``index`` against concurrent updates, for use in a with statement"""
+        return self._guard_of[id(index)]
+
+    def iter_records(self):
+        """Records newest first, as of the last completed write, without copying the history"""
+        slots, tail, head = self._view
+        capacity = self.capacity
+        for position in range(head - 1, tail - 1, -1):
+            entry = slots[position % capacity]
+            # Skip slots deleted or reused since the view was published
+            if entry is not None and entry[0] == position:
+                yield entry[1]
+
+    def snapshot(self):
+        """List of the records newest first, as of the last completed write"""
+        return list(self.iter_records())
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, record_id):
+        return self._by_id.get(record_id)
+
+    def add(self, record):
+        """Append a record; returns False if the 'reject' policy turned it away"""
+        with self._write_lock:
+            if not self._insert(record):
+                return False
+            ticket = self._log(['+', record.to_row()])
+            self._publish()
+        self._apply()
+        self._commit(ticket)
+        return True
+
+    def add_many(self, records):
+        """Append a batch as one transaction: one lock hold, one pass per index, one commit.
+
+        Returns the number of records stored (some may be rejected or, for
+        batches larger than the capacity, evicted straight away).
+        """
+        with self._write_lock:
+            if self.eviction == 'oldest' and len(records) > self.capacity:
+                # Only the newest ``capacity`` records of the batch could survive it
+                self.evicted += len(records) - self.capacity
+                records = records[-self.capacity:]
+            # Any eviction now hits records older than the batch, which are already indexed
+            stored = [record for record in records if self._insert(record)]
+            ticket = self._log(*(['+', record.to_row()] for record in stored))
+            self._publish()
+        self._apply()
+        self._commit(ticket)
+        return len(stored)
+
+    def _insert(self, record):
+        """Place a record in the ring and queue it for the indexes (caller holds the write lock)"""
+        slots, tail, head = self._view
+        if len(self._by_id) >= self.capacity:
+            if self.eviction == 'reject':
+                self.rejected += 1
+                return False
+            tail = self._skip_deleted(slots, tail, head)
+            evicted = slots[tail % self.capacity][1]
+            self._drop(evicted)
+            self._changes.append(('-', evicted.id))
+            self.evicted += 1
+            tail += 1
+        elif head - tail == self.capacity:
+            # Free slots are scattered between live records: close the gaps
+            slots, tail, head = self._compact(slots, tail, head)
+        entry = (head, record)
+        if len(slots) < self.capacity:
+            slots.append(entry)
+        else:
+            slots[head % self.capacity] = entry
+        self._positions[record.id] = head
+        self._by_id[record.id] = record
+        self._view = (slots, tail, head + 1)
+        self._enqueue('add', record)
+        self._changes.append(('+', record.id))
+        return True
+
+    def remove(self, record_id):
+        """Delete a record by id; returns it, or None if it was not stored"""
+        with self._write_lock:
+            position = self._positions.get(record_id)
+            if position is None:
+                return None
+            slots, tail, head = self._view
+            record = slots[position % self.capacity][1]
+            slots[position % self.capacity] = None
+            self._drop(record)
+            self._view = (slots, self._skip_deleted(slots, tail, head), head)
+            ticket = self._log(['-', record_id])
+            self._changes.append(('-', record_id))
+            self._publish()
+        self._apply()
+        self._commit(ticket)
+        return record
+
+    def clear(self):
+        with self._write_lock:
+            self._reset()
+            self._enqueue('clear', None)
+            ticket = self._log(['*'])
+            self._changes.append(('*', None))
+            self._publish()
+        self._apply()
+        self._commit(ticket)
+
+    def changes(self, since, timeout=0):
+        """(sequence, [(op, record id), ...] made after ``since``) oldest first.
+
+        The changes are None when ``since`` is older than the feed or not one
+        this store handed out, i.e. the caller must reload the full history.
+        With a timeout, waits up to that long for a change if there is none yet.
+        """
+        with self._feed_changed:
+            if timeout and since == self.sequence:
+                self._feed_changed.wait(timeout)
+            sequence = self.sequence
+            if since > sequence or (since < sequence and (not self._feed or self._feed[0][0] > since + 1)):
+                return sequence, None
+            start = since + 1 - self._feed[0][0] if self._feed else 0
+            return sequence, [change[1:] for change in islice(self._feed, start, None)]
+
+    def _publish(self):
+        # Last step of a write (under the write lock), after the view is published: a reader that
+        # takes the sequence and then walks the records sees every change up to it
+        if not self._changes:
+            return
+        with self._feed_changed:
+            for op, record_id in self._changes:
+                self.sequence += 1
+                self._feed.append((self.sequence, op, record_id))
+            self._feed_changed.notify_all()
+        self._changes = []
+
+    def _log(self, *entries):
+        """Journal changes (under the write lock); returns the ticket to commit"""
+        if self.journal is None or not entries:
+            return None
+        for entry in entries:
+            ticket = self.journal.append(entry)
+        # Only between transactions, so a snapshot never splits a batch
+        if self.journal.snapshot_due():
+            self.journal.start_snapshot(self.snapshot()[::-1])
+        return ticket
+
+    def _commit(self, ticket):
+        # Outside the write lock, so that concurrent writers share one fsync
+        if ticket is not None:
+            self.journal.wait(ticket)
+
+    def _skip_deleted(self, slots, tail, head):
+        while tail < head and slots[tail % self.capacity] is None:
+            tail += 1
+        return tail
+
+    def _drop(self, record):
+        del self._positions[record.id]
+        del self._by_id[record.id]
+        self._enqueue('remove', record)
+
+    # ---- secondary index updates ----
+    def defer_indexing(self):
+        """Stop updating the indexes until rebuild_indexes(), e.g. while a history is loaded in bulk"""
+        with self._write_lock:
+            self._deferred = True
+
+    def rebuild_indexes(self):
+        """Refill every index once from the live records and resume updating them"""
+        with self._write_lock:
+            self._deferred = False
+        for guard in self._guards:
+            with guard.lock:
+                guard.applied = self._rebuild(guard)
+        self._trim_queue()
+
+    def _enqueue(self, op, record):
+        # Under the write lock, so the queue is in write order
+        if not self._guards or self._deferred:
+            return
+        with self._queue_lock:
+            self._queue.append((op, record))
+
+    def _apply(self):
+        # After the write lock is released: update the indexes nobody is reading
+        for guard in self._guards:
+            self._drain(guard)
+
+    def _drain(self, guard):
+        """Apply the queued changes to one index if its lock is free; never waits"""
+        if guard.held():
+            return  # the outermost exit of this thread drains it
+        while guard.applied < self._queue_start + len(self._queue) and guard.lock.acquire(blocking=False):
+            try:
+                self._catch_up(guard)
+            finally:
+                guard.lock.release()
+
+    def _catch_up(self, guard):
+        """Apply the queued changes an index has not seen (caller holds its lock).
+
+        A change the index fails on is logged and skipped, never retried: the
+        index is then rebuilt from the live records, so one bad record cannot
+        leave it half-updated or block the changes queued behind it.
+        """
+        with self._queue_lock:
+            changes = list(islice(self._queue, guard.applied - self._queue_start, None))
+            end = self._queue_start + len(self._queue)
+        failed = False
+        for op, record in changes:
+            if op == 'add':
+                failed |= not self._index_add(guard, record)
+            elif op == 'remove':
+                if record.id in guard.skipped:
+                    guard.skipped.discard(record.id)
+                    continue
+                try:
+                    guard.index.remove(record)
+                except Exception:
+                    app.logger.exception("%s: cannot remove record %s", type(guard.index).__name__, record.id)
+                    failed = True
+            else:
+                guard.index.clear()
+                guard.skipped.clear()
+        if failed:
+            end = self._rebuild(guard)
+        guard.applied = end
+        self._trim_queue()
+
+    def _trim_queue(self):
+        with self._queue_lock:
+            # Drop the changes every index has applied
+            done = min((g.applied for g in self._guards), default=self._queue_start)
+            while self._queue_start < done:
+                self._queue.popleft()
+                self._queue_start += 1
+
+    def _index_add(self, guard, record):
+        try:
+            guard.index.add(record)
+            return True
+        except Exception:
+            app.logger.exception("%s: cannot add record %s", type(guard.index).__name__, record.id)
+            guard.skipped.add(record.id)
+            return False
+
+    def _rebuild(self, guard):
+        """Refill an index from the live records (caller holds its lock); returns the queue position it reflects.
+
+        Indexes with an add_many() get the records in one call; should it fail they are
+        added one by one, so only the records the index rejects are left out.
+        """
+        with self._write_lock:
+            records = self.snapshot()
+            with self._queue_lock:
+                end = self._queue_start + len(self._queue)
+        records.reverse()
+        guard.index.clear()
+        guard.skipped.clear()
+        if hasattr(guard.index, 'add_many'):
+            try:
+                guard.index.add_many(records)
+                return end
+            except Exception:
+                app.logger.exception("%s: cannot add %d records at once", type(guard.index).__name__, len(records))
+                guard.index.clear()
+        for record in records:
+            self._index_add(guard, record)
+        return end
+
+    def _compact(self, slots, tail, head):
+        """Copy the live records into a fresh slot list; readers keep the old one"""
+        compacted = []
+        for position in range(tail, head):
+            entry = slots[position % self.capacity]
+            if entry is not None:
+                self._positions[entry[1].id] = len(compacted)
+                compacted.append((len(compacted), entry[1]))
+        return compacted, 0, len(compacted)
+
+# ==================== UTILITY FUNCTIONS ====================
+def haversine(lat1, lon1, lat2, lon2):
+    """Calculate distance between two points on Earth"""
+    R = 6371
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dlon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return R * c
+
+# Plausible measurement values (inclusive); anything outside is a typo or a forged request
+MEASUREMENT_RANGES = {'lat': (-90, 90), 'lon': (-180, 180), 'rsrp': (-140, -44), 'sinr': (-20, 40),
+                      'download': (0, 10000), 'upload': (0, 10000), 'ping': (0, 60000)}
+
+def check_measurement(lat, lon, rsrp, sinr, speed_data=None):
+    """Raise ValueError unless the position, signal and speed values lie in MEASUREMENT_RANGES"""
+    values = {'lat': lat, 'lon': lon, 'rsrp': rsrp, 'sinr': sinr}
+    if speed_data is not None:
+        if not isinstance(speed_data, dict):
+            raise ValueError("speed_data must be an object")
+        values.update((name, speed_data[name]) for name in ('download', 'upload', 'ping')
+                      if speed_data.get(name) is not None)
+    for name, value in values.items():
+        low, high = MEASUREMENT_RANGES[name]
+        # The negated test also rejects NaN
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}, got {value!r:.20}")
+
+
+def run_speedtest():
+    """Run speedtest using the Python library directly (No subprocess)"""
+    try:
+        import speedtest
+
+        # إنشاء كائن الاختبار
+        st = speedtest.Speedtest()
+        
+        # البحث عن أفضل سيرفر (هذه الخطوة ضرورية جداً)
+        st.get_best_server()
+        
+        # قياس التحميل والرفع
+        # ملاحظة: العمليات التالية تأخذ وقتاً (حوالي 20-30 ثانية)
+        download_speed = st.download() / 1_000_000  # bits/s -> Mbps
+        upload_speed = st.upload() / 1_000_000
+        ping = st.results.ping
+
+        # Sanity limits (realistic mobile network limits)
+        download_speed = min(download_speed, 300)   # Mbps
+        upload_speed = min(upload_speed, 100)       # Mbps
+        ping = max(ping, 5)                          # ms
+        
+        return {
+            'download': round(download_speed, 2),
+            'upload': round(upload_speed, 2),
+            'ping': round(ping, 2)
+        }
+    except Exception as e:
+        # إذا كان هناك خطأ في الاتصال بالإنترنت أو السيرفر
+        return {'error': f'فشل الاختبار: تأكد من اتصالك بالإنترنت ({str(e)})'}
+
+# ==================== DIAGNOSTIC CODES ====================
+class IssueType(IntEnum):
+    NORMAL = 0
+    INTERFERENCE = 1
+    COVERAGE = 2
+    CONGESTION = 3
+
+ISSUE_TYPES = {
+    IssueType.INTERFERENCE: {
+        "type": "interference",
+        "ar": "تداخل في الإشارة",
+        "explanation": "الإشارة قوية لكن هناك تشويش من أبراج أخرى"
+    },
+    IssueType.COVERAGE: {
+        "type": "coverage",
+        "ar": "مشكلة تغطية",
+        "explanation": "الإشارة ضعيفة بسبب البعد عن البرج"
+    },
+    IssueType.CONGESTION: {
+        "type": "congestion",
+        "ar": "ازدحام على البرج",
+        "explanation": "الإشارة جيدة لكن البرج مزدحم"
+    },
+    IssueType.NORMAL: {
+        "type": "normal",
+        "ar": "طبيعي",
+        "explanation": "القيم ضمن المعدل الطبيعي"
+    },
+}
+
+class Recommendation(IntFlag):
+    NEAR_WINDOW = 1
+    REPEATER = 2
+    CHANGE_LOCATION = 4
+    RESTART_PHONE = 8
+    AVOID_PEAK = 16
+    CLOSE_APPS = 32
+    CHECK_PLAN = 64
+
+# Category and message code of each recommendation, in display order
+RECOMMENDATIONS = {
+    Recommendation.NEAR_WINDOW: ("physical", "rec.near_window"),
+    Recommendation.REPEATER: ("physical", "rec.repeater"),
+    Recommendation.CHANGE_LOCATION: ("network", "rec.change_location"),
+    Recommendation.RESTART_PHONE: ("network", "rec.restart_phone"),
+    Recommendation.AVOID_PEAK: ("usage", "rec.avoid_peak"),
+    Recommendation.CLOSE_APPS: ("usage", "rec.close_apps"),
+    Recommendation.CHECK_PLAN: ("usage", "rec.check_plan"),
+}
+
+# ==================== MESSAGE CATALOG ====================
+# Every user-facing analysis text, keyed by message code. Analyses and records
+# only carry codes and parameters; text is produced by render_message() when
+# a page or a PDF is built.
+MESSAGES = {
+    # Summary lines
+    "summary.distance": "📍 المسافة لأقرب برج ({bts} - {operator}): {distance:.2f} كم",
+    "summary.distance_category": "{emoji} {category} من البرج",
+    "summary.rsrp": "{emoji} قوة الإشارة (RSRP): {status}",
+    "summary.sinr": "{emoji} جودة الإشارة (SINR): {status}",
+    "summary.download": "⚡ سرعة التحميل: {download} Mbps",
+    "summary.upload": "⬆️ سرعة الرفع: {upload} Mbps",
+    "summary.ping": "📡 Ping: {ping} ms",
+    "summary.peak": "⏰ تنبيه: وقت ذروة ({start:02d}:00-{end:02d}:00)",
+    # Technical explanation
+    "explain.rsrp": "RSRP يقيس قوة الإشارة. قيمتك {rsrp} dBm تعني إشارة {status}.",
+    "explain.sinr": "SINR يقيس نقاء الإشارة. قيمتك {sinr} dB تعني جودة {status}.",
+    "explain.distance": "المسافة {distance:.2f} كم من البرج - {category}.",
+    "explain.network_type": "شبكة {network_type} من {operator}.",
+    "explain.location": "موقعك {place} في {city}, {wilaya}.",
+    # Recommendations
+    "rec.near_window": "📍 اقترب من النافذة",
+    "rec.repeater": "📍 فكر في مقوي إشارة (Repeater)",
+    "rec.change_location": "📡 حاول تغيير موقعك لتقليل التداخل",
+    "rec.restart_phone": "📡 أعد تشغيل الهاتف",
+    "rec.avoid_peak": "⏱ تجنب التحميلات الكبيرة الآن (وقت الذروة)",
+    "rec.close_apps": "⏱ أغلق التطبيقات غير المستخدمة",
+    "rec.check_plan": "📱 السرعة منخفضة جداً - تحقق من الباقة",
+    # Short recommendation: issue verdict followed by the speed verdict
+    "verdict.coverage_indoor": "الإشارة ضعيفة داخل المبنى. الحل الأمثل: تركيب مقوي شبكة (Repeater) أو استخدام WiFi Calling.",
+    "verdict.coverage_outdoor": "الإشارة ضعيفة حتى في الخارج. المنطقة قد تكون في ظل تغطية (Coverage Hole).",
+    "verdict.interference": "الإشارة قوية لكن الجودة سيئة. هذا يعني وجود 'تداخل' (Interference) من أبراج أخرى. جرب تغيير الغرفة لعزل التشويش.",
+    "verdict.congestion": "الإشارة ممتازة لكن السرعة بطيئة. البرج مزدحم بالمشتركين. جرب في وقت آخر.",
+    "verdict.normal": "القيم تبدو جيدة. إذا كان النت بطيئاً، فالمشكلة غالباً من المصدر (تشبع البرج بالمشتركين) وليس من تغطيتك.",
+    "verdict.speed_very_slow": " سرعة التحميل بطيئة جداً (<1 Mbps). تحقق من الباقة المشترك بها أو اتصل بمزود الخدمة.",
+    "verdict.speed_limited": " سرعة التحميل محدودة (1-5 Mbps). مناسبة للتصفح الأساسي فقط.",
+    "verdict.speed_good": " سرعة التحميل جيدة (5-20 Mbps). مناسبة للفيديو بجودة HD.",
+    "verdict.speed_excellent": " سرعة التحميل ممتازة (>20 Mbps). يمكنك البث بجودة 4K.",
+}
+
+class MessageTemplate:
+    """A MESSAGES entry parsed once into (literal, field, format spec) parts"""
+    __slots__ = ('parts',)
+
+    def __init__(self, text):
+        self.parts = tuple((literal, field, spec) for literal, field, spec, _ in string.Formatter().parse(text))
+
+    def render(self, params):
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(params[field], spec))
+        return ''.join(out)
+
+CATALOG = {code: MessageTemplate(text) for code, text in MESSAGES.items()}
+
+def render_message(code, params=None):
+    return CATALOG[code].render(params or {})
+
+# ==================== ADVANCED DIAGNOSTIC ENGINE ====================
+class NetworkDiagnosticEngine:
+    @staticmethod
+    def classify_rsrp(rsrp):
+        if rsrp > -80:
+            return {"status": "ممتازة", "rating": "Excellent", "emoji": "✅", "score": 100}
+        elif rsrp > -90:
+            return {"status": "جيدة جداً", "rating": "Very Good", "emoji": "✅", "score": 85}
+        elif rsrp > -100:
+            return {"status": "جيدة", "rating": "Good", "emoji": "⚠️", "score": 70}
+        elif rsrp > -110:
+            return {"status": "متوسطة", "rating": "Fair", "emoji": "⚠️", "score": 50}
+        else:
+            return {"status": "ضعيفة جداً", "rating": "Poor", "emoji": "❌", "score": 20}
+    
+    @staticmethod
+    def classify_sinr(sinr):
+        if sinr > 20:
+            return {"status": "ممتازة (سرعة عالية)", "rating": "Excellent", "emoji": "📶", "score": 100}
+        elif sinr > 13:
+            return {"status": "جيدة جداً", "rating": "Very Good", "emoji": "📶", "score": 85}
+        elif sinr > 0:
+            return {"status": "مقبولة", "rating": "Acceptable", "emoji": "📶", "score": 60}
+        else:
+            return {"status": "سيئة (تشويش عالي)", "rating": "Poor", "emoji": "🚫", "score": 20}
+    
+    @staticmethod
+    def estimate_distance_category(distance):
+        if distance < 0.5:
+            return {"category": "قريب جداً", "desc": "Near tower", "emoji": "✅"}
+        elif distance < 2:
+            return {"category": "قريب", "desc": "Close to tower", "emoji": "✅"}
+        elif distance < 5:
+            return {"category": "متوسط", "desc": "Medium distance", "emoji": "⚠️"}
+        elif distance < 10:
+            return {"category": "بعيد", "desc": "Far from tower", "emoji": "⚠️"}
+        else:
+            return {"category": "بعيد جداً", "desc": "Very far", "emoji": "❌"}
+    
+    @staticmethod
+    def detect_issue(rsrp, sinr, download_speed=None, congestion_threshold=5):
+        if rsrp > -95 and sinr < 5:
+            return IssueType.INTERFERENCE
+        elif rsrp < -105:
+            return IssueType.COVERAGE
+        elif download_speed and download_speed < congestion_threshold and rsrp > -90 and sinr > 10:
+            return IssueType.CONGESTION
+        else:
+            return IssueType.NORMAL
+    
+    @staticmethod
+    def detect_issue_type(rsrp, sinr, download_speed=None, congestion_threshold=5):
+        return dict(ISSUE_TYPES[NetworkDiagnosticEngine.detect_issue(rsrp, sinr, download_speed, congestion_threshold)])
+    
+    @staticmethod
+    def calculate_network_score(rsrp, sinr, download=None):
+        engine = NetworkDiagnosticEngine()
+        rsrp_class = engine.classify_rsrp(rsrp)
+        sinr_class = engine.classify_sinr(sinr)
+        
+        score = (rsrp_class['score'] * 0.4) + (sinr_class['score'] * 0.4)
+        
+        if download is not None:
+            if download > 20:
+                speed_score = 100
+            elif download > 10:
+                speed_score = 80
+            elif download > 5:
+                speed_score = 60
+            else:
+                speed_score = 40
+            score += speed_score * 0.2
+        else:
+            score = (rsrp_class['score'] * 0.5) + (sinr_class['score'] * 0.5)
+        
+        return round(score, 1)
+    
+    @staticmethod
+    def get_star_rating(score):
+        if score >= 90:
+            return "⭐⭐⭐⭐⭐"
+        elif score >= 75:
+            return "⭐⭐⭐⭐"
+        elif score >= 60:
+            return "⭐⭐⭐"
+        elif score >= 40:
+            return "⭐⭐"
+        else:
+            return "⭐"
+
+def nearest_bts(lat, lon, operator):
+    """Closest tower of the operator (any tower if it has none) and its distance in km"""
+    operator_towers = [b for b in BTS_LIST if b["operator"] == operator]
+    if not operator_towers:
+        operator_towers = BTS_LIST
+    
+    distances = [haversine(lat, lon, b["lat"], b["lon"]) for b in operator_towers]
+    min_dist = min(distances)
+    return operator_towers[distances.index(min_dist)], min_dist
+
+def select_recommendations(place, rsrp, sinr, peak, speed_data=None):
+    """Pick the Recommendation flags that apply to a measurement"""
+    flags = Recommendation(0)
+    
+    if place == "Indoor" and rsrp < -100:
+        flags |= Recommendation.NEAR_WINDOW | Recommendation.REPEATER
+    
+    if sinr < 5:
+        flags |= Recommendation.CHANGE_LOCATION | Recommendation.RESTART_PHONE
+    
+    if peak:
+        flags |= Recommendation.AVOID_PEAK
+    
+    flags |= Recommendation.CLOSE_APPS
+    
+    if speed_data and speed_data.get('download', 0) < 1:
+        flags |= Recommendation.CHECK_PLAN
+    return flags
+
+def render_recommendations(flags):
+    """Expand Recommendation flags into the per-category text lists"""
+    recommendations = {"physical": [], "network": [], "usage": []}
+    for flag, (category, code) in RECOMMENDATIONS.items():
+        if flags & flag:
+            recommendations[category].append(render_message(code))
+    return recommendations
+
+def build_score_breakdown(network_score, rsrp, sinr, download_speed=None):
+    engine = NetworkDiagnosticEngine()
+    return {
+        "overall": network_score,
+        "stars": engine.get_star_rating(network_score),
+        "coverage": engine.classify_rsrp(rsrp)['score'],
+        "quality": engine.classify_sinr(sinr)['score'],
+        "speed": round((download_speed / 50) * 100) if download_speed else None
+    }
+
+class Diagnosis:
+    """Result of analyze_network: the measured inputs plus diagnostic codes.
+
+    No text is stored. The *_messages() methods list (message code, params)
+    pairs and the text properties render them through CATALOG, so the Arabic
+    strings are only built when a page or a PDF actually shows them.
+    """
+    __slots__ = ('lat', 'lon', 'rsrp', 'sinr', 'network_type', 'operator', 'place', 'wilaya', 'city',
+                 'download', 'upload', 'ping', 'bts', 'distance', 'network_score', 'issue',
+                 'recommendation_flags', 'peak_window')
+
+    def __init__(self, lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data,
+                 bts, distance, network_score, issue, recommendation_flags, peak_window=None):
+        self.lat = lat
+        self.lon = lon
+        self.rsrp = rsrp
+        self.sinr = sinr
+        self.network_type = sys.intern(network_type)
+        self.operator = sys.intern(operator)
+        self.place = sys.intern(place)
+        self.wilaya = sys.intern(wilaya)
+        self.city = sys.intern(city)
+        speed_data = speed_data or {}
+        self.download = speed_data.get('download')
+        self.upload = speed_data.get('upload')
+        self.ping = speed_data.get('ping')
+        self.bts = sys.intern(bts)
+        self.distance = distance
+        self.network_score = network_score
+        self.issue = IssueType(issue)
+        self.recommendation_flags = Recommendation(recommendation_flags)
+        self.peak_window = peak_window  # (first, last) hour tuple shared with PeakHourIndex
+
+    def to_codes(self):
+        """Compact JSON-safe form (inputs and codes only), e.g. for the session cookie"""
+        return [self.lat, self.lon, self.rsrp, self.sinr, self.network_type, self.operator, self.place,
+                self.wilaya, self.city, self.speed_data, self.bts, self.distance, self.network_score,
+                int(self.issue), int(self.recommendation_flags), self.peak_window and list(self.peak_window)]
+
+    @classmethod
+    def from_codes(cls, codes):
+        *fields, peak_window = codes
+        return cls(*fields, tuple(peak_window) if peak_window else None)
+
+    @property
+    def speed_data(self):
+        speed = {key: value for key, value in
+                 (('download', self.download), ('upload', self.upload), ('ping', self.ping)) if value is not None}
+        return speed or None
+
+    @property
+    def issue_type(self):
+        return dict(ISSUE_TYPES[self.issue])
+
+    @property
+    def score_breakdown(self):
+        return build_score_breakdown(self.network_score, self.rsrp, self.sinr, self.download)
+
+    def summary_messages(self):
+        engine = NetworkDiagnosticEngine()
+        messages = [
+            ("summary.distance", {'bts': self.bts, 'operator': self.operator, 'distance': self.distance}),
+            ("summary.distance_category", engine.estimate_distance_category(self.distance)),
+            ("summary.rsrp", engine.classify_rsrp(self.rsrp)),
+            ("summary.sinr", engine.classify_sinr(self.sinr)),
+        ]
+        if self.download is not None:
+            messages.append(("summary.download", {'download': self.download}))
+            messages.append(("summary.upload", {'upload': self.upload}))
+            messages.append(("summary.ping", {'ping': self.ping}))
+        if self.peak_window:
+            messages.append(("summary.peak", {'start': self.peak_window[0], 'end': self.peak_window[1]}))
+        return messages
+
+    def explanation_messages(self):
+        engine = NetworkDiagnosticEngine()
+        return {
+            "rsrp_explanation": ("explain.rsrp", {'rsrp': self.rsrp, **engine.classify_rsrp(self.rsrp)}),
+            "sinr_explanation": ("explain.sinr", {'sinr': self.sinr, **engine.classify_sinr(self.sinr)}),
+            "distance_explanation": ("explain.distance", {'distance': self.distance,
+                                                          **engine.estimate_distance_category(self.distance)}),
+            "network_type_info": ("explain.network_type", {'network_type': self.network_type,
+                                                           'operator': self.operator}),
+            "location_impact": ("explain.location", {'place': self.place, 'city': self.city,
+                                                     'wilaya': self.wilaya}),
+        }
+
+    def verdict_messages(self):
+        if self.issue == IssueType.COVERAGE:
+            codes = ["verdict.coverage_indoor" if self.place == "Indoor" else "verdict.coverage_outdoor"]
+        else:
+            codes = ["verdict." + ISSUE_TYPES[self.issue]['type']]
+        # Enhanced recommendation with speed test data
+        if self.download is not None:
+            if self.download < 1:
+                codes.append("verdict.speed_very_slow")
+            elif self.download < 5:
+                codes.append("verdict.speed_limited")
+            elif self.download < 20:
+                codes.append("verdict.speed_good")
+            else:
+                codes.append("verdict.speed_excellent")
+        return codes
+
+    @property
+    def summary(self):
+        return [render_message(code, params) for code, params in self.summary_messages()]
+
+    @property
+    def technical_explanation(self):
+        explanation = {key: render_message(code, params) for key, (code, params) in self.explanation_messages().items()}
+        explanation["issue_diagnosis"] = ISSUE_TYPES[self.issue]['explanation']
+        return explanation
+
+    @property
+    def recommendations(self):
+        return render_recommendations(self.recommendation_flags)
+
+    @property
+    def short_recommendation(self):
+        return ''.join(render_message(code) for code in self.verdict_messages())
+
+    def report_data(self):
+        """Fields used by generate_advanced_pdf"""
+        return {
+            'lat': self.lat, 'lon': self.lon, 'rsrp': self.rsrp, 'sinr': self.sinr,
+            'network': self.network_type, 'operator': self.operator, 'place': self.place,
+            'wilaya': self.wilaya, 'city': self.city, 'speed_data': self.speed_data,
+            'network_score': self.network_score, 'score_breakdown': self.score_breakdown
+        }
+
+def _analyze_network(lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data=None, when=None):
+    """Advanced network analysis with comprehensive diagnostics (as of ``when``, default now)"""
+    engine = NetworkDiagnosticEngine()
+    
+    # Find nearest BTS
+    closest_bts, min_dist = nearest_bts(lat, lon, operator)
+    
+    # Detect issue (congestion is judged against the tower's usual speed at this hour)
+    now = when or datetime.now()
+    download_speed = speed_data.get('download') if speed_data else None
+    issue = engine.detect_issue(rsrp, sinr, download_speed,
+                                tower_load.congestion_threshold(closest_bts['name'], now.hour))
+    
+    peak_window = peak_hours.window(operator, wilaya, now)
+    flags = select_recommendations(place, rsrp, sinr, peak_window is not None, speed_data)
+    network_score = engine.calculate_network_score(rsrp, sinr, download_speed)
+    
+    return Diagnosis(lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data,
+                     closest_bts['name'], min_dist, network_score, issue, flags, peak_window)
+
+# ==================== ANALYSIS CACHE ====================
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss/eviction counters"""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'hit_ratio': round(self.hits / lookups, 3) if lookups else None}
+
+analysis_cache = LRUCache(ANALYSIS_CACHE_SIZE)
+
+def analyze_network(lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data=None, when=None):
+    """Memoised _analyze_network; the Diagnosis is shared between callers and must not be mutated.
+
+    The key holds the exact inputs (the result carries the measured coordinates
+    and the distance to the tower), the hour of ``when`` (default now) and the versions of
+    the learned tower and peak-hour profiles, so a cached result is exactly what a fresh
+    analysis would return.
+    """
+    try:
+        speed_key = tuple(sorted(speed_data.items())) if speed_data else None
+        key = (lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_key,
+               (when or datetime.now()).strftime('%Y%m%d%H'), peak_hours.version, tower_load.version)
+        hash(key)
+    except (TypeError, AttributeError):
+        # Unusual speed_data payloads (nested or non-dict JSON) are analysed uncached
+        return _analyze_network(lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data, when)
+
+    result = analysis_cache.get(key)
+    if result is None:
+        result = _analyze_network(lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data, when)
+        analysis_cache.put(key, result)
+    return result
+
+# ==================== ANALYTICS RECORDS ====================
+class AnalyticsRecord(Diagnosis):
+    """Analytics history entry: a Diagnosis with an id and a creation time.
+
+    Only the measured inputs, the score and the diagnostic codes are kept;
+    repeated strings are interned and texts are rendered on display.
+    """
+    __slots__ = ('id', 'created')
+
+    def __init__(self, record_id, created, diagnosis, lat=None, lon=None):
+        for name in Diagnosis.__slots__:
+            setattr(self, name, getattr(diagnosis, name))
+        self.id = record_id
+        self.created = created
+        # analyze_network rounds coordinates for its cache; keep the measured ones
+        if lat is not None:
+            self.lat, self.lon = lat, lon
+
+    def matches(self, operator=None, wilaya=None, issue=None, since=None, until=None):
+        """Whether the record passes the analytics filters (same semantics as ColumnarAnalyticsStore.mask)"""
+        return ((operator is None or self.operator == operator) and (wilaya is None or self.wilaya == wilaya)
+                and (issue is None or self.issue == issue) and (since is None or self.created >= since)
+                and (until is None or self.created < until))
+
+    def to_row(self):
+        """Compact JSON/marshal-safe form used by the history journal"""
+        return [self.id, self.created, *self.to_codes()]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row[0], row[1], Diagnosis.from_codes(row[2:]))
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.created).isoformat()
+
+    @property
+    def date(self):
+        return datetime.fromtimestamp(self.created).strftime("%Y-%m-%d")
+
+    @property
+    def time(self):
+        return datetime.fromtimestamp(self.created).strftime("%H:%M:%S")
+
+    def to_dict(self):
+        """Expanded form, as used by the analytics page scripts"""
+        return {
+            'id': self.id,
+            'timestamp': self.timestamp,
+            'date': self.date,
+            'time': self.time,
+            'lat': self.lat,
+            'lon': self.lon,
+            'rsrp': self.rsrp,
+            'sinr': self.sinr,
+            'network_type': self.network_type,
+            'operator': self.operator,
+            'place': self.place,
+            'wilaya': self.wilaya,
+            'city': self.city,
+            'speed_data': self.speed_data,
+            'network_score': self.network_score,
+            'score_breakdown': self.score_breakdown,
+            'issue_type': self.issue_type,
+            'summary': self.summary,
+            'recommendations': self.recommendations,
+            'short_recommendation': self.short_recommendation
+        }
+
+# ==================== COLUMNAR ANALYTICS STORE ====================
+class Column:
+    """Growable typed array; view() is a zero-copy NumPy slice of the filled rows.
+
+    The array is allocated on first use, so building the empty indexes at
+    import time does not import NumPy.
+    """
+    def __init__(self, dtype, capacity=1024):
+        self.dtype = dtype
+        self._capacity = capacity
+        self._data = None
+        self.size = 0
+
+    def _grow(self):
+        import numpy as np
+        if self._data is None:
+            self._data = np.empty(self._capacity, dtype=self.dtype)
+            return
+        grown = np.empty(len(self._data) * 2, dtype=self.dtype)
+        grown[:self.size] = self._data[:self.size]
+        self._data = grown
+
+    def append(self, value):
+        if self._data is None or self.size == len(self._data):
+            self._grow()
+        self._data[self.size] = value
+        self.size += 1
+
+    def view(self):
+        if self._data is None:
+            self._grow()
+        return self._data[:self.size]
+
+    def __setitem__(self, row, value):
+        self._data[row] = value
+
+    def replace(self, values):
+        import numpy as np
+        self._data = np.array(values, dtype=self.dtype)
+        self.size = len(self._data)
+
+class DictColumn(Column):
+    """Dictionary-encoded string column: rows hold int32 codes into ``values``"""
+    def __init__(self, capacity=1024):
+        super().__init__('int32', capacity)
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        """Code of value, or -1 when it never occurred"""
+        return self._codes.get(value, -1)
+
+    def append(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        super().append(code)
+
+class ColumnarAnalyticsStore:
+    """Column-oriented mirror of analytics_history for vectorised filters and group-bys.
+
+    Rows are appended in insertion order; deletes only clear the ``alive`` flag
+    and the dead rows are compacted away once they outnumber the live ones.
+    """
+    NUMERIC = {'timestamp': 'float64', 'lat': 'float64', 'lon': 'float64', 'rsrp': 'float32',
+               'sinr': 'float32', 'score': 'float64', 'download': 'float32'}
+    ENCODED = ('operator', 'wilaya')
+    METRICS = ('score', 'rsrp', 'sinr', 'download')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.columns = {name: Column(dtype) for name, dtype in self.NUMERIC.items()}
+        self.columns.update({name: DictColumn() for name in self.ENCODED})
+        self.columns['issue'] = Column('int8')
+        self.columns['alive'] = Column('bool')
+        self.ids = []
+        self._rows = {}
+        self.live = 0
+
+    def add(self, record):
+        # Numbers are converted before any column grows, so a bad value cannot misalign the columns
+        values = {
+            'timestamp': record.created, 'lat': record.lat, 'lon': record.lon,
+            'rsrp': float(record.rsrp), 'sinr': float(record.sinr), 'score': float(record.network_score),
+            'download': math.nan if record.download is None else float(record.download),
+            'operator': record.operator, 'wilaya': record.wilaya, 'issue': int(record.issue), 'alive': True,
+        }
+        for name, column in self.columns.items():
+            column.append(values[name])
+        self._rows[record.id] = len(self.ids)
+        self.ids.append(record.id)
+        self.live += 1
+
+    def remove(self, record):
+        row = self._rows.pop(record.id, None)
+        if row is None:
+            return
+        self.columns['alive'][row] = False
+        self.live -= 1
+        if len(self.ids) - self.live > max(self.live, 1024):
+            self._compact()
+
+    def _compact(self):
+        keep = self.columns['alive'].view().copy()
+        for column in self.columns.values():
+            column.replace(column.view()[keep])
+        self.ids = [record_id for record_id, alive in zip(self.ids, keep) if alive]
+        self._rows = {record_id: row for row, record_id in enumerate(self.ids)}
+
+    def view(self, name):
+        return self.columns[name].view()
+
+    def mask(self, operator=None, wilaya=None, issue=None, since=None, until=None):
+        """Boolean row mask of live records matching every given filter"""
+        mask = self.view('alive').copy()
+        if operator is not None:
+            mask &= self.view('operator') == self.columns['operator'].code(operator)
+        if wilaya is not None:
+            mask &= self.view('wilaya') == self.columns['wilaya'].code(wilaya)
+        if issue is not None:
+            mask &= self.view('issue') == int(issue)
+        if since is not None:
+            mask &= self.view('timestamp') >= since
+        if until is not None:
+            mask &= self.view('timestamp') < until
+        return mask
+
+    def _labels(self, by):
+        if by == 'issue':
+            return [ISSUE_TYPES[code]['type'] for code in IssueType]
+        return self.columns[by].values
+
+    def group_counts(self, by, mask):
+        """Row count per value of an encoded column (or 'issue')"""
+        import numpy as np
+        labels = self._labels(by)
+        counts = np.bincount(self.view(by)[mask], minlength=len(labels))
+        return {label: int(count) for label, count in zip(labels, counts) if count}
+
+    def most_common(self, by, mask):
+        """Most frequent value; ties go to the value seen most recently, like a newest-first scan"""
+        import numpy as np
+        labels = self._labels(by)
+        codes = self.view(by)[mask]
+        if not len(codes):
+            return None
+        counts = np.bincount(codes, minlength=len(labels))
+        tied = np.flatnonzero(counts == counts.max())
+        if len(tied) > 1:
+            last_seen = {code: len(codes) - 1 - np.flatnonzero(codes[::-1] == code)[0] for code in tied}
+            return labels[max(tied, key=last_seen.get)]
+        return labels[tied[0]]
+
+    def group_stats(self, by, mask):
+        """Count and mean of each metric per value of an encoded column (or 'issue')"""
+        import numpy as np
+        labels = self._labels(by)
+        codes = self.view(by)[mask]
+        counts = np.bincount(codes, minlength=len(labels))
+        groups = {label: {'count': int(count)} for label, count in zip(labels, counts) if count}
+        for metric in self.METRICS:
+            values = self.view(metric)[mask]
+            present = ~np.isnan(values)
+            sums = np.bincount(codes[present], weights=values[present], minlength=len(labels))
+            seen = np.bincount(codes[present], minlength=len(labels))
+            for code, label in enumerate(labels):
+                if counts[code]:
+                    groups[label][f'mean_{metric}'] = round(float(sums[code] / seen[code]), 2) if seen[code] else None
+        return groups
+
+    def mean(self, metric, mask):
+        import numpy as np
+        values = self.view(metric)[mask]
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
+
+analytics_columns = ColumnarAnalyticsStore()
+
+# ==================== TREND ROLLUPS ====================
+class RollupIndex:
+    """Hour/day/week buckets of count and metric sums, per operator, per wilaya and overall.
+
+    Buckets are updated on every insert and delete, so trend charts read a
+    handful of pre-aggregated buckets instead of rescanning the history.
+    """
+    GRANULARITIES = ('hour', 'day', 'week')
+    DIMENSIONS = ('all', 'operator', 'wilaya')
+    # Per-bucket accumulator slots
+    COUNT, SCORE, RSRP, SINR, DOWNLOAD, DOWNLOAD_COUNT = range(6)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # granularity -> (dimension, value) -> bucket start (ISO) -> accumulator
+        self.buckets = {granularity: {} for granularity in self.GRANULARITIES}
+
+    @staticmethod
+    def bucket_start(created, granularity):
+        moment = datetime.fromtimestamp(created).replace(minute=0, second=0, microsecond=0)
+        if granularity != 'hour':
+            moment = moment.replace(hour=0)
+        if granularity == 'week':
+            moment -= timedelta(days=moment.weekday())
+        return moment.isoformat()
+
+    def _apply(self, record, sign):
+        has_download = record.download is not None
+        # Converted up front: a value too large for a float fails before any bucket changes
+        delta = (sign, sign * float(record.network_score), sign * float(record.rsrp), sign * float(record.sinr),
+                 sign * float(record.download) if has_download else 0, sign if has_download else 0)
+        for granularity, series in self.buckets.items():
+            start = self.bucket_start(record.created, granularity)
+            for key in (('all', 'all'), ('operator', record.operator), ('wilaya', record.wilaya)):
+                buckets = series.setdefault(key, {})
+                accumulator = buckets.setdefault(start, [0, 0.0, 0.0, 0.0, 0.0, 0])
+                for slot, value in enumerate(delta):
+                    accumulator[slot] += value
+                if accumulator[self.COUNT] <= 0:
+                    del buckets[start]
+
+    def add(self, record):
+        self._apply(record, 1)
+
+    def remove(self, record):
+        self._apply(record, -1)
+
+    def series(self, granularity, by='all', since=None):
+        """{value: [bucket, ...]} ordered by bucket start, each with count and means"""
+        first = self.bucket_start(since, granularity) if since is not None else None
+        result = {}
+        for (dimension, value), buckets in self.buckets[granularity].items():
+            if dimension != by:
+                continue
+            points = []
+            for start in sorted(buckets):
+                if first and start < first:
+                    continue
+                acc = buckets[start]
+                count = acc[self.COUNT]
+                points.append({
+                    'bucket': start,
+                    'count': count,
+                    'mean_score': round(acc[self.SCORE] / count, 1),
+                    'mean_rsrp': round(acc[self.RSRP] / count, 1),
+                    'mean_sinr': round(acc[self.SINR] / count, 1),
+                    'mean_download': round(acc[self.DOWNLOAD] / acc[self.DOWNLOAD_COUNT], 2)
+                                     if acc[self.DOWNLOAD_COUNT] else None,
+                })
+            if points:
+                result[value] = points
+        return result
+
+analytics_rollups = RollupIndex()
+
+# ==================== PERCENTILE SKETCHES ====================
+class KLLSketch:
+    """KLL streaming quantile sketch (Karnin, Lang & Liberty 2016).
+
+    Items enter level 0; a full level is sorted and every other item is promoted
+    to the next level with twice the weight. Memory stays around 3k items
+    whatever the stream length, and two sketches merge level by level.
+    """
+    def __init__(self, k=200, c=2 / 3):
+        self.k = k
+        self.c = c
+        self.levels = []
+        self.size = 0
+        self.max_size = 0
+        self.count = 0
+        self._grow()
+
+    def _grow(self):
+        self.levels.append([])
+        self.max_size = sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _compress(self):
+        for level, items in enumerate(self.levels):
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self._grow()
+            items.sort()
+            odd = len(items) % 2
+            self.levels[level + 1].extend(items[odd + random.getrandbits(1)::2])
+            del items[odd:]
+            self.size = sum(len(items) for items in self.levels)
+            if self.size < self.max_size:
+                break
+
+    def update(self, value):
+        self.levels[0].append(value)
+        self.size += 1
+        self.count += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.size = sum(len(items) for items in self.levels)
+        while self.size >= self.max_size:
+            self._compress()
+        return self
+
+    def quantiles(self, fractions):
+        """Approximate values at the given rank fractions (0..1), None when empty"""
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        if not weighted:
+            return [None] * len(fractions)
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            target = fraction * total
+            cumulative = 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    break
+            results.append(value)
+        return results
+
+class PercentileIndex:
+    """KLL sketches of RSRP, SINR, download and ping per operator and per wilaya.
+
+    Sketches summarise the stream of saved measurements: deletes are not
+    subtracted (a sketch cannot forget items), clearing the history resets them.
+    """
+    DIMENSIONS = ('operator', 'wilaya')
+    METRICS = ('rsrp', 'sinr', 'download', 'ping')
+
+    def __init__(self, k=200):
+        self.k = k
+        self.clear()
+
+    def clear(self):
+        # (dimension, value) -> metric -> KLLSketch
+        self.sketches = {}
+
+    def add(self, record):
+        for dimension in self.DIMENSIONS:
+            sketches = self.sketches.get((dimension, getattr(record, dimension)))
+            if sketches is None:
+                sketches = self.sketches[(dimension, getattr(record, dimension))] = \
+                    {metric: KLLSketch(self.k) for metric in self.METRICS}
+            for metric in self.METRICS:
+                value = getattr(record, metric)
+                if value is not None:
+                    sketches[metric].update(value)
+
+    def remove(self, record):
+        pass
+
+    def groups(self, by):
+        """metric sketches per value of ``by``; 'all' merges the per-operator sketches"""
+        if by == 'all':
+            merged = {metric: KLLSketch(self.k) for metric in self.METRICS}
+            for (dimension, value), sketches in self.sketches.items():
+                if dimension == 'operator':
+                    for metric, sketch in sketches.items():
+                        merged[metric].merge(sketch)
+            return {'all': merged}
+        return {value: sketches for (dimension, value), sketches in self.sketches.items() if dimension == by}
+
+    def percentiles(self, by, percents=(5, 50, 95)):
+        result = {}
+        for value, sketches in self.groups(by).items():
+            result[value] = {}
+            for metric, sketch in sketches.items():
+                points = sketch.quantiles([p / 100 for p in percents])
+                result[value][metric] = {'count': sketch.count,
+                                         **{f'p{p:g}': point for p, point in zip(percents, points)}}
+        return result
+
+analytics_percentiles = PercentileIndex()
+
+# ==================== COVERAGE HEATMAP TILES ====================
+def encode_png(rgba):
+    """Encode an (height, width, 4) uint8 array as a PNG"""
+    height, width, _ = rgba.shape
+    raw = b''.join(b'\x00' + rgba[row].tobytes() for row in range(height))
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+# RSRP colour ramp (dBm -> RGB), from the classify_rsrp bands
+RSRP_RAMP = ((-120, (220, 38, 38)), (-105, (249, 115, 22)), (-95, (245, 158, 11)), (-80, (16, 185, 129)))
+
+def rsrp_overlay(rsrp, scale=1, alpha=170):
+    """RGBA image of a 2-D RSRP grid (NaN = transparent), each value drawn as a scale x scale block"""
+    import numpy as np
+    stops = np.array([stop for stop, _ in RSRP_RAMP], dtype=np.float64)
+    colours = np.array([colour for _, colour in RSRP_RAMP], dtype=np.float64)
+    image = np.zeros(rsrp.shape + (4,), dtype=np.uint8)
+    present = ~np.isnan(rsrp)
+    for channel in range(3):
+        image[..., channel][present] = np.interp(rsrp[present], stops, colours[:, channel])
+    image[..., 3][present] = alpha
+    return image.repeat(scale, axis=0).repeat(scale, axis=1)
+
+class TileIndex:
+    """Slippy-map (Web Mercator z/x/y) aggregation of RSRP and SINR.
+
+    Every tile of the zoom levels in ZOOMS is split into CELLS x CELLS cells
+    holding a count and RSRP/SINR sums, overall and per operator. Cells are
+    updated on insert and delete; rendered JSON/PNG tiles are kept in an LRU
+    cache of ``cache_size`` against the tile version so unchanged tiles are
+    served without recomputation. Empty tiles are cheap to render and are not
+    cached, so arbitrary tile requests cannot grow the cache.
+    """
+    ZOOMS = (8, 10, 12, 14)
+    CELLS = 16
+    TILE_SIZE = 256
+
+    def __init__(self, cache_size=TILE_CACHE_SIZE):
+        self._rendered = LRUCache(cache_size)
+        self.clear()
+
+    def clear(self):
+        # (operator or 'all', z, x, y) -> {'version': int, 'cells': {(cx, cy): [count, rsrp_sum, sinr_sum]}}
+        self.tiles = {}
+        self.operators = set()
+        self._rendered.clear()
+
+    def has_layer(self, layer):
+        """Whether ``layer`` is 'all' or an operator with measurements"""
+        return layer == 'all' or layer in self.operators
+
+    @classmethod
+    def locate(cls, lat, lon, zoom):
+        """Tile x/y and cell cx/cy containing a point"""
+        n = 1 << zoom
+        lat = max(min(lat, 85.0511), -85.0511)
+        xf = (lon + 180.0) / 360.0 * n
+        yf = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+        x, y = min(int(xf), n - 1), min(int(yf), n - 1)
+        return x, y, min(int((xf - x) * cls.CELLS), cls.CELLS - 1), min(int((yf - y) * cls.CELLS), cls.CELLS - 1)
+
+    @classmethod
+    def cell_center(cls, zoom, x, y, cx, cy):
+        n = 1 << zoom
+        xf = x + (cx + 0.5) / cls.CELLS
+        yf = y + (cy + 0.5) / cls.CELLS
+        lon = xf / n * 360.0 - 180.0
+        lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yf / n))))
+        return lat, lon
+
+    def _apply(self, record, sign):
+        # Converted up front: a value too large for a float fails before any cell changes
+        rsrp, sinr = sign * float(record.rsrp), sign * float(record.sinr)
+        for zoom in self.ZOOMS:
+            x, y, cx, cy = self.locate(record.lat, record.lon, zoom)
+            for layer in ('all', record.operator):
+                tile = self.tiles.setdefault((layer, zoom, x, y), {'version': 0, 'cells': {}})
+                cell = tile['cells'].setdefault((cx, cy), [0, 0.0, 0.0])
+                cell[0] += sign
+                cell[1] += rsrp
+                cell[2] += sinr
+                if cell[0] <= 0:
+                    del tile['cells'][(cx, cy)]
+                tile['version'] += 1
+
+    def add(self, record):
+        self.operators.add(record.operator)
+        self._apply(record, 1)
+
+    def remove(self, record):
+        self._apply(record, -1)
+
+    def version(self, layer, zoom, x, y):
+        tile = self.tiles.get((layer, zoom, x, y))
+        return tile['version'] if tile else 0
+
+    def _cached(self, kind, layer, zoom, x, y, render):
+        key = (kind, layer, zoom, x, y)
+        version = self.version(layer, zoom, x, y)
+        cached = self._rendered.get(key)
+        if cached and cached[0] == version:
+            return version, cached[1]
+        tile = self.tiles.get((layer, zoom, x, y))
+        cells = dict(tile['cells']) if tile else {}
+        body = render(zoom, x, y, cells)
+        if cells:
+            self._rendered.put(key, (version, body))
+        return version, body
+
+    def tile_json(self, layer, zoom, x, y):
+        return self._cached('json', layer, zoom, x, y, self._render_json)
+
+    def tile_png(self, layer, zoom, x, y):
+        return self._cached('png', layer, zoom, x, y, self._render_png)
+
+    def _render_json(self, zoom, x, y, cells):
+        rendered = []
+        for (cx, cy), (count, rsrp_sum, sinr_sum) in sorted(cells.items()):
+            lat, lon = self.cell_center(zoom, x, y, cx, cy)
+            rendered.append({'cx': cx, 'cy': cy, 'lat': round(lat, 6), 'lon': round(lon, 6), 'count': count,
+                             'mean_rsrp': round(rsrp_sum / count, 1), 'mean_sinr': round(sinr_sum / count, 1)})
+        return json.dumps({'z': zoom, 'x': x, 'y': y, 'cells_per_side': self.CELLS, 'cells': rendered}).encode()
+
+    def _render_png(self, zoom, x, y, cells):
+        import numpy as np
+        rsrp = np.full((self.CELLS, self.CELLS), np.nan)
+        for (cx, cy), (count, rsrp_sum, _) in cells.items():
+            rsrp[cy, cx] = rsrp_sum / count
+        return encode_png(rsrp_overlay(rsrp, self.TILE_SIZE // self.CELLS))
+
+analytics_tiles = TileIndex()
+
+# ==================== COVERAGE INTERPOLATION ====================
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LON = 111.32
+
+def local_distances_km(lats, lons, sample_lats, sample_lons, ref_lat):
+    """(cells x samples) equirectangular distance matrix around ref_lat, accurate at city scale"""
+    import numpy as np
+    scale = math.cos(math.radians(ref_lat)) * KM_PER_DEGREE_LON
+    dy = (lats[:, None] - sample_lats[None, :]) * KM_PER_DEGREE_LAT
+    dx = (lons[:, None] - sample_lons[None, :]) * scale
+    return np.hypot(dx, dy)
+
+def path_loss_rsrp(distance_km):
+    """Log-distance prior: -75 dBm at 1 km with exponent 3.5, clipped to the RSRP range"""
+    import numpy as np
+    return np.clip(-75.0 - 35.0 * np.log10(np.maximum(distance_km, 0.01)), -140.0, -44.0)
+
+class CoverageInterpolator:
+    """Predicted RSRP rasters from inverse-distance weighting over the nearest K samples.
+
+    Samples sit in a uniform lat/lon grid index per operator (and 'all'); the
+    raster cells falling in one grid cell are evaluated together, as one NumPy
+    batch, against the samples of the surrounding grid cells. Far from any
+    sample the estimate blends into a path-loss prediction from the nearest
+    tower in BTS_LIST. Rasters are cached per region (LRU); a new or deleted
+    sample only recomputes the raster cells whose K nearest neighbours it
+    can change.
+    """
+    GRID_DEGREES = 0.01
+    SEARCH_KM = 3.0
+    BLEND_KM = (1.0, 4.0)  # nearest sample distance where the tower prior starts / fully takes over
+    MAX_SIZE = 128
+    CACHE_REGIONS = 32
+
+    def __init__(self, k=8, power=2.0):
+        self.k = k
+        self.power = power
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        # layer -> (grid row, grid col) -> {record id: (lat, lon, rsrp)}
+        self.grid = {}
+        self.cache = OrderedDict()
+
+    def _grid_key(self, lat, lon):
+        return int(math.floor(lat / self.GRID_DEGREES)), int(math.floor(lon / self.GRID_DEGREES))
+
+    def add(self, record):
+        point = (record.lat, record.lon, float(record.rsrp))
+        for layer in ('all', record.operator):
+            self.grid.setdefault(layer, {}).setdefault(self._grid_key(record.lat, record.lon), {})[record.id] = point
+        self._refresh_near(record)
+
+    def remove(self, record):
+        for layer in ('all', record.operator):
+            cell = self.grid.get(layer, {}).get(self._grid_key(record.lat, record.lon))
+            if cell is not None:
+                cell.pop(record.id, None)
+        self._refresh_near(record)
+
+    def _gather(self, grid, row, col, ring):
+        """Sample arrays from the grid cells within ``ring`` cells of (row, col)"""
+        import numpy as np
+        points = []
+        for r in range(row - ring, row + ring + 1):
+            for c in range(col - ring, col + ring + 1):
+                cell = grid.get((r, c))
+                if cell:
+                    points.extend(cell.values())
+        if not points:
+            return None
+        return np.array(points).T
+
+    def _tower_prior(self, lats, lons, operator, ref_lat):
+        import numpy as np
+        towers = [b for b in BTS_LIST if b["operator"] == operator] or BTS_LIST
+        distances = local_distances_km(lats, lons, np.array([b["lat"] for b in towers]),
+                                       np.array([b["lon"] for b in towers]), ref_lat)
+        return path_loss_rsrp(distances.min(axis=1))
+
+    def _predict(self, lats, lons, layer, ref_lat):
+        """Predictions and K-th neighbour distance (km) for arrays of cell centres.
+
+        Cells are processed per grid cell: the search ring grows until the K-th
+        neighbour of every cell lies inside it, which makes the nearest-K exact
+        up to SEARCH_KM.
+        """
+        import numpy as np
+        grid = self.grid.get(layer, {})
+        predictions = self._tower_prior(lats, lons, None if layer == 'all' else layer, ref_lat)
+        kth = np.full(len(lats), np.inf)
+        cell_km = self.GRID_DEGREES * min(KM_PER_DEGREE_LAT, KM_PER_DEGREE_LON * math.cos(math.radians(ref_lat)))
+        max_ring = max(1, math.ceil(self.SEARCH_KM / cell_km))
+        low, high = self.BLEND_KM
+
+        rows = np.floor(lats / self.GRID_DEGREES).astype(np.int64)
+        cols = np.floor(lons / self.GRID_DEGREES).astype(np.int64)
+        keys, group_of = np.unique(np.stack([rows, cols], axis=1), axis=0, return_inverse=True)
+        order = np.argsort(group_of.ravel(), kind='stable')
+        bounds = np.searchsorted(group_of.ravel()[order], np.arange(len(keys) + 1))
+        for group, (row, col) in enumerate(keys):
+            cells = order[bounds[group]:bounds[group + 1]]
+            for ring in range(1, max_ring + 1):
+                samples = self._gather(grid, row, col, ring)
+                if samples is None or (len(samples[0]) < self.k and ring < max_ring):
+                    continue
+                k = min(self.k, len(samples[0]))
+                distances = local_distances_km(lats[cells], lons[cells], samples[0], samples[1], ref_lat)
+                nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                near_d = np.take_along_axis(distances, nearest, axis=1)
+                if near_d.max() <= ring * cell_km or ring == max_ring:
+                    break
+            else:
+                continue
+
+            weights = 1.0 / np.maximum(near_d, 1e-3) ** self.power
+            idw = (weights * samples[2][nearest]).sum(axis=1) / weights.sum(axis=1)
+            blend = np.clip((near_d.min(axis=1) - low) / (high - low), 0.0, 1.0)
+            predictions[cells] = (1 - blend) * idw + blend * predictions[cells]
+            if k == self.k:
+                kth[cells] = near_d.max(axis=1)
+        return predictions, kth
+
+    def raster(self, south, west, north, east, size=64, operator=None):
+        """Cached (size x size) RSRP prediction, row 0 at the north edge"""
+        import numpy as np
+        layer = operator or 'all'
+        size = max(2, min(int(size), self.MAX_SIZE))
+        key = (layer, round(south, 4), round(west, 4), round(north, 4), round(east, 4), size)
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                return entry['values'].reshape(size, size)
+
+        lat_step = (north - south) / size
+        lon_step = (east - west) / size
+        cell_lats = np.repeat(north - (np.arange(size) + 0.5) * lat_step, size)
+        cell_lons = np.tile(west + (np.arange(size) + 0.5) * lon_step, size)
+        values, kth = self._predict(cell_lats, cell_lons, layer, (south + north) / 2)
+        entry = {'layer': layer, 'bounds': (south, west, north, east), 'lats': cell_lats, 'lons': cell_lons,
+                 'values': values, 'kth': kth}
+        with self._lock:
+            self.cache[key] = entry
+            while len(self.cache) > self.CACHE_REGIONS:
+                self.cache.popitem(last=False)
+        return values.reshape(size, size)
+
+    def _refresh_near(self, record):
+        """Recompute, in cached rasters, only the cells whose nearest-K set the sample can change"""
+        import numpy as np
+        with self._lock:
+            entries = [entry for entry in self.cache.values() if entry['layer'] in ('all', record.operator)]
+        for entry in entries:
+            south, west, north, east = entry['bounds']
+            margin = 2 * self.SEARCH_KM / KM_PER_DEGREE_LAT
+            if not (south - margin <= record.lat <= north + margin and west - margin <= record.lon <= east + margin):
+                continue
+            ref_lat = (south + north) / 2
+            distances = local_distances_km(entry['lats'], entry['lons'],
+                                           np.array([record.lat]), np.array([record.lon]), ref_lat)[:, 0]
+            affected = np.flatnonzero(distances <= entry['kth'])
+            if not len(affected):
+                continue
+            values, kth = self._predict(entry['lats'][affected], entry['lons'][affected], entry['layer'], ref_lat)
+            values_copy = entry['values'].copy()
+            kth_copy = entry['kth'].copy()
+            values_copy[affected] = values
+            kth_copy[affected] = kth
+            entry['values'], entry['kth'] = values_copy, kth_copy
+
+coverage_interpolator = CoverageInterpolator()
+
+# ==================== DEAD-ZONE CLUSTERING ====================
+def convex_hull(points):
+    """Andrew's monotone chain; returns the hull of (lat, lon) points counter-clockwise"""
+    points = sorted(set(points))
+    if len(points) <= 2:
+        return points
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+    lower, upper = [], []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+class DeadZoneIndex:
+    """Grid-based DBSCAN over measurements with coverage or interference issues.
+
+    Poor measurements of each operator go into grid cells of EPS_DEGREES; a
+    cell is a core cell when its 3x3 neighbourhood holds at least MIN_POINTS of
+    them, and touching core cells are joined with union-find as records
+    arrive. Points in cells next to a core cell are border points of its zone.
+    Deletes mark the operator for a rebuild from its cells (never from the
+    raw history); the ranked zone list is cached until the next change.
+    """
+    EPS_DEGREES = 0.005
+    MIN_POINTS = 5
+    ISSUES = (IssueType.COVERAGE, IssueType.INTERFERENCE)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # operator -> {'cells', 'density', 'parent', 'stale', 'zones'}
+        self.operators = {}
+
+    def _state(self, operator):
+        state = self.operators.get(operator)
+        if state is None:
+            state = self.operators[operator] = {'cells': {}, 'density': Counter(), 'parent': {},
+                                                'stale': False, 'zones': None}
+        return state
+
+    def _key(self, lat, lon):
+        return int(math.floor(lat / self.EPS_DEGREES)), int(math.floor(lon / self.EPS_DEGREES))
+
+    @staticmethod
+    def _neighbours(key):
+        row, col = key
+        return [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+    def _is_core(self, state, key):
+        return bool(state['cells'].get(key)) and state['density'][key] >= self.MIN_POINTS
+
+    def _find(self, parent, key):
+        root = key
+        while parent[root] != root:
+            root = parent[root]
+        while parent[key] != root:
+            parent[key], key = root, parent[key]
+        return root
+
+    def _link(self, state, key):
+        """Join a core cell with the core cells around it"""
+        parent = state['parent']
+        parent.setdefault(key, key)
+        for other in self._neighbours(key):
+            if other != key and self._is_core(state, other):
+                parent.setdefault(other, other)
+                a, b = self._find(parent, key), self._find(parent, other)
+                if a != b:
+                    parent[b] = a
+
+    def add(self, record):
+        if record.issue not in self.ISSUES:
+            return
+        state = self._state(record.operator)
+        key = self._key(record.lat, record.lon)
+        state['cells'].setdefault(key, {})[record.id] = (record.lat, record.lon, record.rsrp, record.sinr,
+                                                         record.issue)
+        for neighbour in self._neighbours(key):
+            state['density'][neighbour] += 1
+        if not state['stale']:
+            for neighbour in self._neighbours(key):
+                if self._is_core(state, neighbour):
+                    self._link(state, neighbour)
+        state['zones'] = None
+
+    def add_many(self, records):
+        """Add a batch; its zones are linked once, on the next query"""
+        for record in records:
+            if record.issue in self.ISSUES:
+                self._state(record.operator)['stale'] = True
+                self.add(record)
+
+    def remove(self, record):
+        if record.issue not in self.ISSUES or record.operator not in self.operators:
+            return
+        state = self.operators[record.operator]
+        key = self._key(record.lat, record.lon)
+        cell = state['cells'].get(key)
+        if cell is None or cell.pop(record.id, None) is None:
+            return
+        if not cell:
+            del state['cells'][key]
+        for neighbour in self._neighbours(key):
+            state['density'][neighbour] -= 1
+            if state['density'][neighbour] <= 0:
+                del state['density'][neighbour]
+        state['stale'] = True
+        state['zones'] = None
+
+    def _rebuild(self, state):
+        state['parent'] = {}
+        for key in state['cells']:
+            if self._is_core(state, key):
+                self._link(state, key)
+        state['stale'] = False
+
+    @staticmethod
+    def severity(point):
+        """Weight of one poor measurement: how far it is past the coverage / interference threshold"""
+        lat, lon, rsrp, sinr, issue = point
+        if issue == IssueType.COVERAGE:
+            return 1 + max(0, -105 - rsrp) / 10
+        return 1 + max(0, 5 - sinr) / 5
+
+    def _zones(self, operator, state):
+        if state['stale']:
+            self._rebuild(state)
+        parent = state['parent']
+        members = {}
+        for key in parent:
+            members.setdefault(self._find(parent, key), set()).add(key)
+        # Border cells: non-core cells touching a core cell join its zone
+        for root, cells in members.items():
+            for key in list(cells):
+                cells.update(n for n in self._neighbours(key) if n in state['cells'])
+
+        zones = []
+        for cells in members.values():
+            points = [point for key in cells for point in state['cells'].get(key, {}).values()]
+            if len(points) < self.MIN_POINTS:
+                continue
+            issues = Counter(point[4] for point in points)
+            zones.append({
+                'operator': operator,
+                'count': len(points),
+                'score': round(sum(self.severity(point) for point in points), 1),
+                'issue': ISSUE_TYPES[issues.most_common(1)[0][0]]['type'],
+                'mean_rsrp': round(sum(point[2] for point in points) / len(points), 1),
+                'mean_sinr': round(sum(point[3] for point in points) / len(points), 1),
+                'centroid': [round(sum(point[0] for point in points) / len(points), 6),
+                             round(sum(point[1] for point in points) / len(points), 6)],
+                'polygon': [[round(lat, 6), round(lon, 6)] for lat, lon in
+                            convex_hull([(point[0], point[1]) for point in points])],
+            })
+        zones.sort(key=lambda zone: (zone['score'], zone['count'], zone['centroid']), reverse=True)
+        return zones
+
+    def zones(self, operator=None, limit=20):
+        """Dead zones ranked by total severity, for one operator or all of them"""
+        result = []
+        for name, state in list(self.operators.items()):
+            if operator is not None and name != operator:
+                continue
+            if state['zones'] is None:
+                state['zones'] = self._zones(name, state)
+            result.extend(state['zones'])
+        result.sort(key=lambda zone: (zone['score'], zone['count'], zone['centroid']), reverse=True)
+        return [dict(zone, rank=rank) for rank, zone in enumerate(result[:limit], 1)]
+
+dead_zones = DeadZoneIndex()
+
+# ==================== TOWER LOAD PROFILES ====================
+class TowerLoadIndex:
+    """Per-tower, per-hour-of-day load statistics from the stored measurements.
+
+    Each record is attributed to its nearest tower (nearest_bts). Sums are kept
+    per (tower, hour) and folded into a baseline table every REFRESH_EVERY
+    changes, so analyze_network judges congestion against the tower's own
+    usual throughput with a single dict lookup.
+    """
+    REFRESH_EVERY = 50
+    MIN_SAMPLES = 10
+    CONGESTION_RATIO = 0.5  # below half the tower's usual download at that hour
+    DEFAULT_THRESHOLD = 5   # Mbps, used until a tower has a baseline
+    # Accumulator slots
+    COUNT, SCORE, DOWNLOAD, DOWNLOAD_SQ, DOWNLOAD_COUNT = range(5)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # (tower, hour) -> accumulator
+        self.sums = {}
+        # (tower, hour) -> {'count', 'mean_download', 'std_download', 'mean_score'}
+        self.baselines = {}
+        self.version = 0
+        self._pending = 0
+
+    def _apply(self, record, sign):
+        key = (record.bts, datetime.fromtimestamp(record.created).hour)
+        accumulator = self.sums.setdefault(key, [0, 0.0, 0.0, 0.0, 0])
+        accumulator[self.COUNT] += sign
+        accumulator[self.SCORE] += sign * record.network_score
+        if record.download is not None:
+            accumulator[self.DOWNLOAD] += sign * record.download
+            accumulator[self.DOWNLOAD_SQ] += sign * record.download ** 2
+            accumulator[self.DOWNLOAD_COUNT] += sign
+        if accumulator[self.COUNT] <= 0:
+            del self.sums[key]
+
+    def _changed(self, count=1):
+        self._pending += count
+        if self._pending >= self.REFRESH_EVERY:
+            self.refresh()
+
+    def add(self, record):
+        self._apply(record, 1)
+        self._changed()
+
+    def add_many(self, records):
+        """Add a batch and fold it into the baselines once"""
+        for record in records:
+            self._apply(record, 1)
+        self._changed(len(records))
+
+    def remove(self, record):
+        self._apply(record, -1)
+        self._changed()
+
+    def refresh(self):
+        """Recompute the baseline table from the running sums"""
+        baselines = {}
+        for key, (count, score, download, download_sq, download_count) in list(self.sums.items()):
+            profile = {'count': count, 'mean_score': round(score / count, 1),
+                       'mean_download': None, 'std_download': None, 'download_samples': download_count}
+            if download_count:
+                mean = download / download_count
+                profile['mean_download'] = round(mean, 2)
+                profile['std_download'] = round(math.sqrt(max(download_sq / download_count - mean ** 2, 0)), 2)
+            baselines[key] = profile
+        self.baselines = baselines
+        self.version += 1
+        self._pending = 0
+
+    def congestion_threshold(self, tower, hour):
+        """Download (Mbps) under which a good-signal sample counts as congestion"""
+        profile = self.baselines.get((tower, hour))
+        if profile is None or profile['download_samples'] < self.MIN_SAMPLES:
+            return self.DEFAULT_THRESHOLD
+        return profile['mean_download'] * self.CONGESTION_RATIO
+
+    def profile(self, tower=None):
+        """{tower: {hour: baseline}} from the precomputed table"""
+        result = {}
+        for (name, hour), baseline in sorted(self.baselines.items()):
+            if tower is None or name == tower:
+                result.setdefault(name, {})[hour] = baseline
+        return result
+
+tower_load = TowerLoadIndex()
+
+# ==================== PEAK-HOUR PROFILES ====================
+DEFAULT_PEAK_HOURS = range(18, 24)
+
+class PeakHourIndex:
+    """Hour-of-week load profiles per operator and per (operator, wilaya).
+
+    Count, score and download sums are kept for each of the 168 hour-of-week
+    slots and folded into peak windows every REFRESH_EVERY changes. A slot is
+    a peak when its mean download (or score, without speed tests) falls more
+    than PEAK_DROP below the profile's overall mean; slots with too few
+    samples keep the default 18:00-23:00 rule. window() is a dict lookup.
+    """
+    REFRESH_EVERY = 50
+    MIN_SAMPLES = 200
+    MIN_SLOT_SAMPLES = 5
+    PEAK_DROP = 0.15
+    # Accumulator slots
+    COUNT, SCORE, DOWNLOAD, DOWNLOAD_COUNT = range(4)
+
+    def __init__(self):
+        self.default = self._windows({slot for slot in range(168) if slot % 24 in DEFAULT_PEAK_HOURS})
+        self.clear()
+
+    def clear(self):
+        # (operator, wilaya or None) -> 168 accumulators
+        self.sums = {}
+        # (operator, wilaya or None) -> {hour-of-week slot: (first hour, last hour) of its window}
+        self.windows = {}
+        self.version = 0
+        self._pending = 0
+
+    @staticmethod
+    def slot(when):
+        return when.weekday() * 24 + when.hour
+
+    @staticmethod
+    def _windows(peak_slots):
+        """Map each peak slot to its (first, last) hour, runs split at midnight"""
+        windows = {}
+        for day in range(7):
+            hour = 0
+            while hour < 24:
+                if day * 24 + hour not in peak_slots:
+                    hour += 1
+                    continue
+                end = hour
+                while end + 1 < 24 and day * 24 + end + 1 in peak_slots:
+                    end += 1
+                window = (hour, end)
+                for h in range(hour, end + 1):
+                    windows[day * 24 + h] = window
+                hour = end + 1
+        return windows
+
+    def _apply(self, record, sign):
+        slot = self.slot(datetime.fromtimestamp(record.created))
+        for key in ((record.operator, None), (record.operator, record.wilaya)):
+            slots = self.sums.get(key)
+            if slots is None:
+                slots = self.sums[key] = [[0, 0.0, 0.0, 0] for _ in range(168)]
+            accumulator = slots[slot]
+            accumulator[self.COUNT] += sign
+            accumulator[self.SCORE] += sign * record.network_score
+            if record.download is not None:
+                accumulator[self.DOWNLOAD] += sign * record.download
+                accumulator[self.DOWNLOAD_COUNT] += sign
+
+    def _changed(self, count=1):
+        self._pending += count
+        if self._pending >= self.REFRESH_EVERY:
+            self.refresh()
+
+    def add(self, record):
+        self._apply(record, 1)
+        self._changed()
+
+    def add_many(self, records):
+        """Add a batch and fold it into the peak windows once"""
+        for record in records:
+            self._apply(record, 1)
+        self._changed(len(records))
+
+    def remove(self, record):
+        self._apply(record, -1)
+        self._changed()
+
+    def _peak_slots(self, slots):
+        total = sum(acc[self.COUNT] for acc in slots)
+        if total < self.MIN_SAMPLES:
+            return None
+        downloads = sum(acc[self.DOWNLOAD_COUNT] for acc in slots)
+        use_download = downloads >= total / 2
+        value, count = (self.DOWNLOAD, self.DOWNLOAD_COUNT) if use_download else (self.SCORE, self.COUNT)
+        overall = sum(acc[value] for acc in slots) / max(sum(acc[count] for acc in slots), 1)
+        peaks = set()
+        for slot, acc in enumerate(slots):
+            if acc[count] >= self.MIN_SLOT_SAMPLES:
+                if acc[value] / acc[count] < overall * (1 - self.PEAK_DROP):
+                    peaks.add(slot)
+            elif slot % 24 in DEFAULT_PEAK_HOURS:
+                peaks.add(slot)
+        return peaks
+
+    def refresh(self):
+        """Recompute the peak windows from the running sums"""
+        windows = {}
+        for key, slots in list(self.sums.items()):
+            peaks = self._peak_slots(slots)
+            if peaks is not None:
+                windows[key] = self._windows(peaks)
+        self.windows = windows
+        self.version += 1
+        self._pending = 0
+
+    def window(self, operator, wilaya, when):
+        """(first hour, last hour) of the peak window containing ``when``, or None off-peak"""
+        windows = self.windows.get((operator, wilaya)) or self.windows.get((operator, None)) or self.default
+        return windows.get(self.slot(when))
+
+    def profile(self, operator, wilaya=None):
+        """Hour-of-week means and peak flags for the API"""
+        key = (operator, wilaya)
+        slots = self.sums.get(key, [[0, 0.0, 0.0, 0]] * 168)
+        windows = self.windows.get(key)
+        learned = windows is not None
+        windows = windows or self.windows.get((operator, None)) or self.default
+        return {
+            'operator': operator,
+            'wilaya': wilaya,
+            'learned': learned,
+            'slots': [{
+                'day': slot // 24,
+                'hour': slot % 24,
+                'count': acc[self.COUNT],
+                'mean_score': round(acc[self.SCORE] / acc[self.COUNT], 1) if acc[self.COUNT] else None,
+                'mean_download': round(acc[self.DOWNLOAD] / acc[self.DOWNLOAD_COUNT], 2)
+                                 if acc[self.DOWNLOAD_COUNT] else None,
+                'peak': slot in windows,
+            } for slot, acc in enumerate(slots)],
+        }
+
+peak_hours = PeakHourIndex()
+
+# Secondary structures kept in sync with analytics_history on every insert and delete.
+# analyze_network reads tower_load and peak_hours without locking: both swap in
+# freshly built tables, so a reader sees either the old or the new one.
+ANALYTICS_INDEXES = [analytics_columns, analytics_rollups, analytics_percentiles, analytics_tiles,
+                     coverage_interpolator, dead_zones, tower_load, peak_hours]
+
+analytics_history = AnalyticsStore(ANALYTICS_INDEXES)
+
+# ==================== DURABLE HISTORY LOG ====================
+class HistoryJournal:
+    """Write-ahead log of analytics history changes with periodic snapshots.
+
+    Every accepted insert, delete and clear is appended to history-<gen>.log
+    as one NDJSON line ``["+", row]``, ``["-", id]`` or ``["*"]``. A flusher
+    thread fsyncs the log once per commit window for all the writers that
+    joined it (group commit) and writers wait for that fsync before their
+    request returns. Every SNAPSHOT_EVERY entries the log is rotated and the
+    live records are written in the background to history-<gen>.snap (a
+    marshalled row list); older files are removed once it is durable.
+    Recovery memory-maps the newest snapshot and replays the logs after it in
+    batches, then builds each index once.
+    """
+    MAGIC = b'ISHSNAP1'
+    HEADER = struct.Struct('<8sQ')  # magic, payload length
+    REPLAY_BATCH = 5000  # records per store.add_many() during recovery
+
+    def __init__(self, directory, commit_interval=HISTORY_COMMIT_INTERVAL, snapshot_every=HISTORY_SNAPSHOT_EVERY):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self._cond = threading.Condition()
+        self._file = None
+        self.generation = 0
+        self._appended = self._durable = 0
+        self._since_snapshot = 0
+        self._snapshotting = False
+        self.entries = self.log_bytes = self.snapshot_bytes = self.fsyncs = self.snapshots = 0
+        self.recovery = None
+
+    def _path(self, generation, kind):
+        return os.path.join(self.directory, f"history-{generation:08d}.{kind}")
+
+    def _generations(self, kind):
+        suffix = '.' + kind
+        return sorted(int(name[8:-len(suffix)]) for name in os.listdir(self.directory)
+                      if name.startswith('history-') and name.endswith(suffix))
+
+    # ---- recovery ----
+    def recover(self, store):
+        """Rebuild ``store`` from disk, then journal its changes from now on"""
+        started = time.perf_counter()
+        snapshots = self._generations('snap')
+        self.generation = snapshots[-1] if snapshots else 0
+        snapshot_rows = log_entries = 0
+        # Records are loaded in batches and every index is built once at the end
+        store.defer_indexing()
+        try:
+            if snapshots:
+                rows = self._read_snapshot(self._path(self.generation, 'snap'))
+                for start in range(0, len(rows), self.REPLAY_BATCH):
+                    store.add_many([AnalyticsRecord.from_row(row) for row in rows[start:start + self.REPLAY_BATCH]])
+                snapshot_rows = len(rows)
+            for generation in self._generations('log'):
+                if generation >= self.generation:
+                    log_entries += self._replay(self._path(generation, 'log'), store)
+                    self.generation = generation
+        finally:
+            store.rebuild_indexes()
+        self._remove_before(self.generation)
+        self._file = open(self._path(self.generation, 'log'), 'ab')
+        self._since_snapshot = log_entries
+        threading.Thread(target=self._flusher, daemon=True).start()
+        store.journal = self
+        self.recovery = {'seconds': round(time.perf_counter() - started, 4), 'snapshot_rows': snapshot_rows,
+                         'log_entries': log_entries, 'records': len(store)}
+        return self.recovery
+
+    def _read_snapshot(self, path):
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, length = self.HEADER.unpack_from(mapped)
+            if magic != self.MAGIC:
+                raise ValueError(f"{path} is not a history snapshot")
+            with memoryview(mapped) as view:
+                return marshal.loads(view[self.HEADER.size:self.HEADER.size + length])
+
+    def _replay(self, path, store):
+        with open(path, 'rb') as f:
+            data = f.read()
+        entries = offset = 0
+        added = []  # consecutive inserts, stored as one batch
+        while offset < len(data):
+            end = data.find(b'\n', offset)
+            try:
+                if end < 0:
+                    raise ValueError("unterminated entry")
+                entry = json.loads(data[offset:end])
+            except ValueError:
+                # A write torn by a crash: drop it so new entries start on a clean line
+                app.logger.warning("history log %s: discarding %d bytes after offset %d",
+                                   path, len(data) - offset, offset)
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+                break
+            if entry[0] == '+':
+                added.append(AnalyticsRecord.from_row(entry[1]))
+            if added and (entry[0] != '+' or len(added) == self.REPLAY_BATCH):
+                store.add_many(added)
+                added = []
+            if entry[0] == '-':
+                store.remove(entry[1])
+            elif entry[0] == '*':
+                store.clear()
+            entries += 1
+            offset = end + 1
+        if added:
+            store.add_many(added)
+        return entries
+
+    def _remove_before(self, generation):
+        for kind in ('log', 'snap'):
+            for old in self._generations(kind):
+                if old < generation:
+                    os.remove(self._path(old, kind))
+
+    # ---- logging ----
+    def append(self, entry):
+        """Buffer one change; returns the ticket to wait() on for durability"""
+        line = json.dumps(entry, separators=(',', ':')).encode() + b'\n'
+        with self._cond:
+            self._file.write(line)
+            self._appended += 1
+            self._since_snapshot += 1
+            self.entries += 1
+            self.log_bytes += len(line)
+            self._cond.notify_all()
+            return self._appended
+
+    def wait(self, ticket):
+        with self._cond:
+            while self._durable < ticket:
+                self._cond.wait()
+
+    def _flusher(self):
+        while True:
+            with self._cond:
+                while self._durable == self._appended:
+                    self._cond.wait()
+            # Let concurrent writers join this commit
+            time.sleep(self.commit_interval)
+            with self._cond:
+                self._sync()
+
+    def _sync(self):
+        """Flush and fsync the current log (caller holds the condition)"""
+        if self._durable < self._appended:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+            self._durable = self._appended
+            self._cond.notify_all()
+
+    # ---- snapshots ----
+    def snapshot_due(self):
+        return self._since_snapshot >= self.snapshot_every and not self._snapshotting
+
+    def start_snapshot(self, records):
+        """Rotate the log and write ``records`` (oldest first) as the new base in the background.
+
+        Must be called under the store's write lock so that ``records`` is
+        exactly the state the new log generation starts from.
+        """
+        with self._cond:
+            self._sync()
+            self._file.close()
+            self.generation += 1
+            self._file = open(self._path(self.generation, 'log'), 'ab')
+            self._since_snapshot = 0
+            self._snapshotting = True
+        threading.Thread(target=self._write_snapshot, args=(self.generation, records), daemon=True).start()
+
+    def _write_snapshot(self, generation, records):
+        try:
+            payload = marshal.dumps([record.to_row() for record in records])
+            path = self._path(generation, 'snap')
+            with open(path + '.tmp', 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, len(payload)))
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+            self.snapshot_bytes += self.HEADER.size + len(payload)
+            self.snapshots += 1
+            self._remove_before(generation)
+        finally:
+            self._snapshotting = False
+
+    def stats(self):
+        logged = self.log_bytes
+        return {'directory': self.directory, 'generation': self.generation, 'entries': self.entries,
+                'log_bytes': logged, 'snapshot_bytes': self.snapshot_bytes, 'snapshots': self.snapshots,
+                'fsyncs': self.fsyncs,
+                'entries_per_fsync': round(self.entries / self.fsyncs, 2) if self.fsyncs else None,
+                # Bytes written to disk per byte of logged change
+                'write_amplification': round((logged + self.snapshot_bytes) / logged, 3) if logged else None,
+                'recovery': self.recovery}
+
+history_journal = None
+if HISTORY_DIR:
+    history_journal = HistoryJournal(HISTORY_DIR)
+    history_journal.recover(analytics_history)
+
+def save_analytics_record(diagnosis, lat=None, lon=None):
+    """Save an analyze_network Diagnosis (taken at lat/lon if given) to the history.
+
+    Returns the record id, or None when a full history rejects new records.
+    """
+    record = AnalyticsRecord(str(uuid.uuid4())[:8], time.time(), diagnosis, lat, lon)
+    if not analytics_history.add(record):
+        return None
+    return record.id
+
+def get_analytics_stats(**filters):
+    """Calculate statistics from analytics history (optionally filtered, see ColumnarAnalyticsStore.mask)"""
+    with analytics_history.reading(analytics_columns):
+        mask = analytics_columns.mask(**filters)
+        total = int(mask.sum())
+        if not total:
+            return {
+                'total': 0,
+                'most_used_operator': 'N/A',
+                'most_frequent_issue': 'N/A',
+                'average_score': 0
+            }
+        
+        most_used_operator = analytics_columns.most_common('operator', mask)
+        most_frequent_issue = ISSUE_TYPES[IssueType[analytics_columns.most_common('issue', mask).upper()]]['ar']
+        average_score = round(analytics_columns.mean('score', mask), 1)
+    
+    return {
+        'total': total,
+        'most_used_operator': most_used_operator,
+        'most_frequent_issue': most_frequent_issue,
+        'average_score': average_score
+    }
+
+# ==================== IDEMPOTENT SUBMISSIONS ====================
+class IdempotencyCache:
+    """Results of recent submissions by key, kept for ``ttl`` seconds (at most ``maxsize`` keys).
+
+    The first request with a key computes the result; concurrent requests
+    with the same key wait for it and later ones get it straight away.
+    Entries expire in insertion order, so eviction is O(1) per call.
+    """
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires, threading.Event, [result])
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            while self._entries and (len(self._entries) > self.maxsize or
+                                     next(iter(self._entries.values()))[0] <= now):
+                self._entries.popitem(last=False)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = (now + self.ttl, threading.Event(), [])
+                self._entries[key] = entry
+                self.misses += 1
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+        expires, done, result = entry
+        if not owner:
+            done.wait()
+            if result:
+                return result[0]
+            # The first attempt failed: compute again (and surface the error ourselves)
+            return compute()
+        try:
+            result.append(compute())
+        except BaseException:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            done.set()
+        return result[0]
+
+# Same form submission (client idempotency key + content) replayed by a retry, refresh or double click
+submitted_forms = IdempotencyCache(IDEMPOTENCY_TTL)
+# Identical measurement from the same client within a few seconds, for clients that send no key
+recent_submissions = IdempotencyCache(DEDUP_WINDOW)
+
+def deduplicate_submission(idempotency_key, client, inputs, compute):
+    """compute() once per submission; repeats return the first result instead of saving a duplicate"""
+    digest = hashlib.sha256(json.dumps([client, inputs], sort_keys=True, default=str).encode()).hexdigest()
+    if idempotency_key:
+        return submitted_forms.get_or_compute((idempotency_key[:64], digest),
+                                              lambda: recent_submissions.get_or_compute(digest, compute))
+    return recent_submissions.get_or_compute(digest, compute)
+
+# ==================== BULK IMPORT ====================
+def import_format(filename):
+    """'csv' or 'ndjson' from a file name (a .gz suffix is ignored); None to sniff the content"""
+    name = (filename or '').lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return None
+
+def read_measurements(stream, fmt=None):
+    """Raw rows of a CSV or NDJSON byte stream, gunzipped on the fly when it starts with the gzip magic.
+
+    CSV rows come out as dicts and NDJSON rows as undecoded lines, so that a
+    bad row only fails its own parse_measurement() call.
+    """
+    buffered = stream if hasattr(stream, 'peek') else io.BufferedReader(stream)
+    if buffered.peek(2)[:2] == b'\x1f\x8b':
+        buffered = io.BufferedReader(gzip.GzipFile(fileobj=buffered, mode='rb'))
+    if fmt is None:
+        fmt = 'ndjson' if buffered.peek(64).lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{') else 'csv'
+    text = io.TextIOWrapper(buffered, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    if fmt == 'csv':
+        return csv.DictReader(text)
+    return (line for line in text if line.strip())
+
+def parse_measurement(raw):
+    """analyze_network arguments and measurement time (None = now) of one imported row.
+
+    Columns: lat, lon, rsrp, sinr (required), network, operator, place,
+    wilaya, city, download, upload, ping and timestamp (ISO 8601 or epoch
+    seconds). NDJSON rows may nest the speeds in ``speed_data``.
+    """
+    row = json.loads(raw) if isinstance(raw, str) else raw
+    speed_data = row.get('speed_data')
+    if not isinstance(speed_data, dict):
+        speed_data = {name: float(row[name]) for name in ('download', 'upload', 'ping')
+                      if row.get(name) not in (None, '')} or None
+    stamp = row.get('timestamp')
+    when = None
+    if isinstance(stamp, (int, float)):
+        when = datetime.fromtimestamp(stamp)
+    elif stamp:
+        try:
+            when = datetime.fromtimestamp(float(stamp))
+        except ValueError:
+            when = datetime.fromisoformat(stamp)
+            if when.tzinfo is not None:
+                when = when.astimezone().replace(tzinfo=None)
+    args = (float(row['lat']), float(row['lon']), int(float(row['rsrp'])), int(float(row['sinr'])),
+            row.get('network') or row.get('network_type') or "4G", row.get('operator') or "Djezzy",
+            row.get('place') or "Indoor", row.get('wilaya') or row.get('Wilaya') or "", row.get('city') or "",
+            speed_data)
+    check_measurement(*args[:4], speed_data)
+    return args, when
+
+def analyze_batch(rows):
+    """AnalyticsRecords for a list of (row number, raw row), plus the rows that failed"""
+    records, errors = [], []
+    for number, raw in rows:
+        try:
+            args, when = parse_measurement(raw)
+            diagnosis = analyze_network(*args, when=when)
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            errors.append({'row': number, 'error': f"{type(exc).__name__}: {exc}"})
+            continue
+        created = when.timestamp() if when else time.time()
+        records.append(AnalyticsRecord(str(uuid.uuid4())[:8], created, diagnosis, args[0], args[1]))
+    return records, errors
+
+def import_measurements(stream, fmt=None, batch_size=IMPORT_BATCH_SIZE, workers=IMPORT_WORKERS):
+    """Load measurements into the history; yields a progress dict after each committed batch.
+
+    Batches are analysed by a thread pool (analysis reads the in-process
+    tower-load and peak-hour profiles, so worker processes would see stale
+    copies) and committed in order with AnalyticsStore.add_many. At most
+    2 * workers batches are in flight, so memory use does not grow with the
+    input size.
+    """
+    progress = {'rows': 0, 'imported': 0, 'not_stored': 0, 'errors': 0, 'error_samples': [], 'done': False}
+
+    def commit(future):
+        records, errors = future.result()
+        stored = analytics_history.add_many(records)
+        progress['rows'] += len(records) + len(errors)
+        progress['imported'] += stored
+        progress['not_stored'] += len(records) - stored
+        progress['errors'] += len(errors)
+        progress['error_samples'].extend(errors[:10 - len(progress['error_samples'])])
+        return dict(progress)
+
+    numbered = enumerate(read_measurements(stream, fmt), start=1)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(islice(numbered, batch_size))
+            if not batch:
+                break
+            pending.append(pool.submit(analyze_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield commit(pending.popleft())
+        while pending:
+            yield commit(pending.popleft())
+    progress['done'] = True
+    yield dict(progress)
+
+@app.cli.command("import-history")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(['csv', 'ndjson']), help="Default: from the file name or content.")
+@click.option("--batch-size", default=IMPORT_BATCH_SIZE, show_default=True, help="Rows per analysed/committed batch.")
+@click.option("--workers", default=IMPORT_WORKERS, show_default=True, help="Analysis threads.")
+def import_history_command(path, fmt, batch_size, workers):
+    """Import historical measurements from a CSV or NDJSON file (optionally gzip-compressed)."""
+    if history_journal is None:
+        raise click.ClickException("set ISHARATI_HISTORY_DIR, or the imported history is lost when the command exits")
+    size = os.path.getsize(path) or 1
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        for progress in import_measurements(f, fmt or import_format(path), batch_size, workers):
+            rate = progress['rows'] / max(time.perf_counter() - started, 1e-9)
+            click.echo(f"\r{min(f.tell() * 100 // size, 100):3d}%  {progress['rows']} rows  "
+                       f"{progress['imported']} imported  {progress['errors']} errors  {rate:.0f} rows/s", nl=False)
+    click.echo()
+    for sample in progress['error_samples']:
+        click.echo(f"row {sample['row']}: {sample['error']}", err=True)
+
+# ==================== STREAMING EXPORT ====================
+# Same column names as the bulk import, so an export can be imported elsewhere
+EXPORT_FIELDS = ('id', 'timestamp', 'lat', 'lon', 'rsrp', 'sinr', 'network', 'operator', 'place', 'wilaya',
+                 'city', 'download', 'upload', 'ping', 'network_score', 'issue')
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def export_row(record):
+    return (record.id, record.timestamp, record.lat, record.lon, record.rsrp, record.sinr, record.network_type,
+            record.operator, record.place, record.wilaya, record.city, record.download, record.upload,
+            record.ping, record.network_score, ISSUE_TYPES[record.issue]['type'])
+
+def export_lines(records, fmt):
+    """CSV (with header) or NDJSON text, one line per record"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for record in records:
+            writer.writerow(export_row(record))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for record in records:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, export_row(record))), ensure_ascii=False) + "\n"
+
+def export_stream(records, fmt, compress=False):
+    """Encoded export in ~EXPORT_CHUNK_SIZE chunks, gzip-compressed on the fly if asked"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+    for line in export_lines(records, fmt):
+        data = line.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_SIZE:
+            chunk = b''.join(pending)
+            pending, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b''.join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+# ==================== CHANGE FEED ====================
+FEED_HEARTBEAT = 15  # seconds between keep-alive comments on an idle event stream
+# An event stream then ends and the browser reconnects with Last-Event-ID. Under WSGI a
+# stream holds a worker thread, so it only waits briefly, like a long poll
+FEED_STREAM_SECONDS = 300
+FEED_WSGI_STREAM_SECONDS = 5
+FEED_POLL_INTERVAL = 1  # seconds between history checks of a stream served by asgi_app
+
+def history_delta(since, filters=None, cards=False):
+    """Records inserted (newest first, as to_dict) and ids deleted since sequence ``since``.
+
+    Changes cancelling out within the window are dropped. ``reset`` means
+    ``since`` could not be served incrementally (too old, from a previous
+    process, or the history was cleared): ``inserted`` is then the whole
+    history and the client replaces its view. With ``cards``, an incremental
+    delta also carries each inserted record rendered by analysis_card.html.
+    """
+    filters = filters or {}
+    sequence, changes = analytics_history.changes(since)
+    if changes is None or any(op == '*' for op, _ in changes):
+        records = [record for record in analytics_history.iter_records() if record.matches(**filters)]
+        return {'seq': sequence, 'reset': True, 'inserted': [record.to_dict() for record in records],
+                'deleted': []}
+    inserted, deleted = {}, []
+    for op, record_id in changes:
+        if op == '+':
+            inserted[record_id] = None
+        elif record_id in inserted:
+            del inserted[record_id]
+        else:
+            deleted.append(record_id)
+    # A record already gone again is skipped: its deletion comes with a later sequence
+    records = [record for record in map(analytics_history.get, reversed(inserted))
+               if record is not None and record.matches(**filters)]
+    delta = {'seq': sequence, 'reset': False, 'inserted': [record.to_dict() for record in records],
+             'deleted': deleted}
+    if cards:
+        delta['cards'] = [render_template('analysis_card.html', record=record) for record in records]
+    return delta
+
+def delta_event(delta):
+    """One history_delta() payload as a Server-Sent Event"""
+    return f"id: {delta['seq']}\nevent: delta\ndata: {json.dumps(delta)}\n\n"
+
+def delta_events(since, seconds, filters=None, cards=False):
+    """Server-Sent Events stream of history_delta() payloads for ``seconds``, one per batch of changes"""
+    deadline = time.monotonic() + seconds
+    yield "retry: 2000\n\n"
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        sequence, changes = analytics_history.changes(since, timeout=min(FEED_HEARTBEAT, remaining))
+        if changes == []:
+            yield ": keep-alive\n\n"
+            continue
+        delta = history_delta(since, filters, cards)
+        since = delta['seq']
+        yield delta_event(delta)
+
+# ==================== PDF GENERATION ====================
+def generate_advanced_pdf(data):
+    """Generate comprehensive PDF report"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=20, textColor=colors.HexColor('#0052FF'), 
+                                 spaceAfter=20, alignment=TA_CENTER, fontName='Helvetica-Bold')
+    heading_style = ParagraphStyle('Heading', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#0052FF'),
+                                   spaceAfter=10, alignment=TA_RIGHT, fontName='Helvetica-Bold')
+    
+    # Title
+    elements.append(Paragraph("ISHARATI PRO - Network Analysis Report", title_style))
+    elements.append(Spacer(1, 20))
+    
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    report_id = f"RPT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    
+    # Cover info
+    cover_data = [
+        ['Report ID:', report_id],
+        ['Date & Time:', current_time],
+        ['Location:', f"{data.get('city', 'N/A')}, {data.get('wilaya', 'N/A')}"],
+        ['Operator:', data.get('operator', 'N/A')],
+        ['Network Type:', data.get('network', 'N/A')],
+        ['Platform:', 'ISHARATI PRO v1.0']
+    ]
+    
+    cover_table = Table(cover_data, colWidths=[6*cm, 11*cm])
+    cover_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('PADDING', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ]))
+    
+    elements.append(cover_table)
+    elements.append(Spacer(1, 20))
+    
+    # Network Score Section
+    elements.append(Paragraph("Network Quality Score", heading_style))
+    
+    score_breakdown = data.get('score_breakdown', {})
+    score_data = [
+        ['Category', 'Score'],
+        ['Overall Quality', f"{score_breakdown.get('overall', 0)}/100 "],
+        ['Coverage (RSRP)', f"{score_breakdown.get('coverage', 0)}/100"],
+        ['Signal Quality (SINR)', f"{score_breakdown.get('quality', 0)}/100"],
+    ]
+    
+    if score_breakdown.get('speed'):
+        score_data.append(['Speed Performance', f"{score_breakdown.get('speed', 0)}/100"])
+    
+    score_table = Table(score_data, colWidths=[8*cm, 9*cm])
+    score_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 1), (-1, 1), 14),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('PADDING', (0, 0), (-1, -1), 10),
+    ]))
+    
+    elements.append(score_table)
+    elements.append(Spacer(1, 20))
+    
+    # Input Parameters
+    elements.append(Paragraph("Technical Parameters", heading_style))
+    
+    input_data = [
+        ['Parameter', 'Value'],
+        ['Latitude', str(data.get('lat', 'N/A'))],
+        ['Longitude', str(data.get('lon', 'N/A'))],
+        ['RSRP (Signal Strength)', f"{data.get('rsrp', 'N/A')} dBm"],
+        ['SINR (Signal Quality)', f"{data.get('sinr', 'N/A')} dB"],
+        ['Network Type', data.get('network', 'N/A')],
+        ['Operator', data.get('operator', 'N/A')],
+        ['Location Type', data.get('place', 'N/A')],
+        ['City', data.get('city', 'N/A')],
+        ['Wilaya', data.get('wilaya', 'N/A')],
+    ]
+    
+    if data.get('speed_data'):
+        speed = data['speed_data']
+        input_data.append(['Download Speed', f"{speed.get('download', 'N/A')} Mbps"])
+        input_data.append(['Upload Speed', f"{speed.get('upload', 'N/A')} Mbps"])
+        input_data.append(['Ping', f"{speed.get('ping', 'N/A')} ms"])
+    
+    input_table = Table(input_data, colWidths=[8*cm, 9*cm])
+    input_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0052FF')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('PADDING', (0, 0), (-1, -1), 8),
+    ]))
+    
+    elements.append(input_table)
+    elements.append(Spacer(1, 20))
+    
+    # Footer
+    elements.append(Spacer(1, 30))
+    elements.append(Paragraph("---------------------------------------------------------------------", styles['Normal']))
+    elements.append(Paragraph("Generated by ISHARATI PRO v1.0 - Advanced Network Diagnostic Platform", styles['Normal']))
+    elements.append(Paragraph("For support: isharatipro@gmail.com", styles['Normal']))
+    
+    doc.build(elements)
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+# ==================== WARM-UP ====================
+def warm_up():
+    """Import the lazily loaded dependencies ahead of the first request that needs them"""
+    started = time.perf_counter()
+    import numpy  # noqa: F401
+    import speedtest  # noqa: F401
+    import reportlab.platypus  # noqa: F401
+    from reportlab.lib.styles import getSampleStyleSheet
+    getSampleStyleSheet()
+    return time.perf_counter() - started
+
+if WARMUP_ON_START:
+    threading.Thread(target=warm_up, daemon=True).start()
+
+# ==================== REQUEST PROFILING ====================
+def is_admin_token(token):
+    """Check a token against ADMIN_TOKEN in constant time"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+class StackSampler:
+    """Sample one thread's call stack into flamegraph collapsed-stack counts"""
+    def __init__(self, thread_id, interval=PROFILE_STACK_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.ident is not None:  # started
+            self._thread.join()
+
+    def collapsed(self):
+        """Render the samples in Brendan Gregg's collapsed format (one 'stack count' per line)"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class RequestProfiler:
+    """WSGI middleware wrapping selected requests in cProfile and a stack sampler.
+
+    A request is profiled when it carries ``X-Isharati-Profile: <admin token>``
+    or is picked by PROFILE_SAMPLE_RATE. The last ``capacity`` profiles are kept
+    in a ring buffer and served from the /admin/profiles endpoints. Only one
+    request is profiled at a time (cProfile cannot run twice on Python 3.12+):
+    requests arriving meanwhile run unprofiled.
+    """
+    def __init__(self, wsgi_app, capacity=PROFILE_BUFFER_SIZE, sample_rate=PROFILE_SAMPLE_RATE):
+        self.wsgi_app = wsgi_app
+        self.sample_rate = sample_rate
+        self.profiles = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._active = threading.Lock()  # held while a request is being profiled
+
+    def should_profile(self, environ):
+        if environ.get('PATH_INFO', '').startswith('/admin/'):
+            return False
+        if is_admin_token(environ.get('HTTP_X_ISHARATI_PROFILE')):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, environ, start_response):
+        if not self.should_profile(environ) or not self._active.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+
+        status = []
+        def _start_response(status_line, headers, exc_info=None):
+            status.append(status_line)
+            return start_response(status_line, headers, exc_info)
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident())
+        started = time.perf_counter()
+
+        def finish():
+            profiler.disable()
+            sampler.stop()
+            self._active.release()
+            duration = time.perf_counter() - started
+
+            profiler.create_stats()
+            with self._lock:
+                self.profiles.append({
+                    'id': str(uuid.uuid4())[:8],
+                    'timestamp': datetime.now().isoformat(),
+                    'method': environ.get('REQUEST_METHOD'),
+                    'path': environ.get('PATH_INFO'),
+                    'status': status[0] if status else None,
+                    'duration_ms': round(duration * 1000, 2),
+                    'samples': sum(sampler.stacks.values()),
+                    'pstats': marshal.dumps(profiler.stats),
+                    'collapsed': sampler.collapsed(),
+                })
+
+        try:
+            sampler.start()
+            profiler.enable()
+            app_iter = self.wsgi_app(environ, _start_response)
+        except BaseException:
+            finish()
+            raise
+        # The body still streams; lazy iterables are profiled as the server consumes
+        # them and the profile is recorded when it closes the response
+        return ClosingIterator(app_iter, finish)
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self.profiles if p['id'] == profile_id), None)
+
+    def summaries(self):
+        with self._lock:
+            profiles = list(self.profiles)
+        return [{k: v for k, v in p.items() if k not in ('pstats', 'collapsed')} for p in reversed(profiles)]
+
+request_profiler = RequestProfiler(app.wsgi_app)
+app.wsgi_app = request_profiler
+
+def require_admin():
+    """Abort unless the request carries a valid admin token"""
+    if not ADMIN_TOKEN:
+        abort(404)
+    token = request.headers.get('X-Admin-Token') or request.args.get('token')
+    if not is_admin_token(token):
+        abort(403)
+
+def parse_analytics_filters(args):
+    """Read the operator/wilaya/issue/since/until filters of the analytics APIs from query args"""
+    filters = {}
+    for key in ('operator', 'wilaya'):
+        if args.get(key):
+            filters[key] = args[key]
+    if args.get('issue'):
+        try:
+            filters['issue'] = IssueType[args['issue'].upper()]
+        except KeyError:
+            abort(400)
+    for key in ('since', 'until'):
+        if args.get(key):
+            try:
+                filters[key] = datetime.fromisoformat(args[key]).timestamp()
+            except ValueError:
+                abort(400)
+    return filters
+
+# ==================== RESPONSE COMPRESSION ====================
+try:
+    import brotli  # optional: without it only gzip is offered
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/x-ndjson',
+                      'application/xml', 'image/svg+xml')
+
+def accepted_encoding(header):
+    """Preferred of br (when brotli is installed) and gzip allowed by an Accept-Encoding header, or None"""
+    weights = {}
+    for item in header.split(','):
+        name, *params = item.split(';')
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0
+    for encoding in ('br', 'gzip') if brotli else ('gzip',):
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def compress_stream(chunks, encoding):
+    """Compress chunks as they come, flushing after each so a streamed response stays incremental"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+def compress_body(body, encoding):
+    """Whole body at the highest level, for variants that are compressed once and cached"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+class ResponseCompression:
+    """WSGI middleware negotiating gzip (or brotli, when installed) for text responses.
+
+    Dynamic bodies are compressed while they stream, one flush per chunk, so
+    exports and the import progress feed stay incremental. A response with an
+    ETag is immutable for that tag: its compressed variant is built once at the
+    highest level, kept in an LRU cache and served with a weak ETag. Small,
+    non-text, already encoded and ``Cache-Control: no-transform`` responses
+    (the speed-test bytes) pass through untouched.
+    """
+    def __init__(self, wsgi_app, min_size=COMPRESS_MIN_SIZE, cache_size=COMPRESS_CACHE_SIZE):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.cache = LRUCache(cache_size)
+        self.counters = Counter()
+
+    def negotiate(self, environ, status, headers):
+        """Headers to send, and (encoding, cache key, cached body) when the response is compressed"""
+        headers = Headers(headers)
+        content_type = headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if (not content_type.startswith(COMPRESSIBLE_TYPES) or 'Content-Encoding' in headers
+                or 'no-transform' in headers.get('Cache-Control', '')):
+            self.counters['incompressible'] += 1
+            return headers, None
+        vary = headers.get('Vary')
+        if not vary:
+            headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f"{vary}, Accept-Encoding"
+        encoding = accepted_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        length = headers.get('Content-Length')
+        if (encoding is None or not status.startswith('200') or environ['REQUEST_METHOD'] == 'HEAD'
+                or (length is not None and int(length) < self.min_size)):
+            self.counters['identity'] += 1
+            return headers, None
+        etag = headers.get('ETag')
+        key = cached = None
+        if etag:
+            key = (environ.get('PATH_INFO'), environ.get('QUERY_STRING'), etag, encoding)
+            cached = self.cache.get(key)
+            if not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag  # same content, different bytes
+        headers['Content-Encoding'] = encoding
+        if cached is not None:
+            headers['Content-Length'] = str(len(cached))
+        else:
+            headers.pop('Content-Length', None)
+        return headers, (encoding, key, cached)
+
+    def __call__(self, environ, start_response):
+        decision = []
+
+        def negotiating_start_response(status, headers, exc_info=None):
+            if decision is not None:
+                headers, choice = self.negotiate(environ, status, headers)
+                decision[:] = [choice]
+                headers = headers.to_wsgi_list()
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, negotiating_start_response)
+        if not decision or decision[0] is None:
+            decision = None  # a late start_response passes through as well
+            return app_iter
+        encoding, key, cached = decision[0]
+        if key is None:
+            self.counters['streamed'] += 1
+            return ClosingIterator(compress_stream(app_iter, encoding),
+                                   [app_iter.close] if hasattr(app_iter, 'close') else None)
+        try:
+            if cached is None:
+                self.counters['cache_fills'] += 1
+                cached = compress_body(b''.join(app_iter), encoding)
+                self.cache.put(key, cached)
+            else:
+                self.counters['cache_hits'] += 1
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        return [cached]
+
+    def stats(self):
+        return {'encodings': ['br', 'gzip'] if brotli else ['gzip'], 'responses': dict(self.counters),
+                'cache': self.cache.stats()}
+
+# Inside admission control, so refused requests are not compressed, and outside the profiler
+response_compression = ResponseCompression(app.wsgi_app)
+app.wsgi_app = response_compression
+
+# ==================== SPEED TEST TRANSFERS ====================
+# One shared zero-filled chunk: every download streams views of it instead
+# of allocating the whole test file per request
+SPEED_TEST_CHUNK = bytes(64 * 1024)
+SPEED_TEST_HEADERS = [('Content-Type', 'application/octet-stream'),
+                      ('Content-Length', str(SPEED_TEST_BYTES)),
+                      ('Content-Disposition', 'attachment; filename=testfile'),
+                      ('Cache-Control', 'no-store, no-transform')]
+
+def speed_test_chunks():
+    """SPEED_TEST_BYTES of zeros in SPEED_TEST_CHUNK-sized pieces"""
+    full, rest = divmod(SPEED_TEST_BYTES, len(SPEED_TEST_CHUNK))
+    for _ in range(full):
+        yield SPEED_TEST_CHUNK
+    if rest:
+        yield SPEED_TEST_CHUNK[:rest]
+
+# ==================== RATE LIMITING ====================
+def parse_rate(spec):
+    """'count/seconds' -> (tokens per second, burst); None when empty or '0' (unlimited)"""
+    if not spec or spec == '0':
+        return None
+    count, _, seconds = spec.partition('/')
+    return int(count) / float(seconds or 1), int(count)
+
+class RateLimiter:
+    """Token buckets keyed by client: ``burst`` requests at once, refilled at ``rate`` per second.
+
+    Buckets are kept in least-recently-used order; one idle long enough to
+    have refilled completely is equivalent to a new one and is dropped, so
+    each check is O(1) amortised and memory follows the active clients.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.idle_after = burst / rate
+        self._buckets = OrderedDict()  # client -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def allow(self, client):
+        """(True, 0) and one token spent, or (False, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            while self._buckets:
+                oldest = next(iter(self._buckets.values()))
+                if now - oldest[1] < self.idle_after:
+                    break
+                self._buckets.popitem(last=False)
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(client)
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0
+            return False, (1 - bucket[0]) / self.rate
+
+class AdmissionControl:
+    """WSGI middleware applying per-client rate limits and a concurrency cap on heavy routes.
+
+    HEAVY_ENDPOINTS (and POSTs to /) spend from the expensive budget and
+    need one of HEAVY_CONCURRENCY slots; the speed-test transfers spend
+    from their own budget and slots, so that a few tests lock a client out
+    of neither the PDF report nor the analysis form. Slots are held until
+    the response body is closed so streamed downloads count; everything
+    else, including the speed test's HEAD ping, spends from the cheap
+    budget. Over-budget clients get 429 and a full server 503, both with
+    Retry-After, as JSON or, for the analysis form, as the page itself.
+    """
+    HEAVY_ENDPOINTS = {'download_pdf', 'download_pdf_analytics', 'coverage_predict', 'analytics_export',
+                       'admin_import'}
+    SPEED_TEST_ENDPOINTS = {'download_test', 'upload_test'}
+
+    def __init__(self, wsgi_app, cheap=RATE_LIMIT_CHEAP, expensive=RATE_LIMIT_EXPENSIVE,
+                 speed_test=RATE_LIMIT_SPEED_TEST, concurrency=HEAVY_CONCURRENCY,
+                 speed_test_concurrency=SPEED_TEST_CONCURRENCY):
+        self.wsgi_app = wsgi_app
+        self.cheap = RateLimiter(*parse_rate(cheap)) if parse_rate(cheap) else None
+        self.expensive = RateLimiter(*parse_rate(expensive)) if parse_rate(expensive) else None
+        self.speed_test = RateLimiter(*parse_rate(speed_test)) if parse_rate(speed_test) else None
+        self.slots = {budget: threading.BoundedSemaphore(count) if count > 0 else None
+                      for budget, count in (('expensive', concurrency), ('speed_test', speed_test_concurrency))}
+        self.rejected = Counter()
+
+    def budget(self, environ):
+        """'cheap', 'expensive' or 'speed_test': the budget a request spends from"""
+        try:
+            endpoint, _ = app.url_map.bind_to_environ(environ).match()
+        except HTTPException:  # 404/405/redirects are cheap to answer
+            return 'cheap'
+        method = environ.get('REQUEST_METHOD')
+        if endpoint in self.SPEED_TEST_ENDPOINTS:
+            # The ping probe is a HEAD without a body
+            return 'cheap' if method == 'HEAD' else 'speed_test'
+        if endpoint in self.HEAVY_ENDPOINTS or (endpoint == 'index' and method == 'POST'):
+            return 'expensive'
+        return 'cheap'
+
+    @staticmethod
+    def client(environ, trusted_proxies=None):
+        """The address a request is counted against; the left of X-Forwarded-For is client-supplied"""
+        hops = RATE_LIMIT_TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+        forwarded = [address.strip() for address in environ.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        if hops > 0 and len(forwarded) >= hops and forwarded[-hops]:
+            return forwarded[-hops]
+        return environ.get('REMOTE_ADDR', '')
+
+    def reject(self, environ, start_response, status, reason, retry_after):
+        self.rejected[reason] += 1
+        if environ.get('PATH_INFO') == '/':
+            # The analysis form: show the message on the page instead of a bare JSON body
+            with app.request_context(environ):
+                page = render_template('index.html', rec=f"الخادم مشغول، أعد المحاولة بعد {retry_after} ثانية",
+                                       rsrp=0, sinr=0, request=request)
+            response = Response(page, status=status, mimetype='text/html')
+        else:
+            response = Response(json.dumps({"error": reason, "retry_after": retry_after}), status=status,
+                                mimetype='application/json')
+        response.headers['Retry-After'] = str(retry_after)
+        return response(environ, start_response)
+
+    def __call__(self, environ, start_response):
+        budget = self.budget(environ)
+        limiter = getattr(self, budget)
+        if limiter is not None:
+            allowed, wait = limiter.allow(self.client(environ))
+            if not allowed:
+                return self.reject(environ, start_response, 429, "rate limited", math.ceil(wait))
+        slots = self.slots.get(budget)
+        if slots is None:
+            return self.wsgi_app(environ, start_response)
+        if not slots.acquire(blocking=False):
+            return self.reject(environ, start_response, 503, "server busy", 1)
+        try:
+            return ClosingIterator(self.wsgi_app(environ, start_response), slots.release)
+        except BaseException:
+            slots.release()
+            raise
+
+    def stats(self):
+        return {'rejected': dict(self.rejected),
+                'clients': {name: len(limiter._buckets) for name, limiter in
+                            (('cheap', self.cheap), ('expensive', self.expensive),
+                             ('speed_test', self.speed_test)) if limiter is not None}}
+
+# Outermost, so rejected requests cost neither profiling nor a Flask dispatch
+admission_control = AdmissionControl(app.wsgi_app)
+app.wsgi_app = admission_control
+
+# ==================== ROUTES ====================
+def static_page(template):
+    """A page without per-request context, with an ETag so browsers and the compression cache reuse it"""
+    response = Response(render_template(template), mimetype='text/html')
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route("/", methods=["GET", "POST"])
+def index():
+    analysis = None
+    rec = ""
+    rsrp = sinr = 0
+    network_score = None
+    star_rating = None
+    
+    if request.method == "POST":
+        try:
+            lat = float(request.form.get("lat", 0))
+            lon = float(request.form.get("lon", 0))
+            rsrp = int(request.form.get("rsrp", -140))
+            sinr = int(request.form.get("sinr", 0))
+            network_type = request.form.get("network", "4G")
+            operator = request.form.get("operator", "Djezzy")
+            place = request.form.get("place", "Indoor")
+            wilaya = request.form.get("Wilaya", "")
+            city = request.form.get("city", "")
+            
+            speed_data_str = request.form.get("speed_data", "")
+            speed_data = None
+            if speed_data_str:
+                try:
+                    speed_data = json.loads(speed_data_str)
+                except:
+                    pass
+            
+            check_measurement(lat, lon, rsrp, sinr, speed_data)
+            inputs = (lat, lon, rsrp, sinr, network_type, operator, place, wilaya, city, speed_data)
+            
+            def analyze_and_save():
+                diagnosis = analyze_network(*inputs)
+                save_analytics_record(diagnosis, lat, lon)
+                return diagnosis
+            
+            # A resubmitted or double-clicked form returns the first result instead of saving it again
+            diagnosis = deduplicate_submission(request.form.get("idempotency_key"),
+                                               [request.remote_addr, request.user_agent.string],
+                                               inputs, analyze_and_save)
+            
+            analysis = diagnosis.summary
+            rec = diagnosis.short_recommendation
+            network_score = diagnosis.network_score
+            star_rating = NetworkDiagnosticEngine.get_star_rating(network_score)
+            
+            # Store the codes in the session for PDF generation
+            session['report_data'] = diagnosis.to_codes()
+            
+        except ValueError as e:
+            rec = f"خطأ في البيانات: {str(e)}"
+
+    return render_template('index.html', analysis=analysis, rec=rec, rsrp=rsrp, sinr=sinr,
+                           network_score=network_score, star_rating=star_rating, request=request)
+
+@app.route("/analytics")
+def analytics_page():
+    """Display analytics history"""
+    # Taken before the records: the page's first delta may repeat a change, never miss one
+    sequence = analytics_history.sequence
+    records = analytics_history.snapshot()
+    stats = get_analytics_stats()
+    return render_template('analytics.html', analytics=records,
+                           analytics_json=json.dumps([r.to_dict() for r in records]),
+                           stats=stats, feed_seq=sequence, live_events=request.environ.get('isharati.asgi', False))
+
+@app.route("/api/analytics/stats")
+def analytics_stats_api():
+    """Filtered headline stats plus per-group count and means (?by=operator|wilaya|issue)"""
+    filters = parse_analytics_filters(request.args)
+    by = request.args.get('by', 'operator')
+    if by not in ('operator', 'wilaya', 'issue'):
+        abort(400)
+    with analytics_history.reading(analytics_columns):
+        mask = analytics_columns.mask(**filters)
+        return jsonify({
+            "stats": get_analytics_stats(**filters),
+            "by": by,
+            "groups": analytics_columns.group_stats(by, mask)
+        })
+
+@app.route("/api/analytics/trends")
+def analytics_trends_api():
+    """Chart data from the pre-aggregated rollups (?granularity=hour|day|week&by=all|operator|wilaya&since=ISO)"""
+    granularity = request.args.get('granularity', 'day')
+    by = request.args.get('by', 'all')
+    if granularity not in RollupIndex.GRANULARITIES or by not in RollupIndex.DIMENSIONS:
+        abort(400)
+    since = parse_analytics_filters(request.args).get('since')
+    with analytics_history.reading(analytics_rollups):
+        series = analytics_rollups.series(granularity, by, since)
+    return jsonify({
+        "granularity": granularity,
+        "by": by,
+        "series": series
+    })
+
+@app.route("/api/analytics/percentiles")
+def analytics_percentiles_api():
+    """p5/p50/p95 (or ?p=1,10,50) of RSRP, SINR, download and ping (?by=all|operator|wilaya)"""
+    by = request.args.get('by', 'all')
+    if by not in ('all',) + PercentileIndex.DIMENSIONS:
+        abort(400)
+    try:
+        percents = [float(p) for p in request.args.get('p', '5,50,95').split(',')]
+    except ValueError:
+        abort(400)
+    if not all(0 <= p <= 100 for p in percents):
+        abort(400)
+    with analytics_history.reading(analytics_percentiles):
+        groups = analytics_percentiles.percentiles(by, percents)
+    return jsonify({"by": by, "groups": groups})
+
+@app.route("/api/heatmap/<int:z>/<int:x>/<int:y>.<fmt>")
+def heatmap_tile(z, x, y, fmt):
+    """Precomputed coverage tile as JSON cells or a PNG overlay (?operator= for one network)"""
+    if z not in TileIndex.ZOOMS or fmt not in ('json', 'png') or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+        abort(404)
+    layer = request.args.get('operator') or 'all'
+    with analytics_history.reading(analytics_tiles):
+        if not analytics_tiles.has_layer(layer):
+            abort(404)
+        if fmt == 'json':
+            version, body = analytics_tiles.tile_json(layer, z, x, y)
+        else:
+            version, body = analytics_tiles.tile_png(layer, z, x, y)
+    response = Response(body, mimetype='application/json' if fmt == 'json' else 'image/png')
+    response.set_etag(f"{layer}-{z}-{x}-{y}-{version}")
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response.make_conditional(request)
+
+@app.route("/api/coverage/predict")
+def coverage_predict():
+    """Predicted RSRP raster over ?bbox=south,west,north,east (?size=64&operator=&format=json|png)"""
+    try:
+        south, west, north, east = (float(v) for v in request.args.get('bbox', '').split(','))
+        size = int(request.args.get('size', 64))
+    except ValueError:
+        abort(400)
+    if not (south < north and west < east) or north - south > 1 or east - west > 1:
+        abort(400)
+    operator = request.args.get('operator') or None
+    with analytics_history.reading(coverage_interpolator):
+        grid = coverage_interpolator.raster(south, west, north, east, size, operator)
+    if request.args.get('format') == 'png':
+        scale = max(1, 256 // grid.shape[0])
+        return Response(encode_png(rsrp_overlay(grid, scale)), mimetype='image/png')
+    return jsonify({
+        "bounds": {"south": south, "west": west, "north": north, "east": east},
+        "size": grid.shape[0],
+        "operator": operator or 'all',
+        "rsrp": grid.round(1).tolist()
+    })
+
+@app.route("/api/dead-zones")
+def dead_zones_api():
+    """Ranked clusters of poor-coverage / interference measurements (?operator=&limit=20)"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 200))
+    except ValueError:
+        abort(400)
+    with analytics_history.reading(dead_zones):
+        zones = dead_zones.zones(request.args.get('operator') or None, limit)
+    return jsonify({"zones": zones})
+
+@app.route("/api/towers/load")
+def tower_load_api():
+    """Per-tower hour-of-day baselines used for congestion verdicts (?tower=BTS-Center)"""
+    with analytics_history.reading(tower_load):
+        return jsonify({"version": tower_load.version,
+                        "towers": tower_load.profile(request.args.get('tower') or None)})
+
+@app.route("/api/peak-hours")
+def peak_hours_api():
+    """Learned hour-of-week profile and peak flags (?operator=Djezzy&wilaya=Alger)"""
+    operator = request.args.get('operator')
+    if not operator:
+        abort(400)
+    with analytics_history.reading(peak_hours):
+        profile = peak_hours.profile(operator, request.args.get('wilaya') or None)
+    return jsonify(profile)
+
+@app.route("/api/analytics/export.<fmt>")
+def analytics_export(fmt):
+    """Stream the history newest first as NDJSON or CSV (analytics filters; ?gzip=1 compresses on the fly)"""
+    if fmt not in ('ndjson', 'csv'):
+        abort(404)
+    filters = parse_analytics_filters(request.args)
+    compress = request.args.get('gzip') == '1'
+    records = (record for record in analytics_history.iter_records() if record.matches(**filters))
+    if compress:
+        mimetype = 'application/gzip'
+    else:
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(export_stream(records, fmt, compress), mimetype=mimetype)
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename=isharati_analytics.{fmt}{".gz" if compress else ""}'
+    return response
+
+def change_feed_args():
+    """(since, filters, cards) of a /api/analytics/changes request"""
+    filters = parse_analytics_filters(request.args)
+    try:
+        # An EventSource reconnecting sends the last id it saw, newer than its URL's ?seq
+        since = int(request.headers.get('Last-Event-ID') or request.args.get('seq') or 0)
+    except ValueError:
+        abort(400)
+    return since, filters, request.args.get('cards') == '1'
+
+@app.route("/api/analytics/changes")
+def analytics_changes():
+    """Records inserted and ids deleted after ?seq=<sequence> (analytics filters apply to the inserted ones).
+
+    ?cards=1 adds the rendered card of each inserted record. Under WSGI an
+    event stream only lasts FEED_WSGI_STREAM_SECONDS; asgi_app serves long
+    ones on its event loop.
+    """
+    since, filters, cards = change_feed_args()
+    if 'text/event-stream' in request.headers.get('Accept', ''):
+        events = delta_events(since, FEED_WSGI_STREAM_SECONDS, filters, cards)
+        response = Response(stream_with_context(events), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return jsonify(history_delta(since, filters, cards))
+
+@app.route("/download_pdf")
+def download_pdf():
+    codes = session.get('report_data')
+    # Sessions written by older versions hold a dict of rendered texts
+    if not isinstance(codes, list):
+        return "لا توجد بيانات. قم بتشغيل التحليل أولاً.", 400
+    
+    diagnosis = Diagnosis.from_codes(codes)
+    
+    pdf = generate_advanced_pdf(diagnosis.report_data())
+    return send_file(
+        io.BytesIO(pdf),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'ISHARATI_Report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+    )
+
+@app.route("/download_pdf_analytics/<record_id>")
+def download_pdf_analytics(record_id):
+    """Download PDF for a specific analytics record"""
+    record = analytics_history.get(record_id)
+    if not record:
+        return "التحليل غير موجود", 404
+    
+    pdf = generate_advanced_pdf(record.report_data())
+    return send_file(
+        io.BytesIO(pdf),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'ISHARATI_Analytics_{record_id}.pdf'
+    )
+
+@app.route("/api/delete_analytics/<record_id>", methods=["DELETE"])
+def delete_analytics(record_id):
+    """Delete a specific analytics record"""
+    analytics_history.remove(record_id)
+    return jsonify({"success": True})
+
+@app.route("/api/clear_all_analytics", methods=["DELETE"])
+def clear_all_analytics():
+    """Clear all analytics history"""
+    analytics_history.clear()
+    return jsonify({"success": True})
+@app.route('/api/download-test')
+def download_test():
+    """SPEED_TEST_BYTES of zeros for the browser to time (HEAD answers the ping probe)"""
+    body = speed_test_chunks() if request.method == 'GET' else ()
+    return Response(body, headers=SPEED_TEST_HEADERS, direct_passthrough=True)
+
+@app.route('/api/upload-test', methods=['POST'])
+def upload_test():
+    """Read and discard the request body so the browser can time its upload"""
+    received = 0
+    while True:
+        chunk = request.stream.read(len(SPEED_TEST_CHUNK))
+        if not chunk:
+            break
+        received += len(chunk)
+        if received > SPEED_TEST_UPLOAD_LIMIT:
+            return jsonify({"error": "upload too large", "limit": SPEED_TEST_UPLOAD_LIMIT}), 413
+    return jsonify({"bytes": received})
+
+@app.route("/speed-test")
+def speed_test_page():
+    return static_page('speed_test.html')
+@app.route('/api/speed-test')
+def speed_test_fallback():
+    # We return a small JSON or redirect the logic to the frontend
+    return jsonify({
+        "info": "Please use client-side JS for accurate testing on Vercel"
+    })
+@app.route("/guide")
+def guide():
+    return static_page('guide.html')
+
+@app.route("/knowledge")
+def knowledge():
+    return static_page('knowledge.html')
+
+# ==================== ADMIN: PROFILES ====================
+@app.route("/admin/profiles")
+def admin_profiles():
+    """List the profiles currently held in the ring buffer"""
+    require_admin()
+    return jsonify({"sample_rate": request_profiler.sample_rate, "profiles": request_profiler.summaries()})
+
+@app.route("/admin/profiles/<profile_id>.pstats")
+def admin_profile_pstats(profile_id):
+    """Download a profile in pstats format (python -m pstats / snakeviz)"""
+    require_admin()
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        return "الملف غير موجود", 404
+    return send_file(
+        io.BytesIO(profile['pstats']),
+        mimetype='application/octet-stream',
+        as_attachment=True,
+        download_name=f'isharati_{profile_id}.pstats'
+    )
+
+@app.route("/admin/profiles/<profile_id>/collapsed")
+def admin_profile_collapsed(profile_id):
+    """Collapsed stacks, ready for flamegraph.pl or speedscope"""
+    require_admin()
+    profile = request_profiler.get(profile_id)
+    if not profile:
+        return "الملف غير موجود", 404
+    return Response(profile['collapsed'], mimetype='text/plain')
+
+@app.route("/admin/analysis-cache")
+def admin_analysis_cache():
+    """Hit/miss counters of the analyze_network memo cache"""
+    require_admin()
+    return jsonify(analysis_cache.stats())
+
+@app.route("/admin/import", methods=["POST"])
+def admin_import():
+    """Bulk-load measurements from a CSV/NDJSON body or 'file' upload (gzip ok); streams NDJSON progress"""
+    require_admin()
+    upload = None
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            abort(400)
+    elif request.mimetype == 'application/x-www-form-urlencoded':
+        # Form parsing would consume (and buffer) the body, e.g. curl --data-binary without -H Content-Type
+        abort(415)
+    fmt = request.args.get('format') or import_format(upload.filename if upload else '')
+    if fmt not in (None, 'csv', 'ndjson'):
+        abort(400)
+    stream = request.stream
+    if upload:
+        # The request closes its files before the streamed response runs: keep this one open
+        stream, upload.stream = upload.stream, io.BytesIO()
+
+    def generate():
+        try:
+            for progress in import_measurements(stream, fmt):
+                yield json.dumps(progress) + "\n"
+        except (OSError, EOFError, UnicodeDecodeError, csv.Error) as exc:
+            yield json.dumps({"error": f"{type(exc).__name__}: {exc}"}) + "\n"
+        finally:
+            if upload:
+                stream.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route("/admin/admission")
+def admin_admission():
+    """Requests refused by the rate limiter / concurrency cap, and tracked clients per budget"""
+    require_admin()
+    return jsonify(admission_control.stats())
+
+@app.route("/admin/compression")
+def admin_compression():
+    """Responses compressed, streamed or served from the compressed-variant cache"""
+    require_admin()
+    return jsonify(response_compression.stats())
+
+@app.route("/admin/history-log")
+def admin_history_log():
+    """Durability counters of the history journal: fsyncs, write amplification, last recovery"""
+    require_admin()
+    if history_journal is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **history_journal.stats()})
+
+# ==================== ASGI MODE ====================
+def asgi_headers(headers):
+    return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+def wsgi_environ(scope, body):
+    """WSGI environ for an ASGI http scope whose request body has been spooled to ``body``"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'isharati.asgi': True,  # lets pages use long-lived event streams (see AsgiApp.change_events)
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+class ClientDisconnected(Exception):
+    pass
+
+class AsgiApp:
+    """ASGI entry point: ``uvicorn index:asgi_app`` (any ASGI server works).
+
+    The speed-test transfers (/api/download-test, /api/upload-test) are
+    served natively on the event loop, so thousands of concurrent transfers
+    cost a coroutine each rather than a worker thread; they keep the
+    per-client speed-test budget (the cheap one for the HEAD ping) but skip
+    the heavy-route concurrency cap, which exists to protect threads.
+    Event streams of the analytics change feed are served on the loop too
+    (change_events), so an open /analytics tab does not hold a thread. Every other request runs the regular
+    WSGI stack (admission control, profiler, Flask) on a pool of
+    ASGI_WORKERS threads, streaming its response back with backpressure.
+    """
+    NATIVE = {('/api/download-test', 'GET'), ('/api/download-test', 'HEAD'), ('/api/upload-test', 'POST')}
+
+    def __init__(self, wsgi_app, workers=ASGI_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='isharati-wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while (await receive())['type'] != 'lifespan.shutdown':
+                await send({'type': 'lifespan.startup.complete'})
+            self.executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+        if scope['type'] != 'http':
+            return
+        route = (scope['path'], scope['method'])
+        if route == ('/api/analytics/changes', 'GET') and any(
+                name == b'accept' and b'text/event-stream' in value for name, value in scope.get('headers', ())):
+            handler, limiter = self.change_events, admission_control.cheap
+        elif route in self.NATIVE:
+            handler = self.download_test if scope['path'] == '/api/download-test' else self.upload_test
+            limiter = admission_control.cheap if scope['method'] == 'HEAD' else admission_control.speed_test
+        else:
+            await self.run_wsgi(scope, receive, send)
+            return
+        if limiter is not None:
+            allowed, wait = limiter.allow(AdmissionControl.client(wsgi_environ(scope, None)))
+            if not allowed:
+                admission_control.rejected['rate limited'] += 1
+                await self.respond(send, 429, {"error": "rate limited", "retry_after": math.ceil(wait)},
+                                   [('Retry-After', str(math.ceil(wait)))])
+                return
+        await handler(scope, receive, send)
+
+    @staticmethod
+    async def respond(send, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': asgi_headers([('Content-Type', 'application/json'),
+                                             ('Content-Length', str(len(body))), *headers])})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def download_test(self, scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': asgi_headers(SPEED_TEST_HEADERS)})
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        remaining = SPEED_TEST_BYTES
+        while remaining > 0:
+            chunk = SPEED_TEST_CHUNK[:remaining]
+            remaining -= len(chunk)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+
+    async def upload_test(self, scope, receive, send):
+        received = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            received += len(message.get('body', b''))
+            if received > SPEED_TEST_UPLOAD_LIMIT:
+                await self.respond(send, 413, {"error": "upload too large", "limit": SPEED_TEST_UPLOAD_LIMIT})
+                return
+            if not message.get('more_body'):
+                break
+        await self.respond(send, 200, {"bytes": received})
+
+    async def change_events(self, scope, receive, send):
+        """The analytics change feed as Server-Sent Events, checking the history every FEED_POLL_INTERVAL"""
+        loop = asyncio.get_running_loop()
+        with app.request_context(wsgi_environ(scope, io.BytesIO())):
+            try:
+                since, filters, cards = change_feed_args()
+            except HTTPException as exc:
+                await self.respond(send, exc.code, {"error": exc.name})
+                return
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        def delta(since):
+            with app.app_context():
+                return history_delta(since, filters, cards)
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': asgi_headers([('Content-Type', 'text/event-stream; charset=utf-8'),
+                                                 ('Cache-Control', 'no-cache')])})
+            await send({'type': 'http.response.body', 'body': b'retry: 2000\n\n', 'more_body': True})
+            deadline = loop.time() + FEED_STREAM_SECONDS
+            heartbeat = loop.time() + FEED_HEARTBEAT
+            while not disconnected.is_set() and loop.time() < deadline:
+                if analytics_history.sequence != since:
+                    # Rendering the cards (or a reset's full history) runs on a worker thread, briefly
+                    changes = await loop.run_in_executor(self.executor, delta, since)
+                    since = changes['seq']
+                    event = delta_event(changes)
+                elif loop.time() >= heartbeat:
+                    event = ": keep-alive\n\n"
+                else:
+                    try:
+                        await asyncio.wait_for(disconnected.wait(), FEED_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                heartbeat = loop.time() + FEED_HEARTBEAT
+                await send({'type': 'http.response.body', 'body': event.encode(), 'more_body': True})
+            if not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            watcher.cancel()
+
+    async def run_wsgi(self, scope, receive, send):
+        # Small bodies stay in memory, bulk imports spill to disk
+        body = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=8)
+        disconnected = threading.Event()
+
+        def put(item):
+            # Blocks the worker while the client is slower than the app
+            if disconnected.is_set():
+                raise ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def run():
+            response = []
+
+            def start_response(status, headers, exc_info=None):
+                response[:] = [int(status.split(' ', 1)[0]), headers]
+
+            try:
+                app_iter = self.wsgi_app(wsgi_environ(scope, body), start_response)
+                try:
+                    started = False
+                    for chunk in app_iter:
+                        if chunk:
+                            if not started:
+                                put(('start', *response))
+                                started = True
+                            put(('body', chunk))
+                    if not started:
+                        put(('start', *response))
+                finally:
+                    if hasattr(app_iter, 'close'):
+                        app_iter.close()
+            except ClientDisconnected:
+                pass
+            except Exception:
+                app.logger.exception("ASGI bridge: %s %s failed", scope['method'], scope['path'])
+                if not disconnected.is_set():
+                    asyncio.run_coroutine_threadsafe(queue.put(('error',)), loop).result()
+            finally:
+                body.close()
+                asyncio.run_coroutine_threadsafe(queue.put(('end',)), loop)
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch())
+        worker = loop.run_in_executor(self.executor, run)
+        started = False
+        try:
+            while True:
+                item = await queue.get()
+                if item[0] == 'end':
+                    break
+                if disconnected.is_set():
+                    continue  # drain until the worker notices
+                if item[0] == 'start':
+                    started = True
+                    await send({'type': 'http.response.start', 'status': item[1], 'headers': asgi_headers(item[2])})
+                elif item[0] == 'body':
+                    await send({'type': 'http.response.body', 'body': item[1], 'more_body': True})
+                elif not started:
+                    started = True
+                    await self.respond(send, 500, {"error": "internal server error"})
+                    disconnected.set()
+                else:
+                    # Headers are out: end without completing the body so the client sees a truncated response
+                    disconnected.set()
+            if started and not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.set()
+            watcher.cancel()
+            while not worker.done():  # unblock a worker waiting on a full queue
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0.001)
+            await worker
+
+asgi_app = AsgiApp(app.wsgi_app)
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🚀 ISHARATI PRO v1.0 - Advanced Network Diagnostic Platform")
+    print("=" * 60)
+    print("✅ Features:")
+    print("   - Complete UI Design")
+    print("   - Advanced Analytics Engine")
+    print("   - Network Quality Scoring")
+    print("   - PDF Report Generation")
+    print("   - Speed Test Integration")
+    print("   - 📊 Previous Analytics Page with:")
+    print("      • Search and Filter")
+    print("      • Statistics Dashboard")
+    print("      • Detailed View Modal")
+    print("      • PDF Export per Record")
+    print("      • Delete Functionality")
+    print("=" * 60)
+    print("🌐 Access at: http://localhost:5000")
+    print("📊 Analytics: http://localhost:5000/analytics")
+    print("=" * 60)
+    app.run(debug=True, port=5000, host='0.0.0.0')
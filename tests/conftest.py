@@ -0,0 +1,38 @@
+import itertools
+import os
+import random
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+# All test-client requests share one address: lift the per-client limits and concurrency caps
+for name in ('ISHARATI_RATE_LIMIT_CHEAP', 'ISHARATI_RATE_LIMIT_EXPENSIVE', 'ISHARATI_RATE_LIMIT_SPEED_TEST',
+             'ISHARATI_HEAVY_CONCURRENCY', 'ISHARATI_SPEED_TEST_CONCURRENCY'):
+    os.environ.setdefault(name, '0')
+os.environ.pop('ISHARATI_HISTORY_DIR', None)
+
+import index  # noqa: E402
+from run_benchmarks import analyze, synthetic_input  # noqa: E402
+
+
+@pytest.fixture
+def make_record():
+    """Factory of analysed synthetic records with ids r0, r1, ..."""
+    rng = random.Random(0)
+    ids = itertools.count()
+
+    def make():
+        data = synthetic_input(rng)
+        return index.AnalyticsRecord(f"r{next(ids)}", time.time(), analyze(data), data['lat'], data['lon'])
+    return make
+
+
+@pytest.fixture
+def history():
+    """The app's analytics history, emptied before and after the test"""
+    index.analytics_history.clear()
+    yield index.analytics_history
+    index.analytics_history.clear()
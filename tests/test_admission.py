@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from werkzeug.test import Client, EnvironBuilder
+
+import index
+
+
+def ok_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'ok']
+
+
+def test_rate_limiter_refills_over_time():
+    limiter = index.RateLimiter(rate=2, burst=2)
+    assert limiter.allow('a') == (True, 0) and limiter.allow('a') == (True, 0)
+    allowed, wait = limiter.allow('a')
+    assert not allowed and 0 < wait <= 0.5
+    # Clients have separate buckets
+    assert limiter.allow('b') == (True, 0)
+
+
+def test_over_budget_client_gets_429_with_retry_after():
+    client = Client(index.AdmissionControl(ok_app, cheap='2/60', expensive='0', speed_test='0', concurrency=0))
+    assert [client.get('/guide').status_code for _ in range(2)] == [200, 200]
+    response = client.get('/guide')
+    assert response.status_code == 429 and int(response.headers['Retry-After']) > 0
+
+
+@pytest.mark.parametrize('method, path, budget', [
+    ('GET', '/guide', 'cheap'),
+    ('POST', '/', 'expensive'),
+    ('GET', '/api/coverage/predict', 'expensive'),
+    ('GET', '/api/download-test', 'speed_test'),
+    ('POST', '/api/upload-test', 'speed_test'),
+    ('HEAD', '/api/download-test', 'cheap'),
+    ('GET', '/no-such-page', 'cheap'),
+])
+def test_requests_spend_from_their_budget(method, path, budget):
+    environ = EnvironBuilder(path=path, method=method).get_environ()
+    assert index.AdmissionControl(ok_app).budget(environ) == budget
+
+
+def test_speed_tests_do_not_spend_the_expensive_budget():
+    client = Client(index.AdmissionControl(ok_app, cheap='0', expensive='1/60', speed_test='4/60', concurrency=0))
+    for _ in range(2):
+        assert client.head('/api/download-test').status_code == 200
+        assert client.get('/api/download-test').status_code == 200
+        assert client.post('/api/upload-test').status_code == 200
+    assert client.get('/api/coverage/predict').status_code == 200
+    assert client.get('/api/download-test').status_code == 429
+
+
+def test_full_server_gets_503_until_a_streamed_response_is_closed():
+    client = Client(index.AdmissionControl(ok_app, cheap='0', expensive='0', speed_test='0', concurrency=1,
+                                           speed_test_concurrency=1))
+    streaming = client.get('/api/coverage/predict', buffered=False)
+    response = client.get('/api/coverage/predict')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+    # Cheap routes are not capped
+    assert client.get('/guide').status_code == 200
+    streaming.close()
+    assert client.get('/api/coverage/predict').status_code == 200
+
+
+def test_speed_tests_and_expensive_routes_have_separate_slots():
+    client = Client(index.AdmissionControl(ok_app, cheap='0', expensive='0', speed_test='0', concurrency=1,
+                                           speed_test_concurrency=1))
+    transfer = client.get('/api/download-test', buffered=False)
+    assert client.post('/api/upload-test').status_code == 503
+    assert client.get('/api/coverage/predict').status_code == 200
+    report = client.get('/api/coverage/predict', buffered=False)
+    transfer.close()
+    assert client.get('/api/download-test').status_code == 200
+    report.close()
+
+
+def test_refused_form_submission_renders_the_page():
+    client = Client(index.AdmissionControl(ok_app, cheap='0', expensive='1/60', speed_test='0', concurrency=0))
+    assert client.post('/').status_code == 200
+    response = client.post('/')
+    assert response.status_code == 429 and response.mimetype == 'text/html'
+    assert 'أعد المحاولة بعد ' + response.headers['Retry-After'] in response.text
+
+
+@pytest.mark.parametrize('forwarded, hops, client', [
+    ('6.6.6.6, 203.0.113.7', 1, '203.0.113.7'),
+    ('6.6.6.6, 203.0.113.7, 10.0.0.2', 2, '203.0.113.7'),
+    ('203.0.113.7', 2, '10.0.0.1'),
+    ('', 1, '10.0.0.1'),
+    ('6.6.6.6, 203.0.113.7', 0, '10.0.0.1'),
+])
+def test_client_is_the_address_the_trusted_proxies_saw(forwarded, hops, client):
+    environ = {'REMOTE_ADDR': '10.0.0.1', 'HTTP_X_FORWARDED_FOR': forwarded}
+    assert index.AdmissionControl.client(environ, hops) == client
+
+
+def asgi_request(method, path):
+    """Status of one request to the ASGI entry point"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+             'headers': [], 'client': ('10.0.0.1', 5000), 'server': ('testserver', 80), 'scheme': 'http',
+             'http_version': '1.1', 'root_path': ''}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+    asyncio.run(index.asgi_app(scope, receive, send))
+    return sent[0]['status']
+
+
+def test_native_speed_test_routes_spend_the_speed_test_budget(monkeypatch):
+    monkeypatch.setattr(index.admission_control, 'cheap', None)
+    monkeypatch.setattr(index.admission_control, 'speed_test', index.RateLimiter(rate=1 / 60, burst=1))
+    assert asgi_request('GET', '/api/download-test') == 200
+    assert asgi_request('HEAD', '/api/download-test') == 200
+    assert asgi_request('POST', '/api/upload-test') == 429
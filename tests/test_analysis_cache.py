@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import index
+
+WHEN = datetime(2024, 5, 1, 14)
+INPUTS = (-95, 8, '4G', 'Djezzy', 'indoor', 'Alger', 'Alger', {'download': 12.5})
+
+
+def test_nearby_points_keep_their_own_coordinates():
+    index.analysis_cache.clear()
+    first = index.analyze_network(36.75321, 3.05871, *INPUTS, when=WHEN)
+    second = index.analyze_network(36.75324, 3.05874, *INPUTS, when=WHEN)
+    assert (second.lat, second.lon) == (36.75324, 3.05874)
+    assert second.to_codes() == index._analyze_network(36.75324, 3.05874, *INPUTS, when=WHEN).to_codes()
+    assert first is not second
+
+
+def test_repeated_inputs_hit_the_cache():
+    index.analysis_cache.clear()
+    first = index.analyze_network(36.75321, 3.05871, *INPUTS, when=WHEN)
+    assert index.analyze_network(36.75321, 3.05871, *INPUTS, when=WHEN) is first
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import index
+import stress_analytics_store
+
+
+def test_stress_run_keeps_history_and_indexes_consistent(history, capsys):
+    assert stress_analytics_store.main(['--seconds', '1', '--writers', '2', '--deleters', '1',
+                                        '--readers', '2']) == 0, capsys.readouterr().out
+
+
+def test_save_does_not_wait_for_index_reader(history, make_record):
+    holding, release = threading.Event(), threading.Event()
+
+    def read_slowly():
+        with history.reading(index.coverage_interpolator):
+            holding.set()
+            release.wait(5)
+
+    reader = threading.Thread(target=read_slowly)
+    reader.start()
+    holding.wait(5)
+    try:
+        started = time.perf_counter()
+        assert history.add(make_record())
+        assert time.perf_counter() - started < 1
+        # Indexes nobody is reading are already up to date
+        with history.reading(index.tower_load) as tower_load:
+            assert sum(acc[tower_load.COUNT] for acc in tower_load.sums.values()) == 1
+    finally:
+        release.set()
+        reader.join()
+    # The busy index caught up when its reader left
+    assert not history._queue
+
+
+def test_busy_index_catches_up_on_next_read(history, make_record):
+    holding, release = threading.Event(), threading.Event()
+
+    def read_slowly():
+        with history.reading(index.analytics_columns):
+            holding.set()
+            release.wait(5)
+
+    reader = threading.Thread(target=read_slowly)
+    reader.start()
+    holding.wait(5)
+    records = [make_record() for _ in range(3)]
+    history.add_many(records)
+    history.remove(records[0].id)
+    release.set()
+    reader.join()
+    with history.reading(index.analytics_columns) as columns:
+        assert columns.live == 2
+
+
+def test_store_without_indexes_queues_nothing(make_record):
+    store = index.AnalyticsStore(capacity=2)
+    for _ in range(5):
+        store.add(make_record())
+    assert len(store) == 2 and not store._queue
+
+
+class PickyIndex:
+    """Index refusing records whose id is in ``refuse``"""
+    def __init__(self, refuse):
+        self.refuse = refuse
+        self.ids = set()
+
+    def add(self, record):
+        if record.id in self.refuse:
+            raise ValueError(record.id)
+        self.ids.add(record.id)
+
+    def remove(self, record):
+        self.ids.remove(record.id)
+
+    def clear(self):
+        self.ids.clear()
+
+
+def test_failing_change_is_skipped_not_retried(make_record):
+    picky = PickyIndex({'r1'})
+    store = index.AnalyticsStore([picky], capacity=10)
+    records = [make_record() for _ in range(3)]
+    for record in records:
+        store.add(record)
+    with store.reading(picky) as seen:
+        assert seen.ids == {'r0', 'r2'}
+    assert not store._queue
+    # Removing the record the index never took does not fail either
+    store.remove('r1')
+    store.remove('r2')
+    store.add(make_record())
+    with store.reading(picky) as seen:
+        assert seen.ids == {'r0', 'r3'}
+
+
+class PickyBulkIndex(PickyIndex):
+    def add_many(self, records):
+        for record in records:
+            self.add(record)
+
+
+def test_rebuild_falls_back_to_single_adds(make_record):
+    picky = PickyBulkIndex({'r1'})
+    store = index.AnalyticsStore([picky], capacity=10)
+    store.defer_indexing()
+    store.add_many([make_record() for _ in range(3)])
+    store.rebuild_indexes()
+    with store.reading(picky) as seen:
+        assert seen.ids == {'r0', 'r2'}
+    store.remove('r1')
+    with store.reading(picky) as seen:
+        assert seen.ids == {'r0', 'r2'}
+
+
+def test_record_out_of_float_range_does_not_break_the_app(history, make_record):
+    record = make_record()
+    record.rsrp = -10 ** 400
+    history.add(record)
+    client = index.app.test_client()
+    for path in ('/analytics', '/api/analytics/stats', '/api/analytics/trends'):
+        assert client.get(path).status_code == 200, path
+    history.add(make_record())
+    with history.reading(index.analytics_rollups) as rollups:
+        assert sum(acc[rollups.COUNT] for acc in rollups.buckets['hour'][('all', 'all')].values()) == 1
+    history.remove(record.id)
+    with history.reading(index.analytics_columns) as columns:
+        assert columns.live == 1
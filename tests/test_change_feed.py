@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import index
+
+
+def save(make_record, history):
+    record = make_record()
+    history.add(record)
+    return record.id
+
+
+def test_delta_lists_inserts_newest_first_and_deletes(history, make_record):
+    client = index.app.test_client()
+    since = history.sequence
+    ids = [save(make_record, history) for _ in range(3)]
+    history.remove(ids[0])
+    delta = client.get(f'/api/analytics/changes?seq={since}').get_json()
+    assert not delta['reset'] and 'cards' not in delta
+    assert [record['id'] for record in delta['inserted']] == ids[:0:-1] and delta['deleted'] == []
+    later = client.get(f"/api/analytics/changes?seq={delta['seq']}").get_json()
+    assert later['inserted'] == later['deleted'] == []
+
+
+def test_unknown_sequence_resets(history, make_record):
+    save(make_record, history)
+    delta = index.app.test_client().get('/api/analytics/changes?seq=5').get_json()
+    assert delta['reset'] and len(delta['inserted']) == 1
+
+
+def test_cards_match_the_page_markup(history, make_record):
+    client = index.app.test_client()
+    since = history.sequence
+    save(make_record, history)
+    delta = client.get(f'/api/analytics/changes?seq={since}&cards=1').get_json()
+    page = client.get('/analytics').get_data(as_text=True)
+    card = delta['cards'][0].strip()
+    assert card.startswith(f'<div class="analysis-card" data-id="{delta["inserted"][0]["id"]}">')
+    assert card in page
+
+
+def test_wsgi_event_stream_ends_quickly(history, make_record, monkeypatch):
+    monkeypatch.setattr(index, 'FEED_WSGI_STREAM_SECONDS', 0.5)
+    since = history.sequence
+    threading.Timer(0.1, save, (make_record, history)).start()
+    started = time.monotonic()
+    response = index.app.test_client().get(f'/api/analytics/changes?seq={since}&cards=1',
+                                           headers={'Accept': 'text/event-stream'})
+    events = response.get_data(as_text=True)
+    assert time.monotonic() - started < 2
+    assert events.startswith('retry: 2000') and 'event: delta' in events and '"cards"' in events
+
+
+def asgi_stream(path, receive, headers=()):
+    """Messages sent by asgi_app for a GET of ``path``"""
+    scope = {'type': 'http', 'method': 'GET', 'path': path.split('?')[0], 'raw_path': path.encode(),
+             'query_string': path.partition('?')[2].encode(), 'headers': list(headers),
+             'client': ('10.0.0.2', 5000), 'server': ('testserver', 80), 'scheme': 'http', 'http_version': '1.1',
+             'root_path': ''}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+    asyncio.run(index.asgi_app(scope, receive, send))
+    return sent
+
+
+def test_asgi_serves_event_streams_on_the_loop(history, make_record, monkeypatch):
+    monkeypatch.setattr(index, 'FEED_STREAM_SECONDS', 1)
+    monkeypatch.setattr(index, 'FEED_POLL_INTERVAL', 0.05)
+    since = history.sequence
+    threading.Timer(0.2, save, (make_record, history)).start()
+
+    async def receive():
+        await asyncio.sleep(10)
+    sent = asgi_stream(f'/api/analytics/changes?seq={since}&cards=1', receive,
+                       [(b'accept', b'text/event-stream')])
+    assert sent[0]['status'] == 200 and (b'content-type', b'text/event-stream; charset=utf-8') in sent[0]['headers']
+    body = b''.join(message.get('body', b'') for message in sent[1:]).decode()
+    assert 'event: delta' in body and '"cards"' in body
+    assert not sent[-1].get('more_body')
+
+
+def test_asgi_event_stream_stops_when_the_client_leaves(history, monkeypatch):
+    monkeypatch.setattr(index, 'FEED_POLL_INTERVAL', 0.05)
+
+    async def receive():
+        await asyncio.sleep(0.2)
+        return {'type': 'http.disconnect'}
+    started = time.monotonic()
+    asgi_stream('/api/analytics/changes', receive, [(b'accept', b'text/event-stream')])
+    assert time.monotonic() - started < 2
+
+
+def test_page_uses_event_streams_only_under_asgi(history):
+    assert 'const liveEvents = false;' in index.app.test_client().get('/analytics').get_data(as_text=True)
+
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(10)
+    sent = asgi_stream('/analytics', receive)
+    assert b'const liveEvents = true;' in b''.join(message.get('body', b'') for message in sent[1:])
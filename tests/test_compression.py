@@ -0,0 +1,75 @@
+import gzip
+
+import pytest
+from werkzeug.test import Client
+
+import index
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.mark.parametrize('header, encoding', [
+    ('gzip', 'gzip'),
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('*;q=0.5', 'gzip'),
+    ('*, gzip;q=0', None),
+    ('deflate, identity', None),
+    ('', None),
+])
+def test_accept_encoding_negotiation(header, encoding, monkeypatch):
+    monkeypatch.setattr(index, 'brotli', None)
+    assert index.accepted_encoding(header) == encoding
+
+
+def etag_app(environ, start_response):
+    body = b'<p>' + b'isharati ' * 500 + b'</p>'
+    start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8'), ('Content-Length', str(len(body))),
+                              ('ETag', '"v1"')])
+    return [body]
+
+
+def test_etagged_variant_is_compressed_once_and_cached(monkeypatch):
+    monkeypatch.setattr(index, 'brotli', None)
+    compression = index.ResponseCompression(etag_app)
+    client = Client(compression)
+    first = client.get('/', headers=GZIP)
+    second = client.get('/', headers=GZIP)
+    assert first.headers['Content-Encoding'] == 'gzip' and first.headers['ETag'] == 'W/"v1"'
+    assert first.headers['Vary'] == 'Accept-Encoding'
+    # The fill streams without a length, the cached variant is sent with one
+    assert first.data == second.data and int(second.headers['Content-Length']) == len(second.data)
+    assert gzip.decompress(first.data) == client.get('/').data
+    assert compression.counters['cache_fills'] == 1 and compression.counters['cache_hits'] == 1
+
+
+def test_refused_encoding_gets_the_identity_body():
+    response = index.app.test_client().get('/guide', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in response.headers and response.headers['Vary'] == 'Accept-Encoding'
+    assert not response.headers['ETag'].startswith('W/')
+
+
+def test_weak_etag_revalidates_with_304():
+    client = index.app.test_client()
+    response = client.get('/guide', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip' and response.headers['ETag'].startswith('W/')
+    revalidated = client.get('/guide', headers={**GZIP, 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304 and not revalidated.data
+
+
+def test_streamed_export_is_compressed(history, make_record):
+    history.add_many([make_record() for _ in range(50)])
+    client = index.app.test_client()
+    identity = client.get('/api/analytics/export.csv')
+    compressed = client.get('/api/analytics/export.csv', headers=GZIP)
+    assert compressed.headers['Content-Encoding'] == 'gzip' and 'Content-Length' not in compressed.headers
+    assert gzip.decompress(compressed.data) == identity.data
+
+
+def test_speed_test_routes_stay_uncompressed():
+    client = index.app.test_client()
+    with client.get('/api/download-test', headers=GZIP, buffered=False) as download:
+        assert download.status_code == 200 and 'Content-Encoding' not in download.headers
+        assert download.headers['Content-Length'] == str(index.SPEED_TEST_BYTES)
+    upload = client.post('/api/upload-test', data=b'x' * 4096, headers=GZIP)
+    assert upload.status_code == 200 and 'Content-Encoding' not in upload.headers
@@ -0,0 +1,37 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import index
+
+# Texts rendered by the analysis before it moved to the message catalog (fixed clock, default profiles)
+with open(os.path.join(os.path.dirname(__file__), 'diagnosis_texts.json'), encoding='utf-8') as f:
+    EXPECTED = json.load(f)
+
+
+@pytest.fixture
+def default_profiles(monkeypatch):
+    """Unlearned tower and peak-hour profiles, as the expected texts were rendered with"""
+    monkeypatch.setattr(index, 'tower_load', index.TowerLoadIndex())
+    monkeypatch.setattr(index, 'peak_hours', index.PeakHourIndex())
+
+
+@pytest.mark.parametrize('case', EXPECTED, ids=range(len(EXPECTED)))
+def test_catalog_renders_the_previous_texts(case, default_profiles):
+    diagnosis = index._analyze_network(*case['inputs'], when=datetime.fromisoformat(case['when']))
+    assert diagnosis.summary == case['summary']
+    assert diagnosis.technical_explanation == case['technical_explanation']
+    assert diagnosis.recommendations == case['recommendations']
+    assert diagnosis.short_recommendation == case['short_recommendation']
+    assert diagnosis.issue_type == case['issue_type']
+    assert diagnosis.network_score == case['network_score']
+    assert diagnosis.score_breakdown == case['score_breakdown']
+
+
+def test_texts_survive_the_session_codes(default_profiles):
+    case = EXPECTED[1]
+    diagnosis = index._analyze_network(*case['inputs'], when=datetime.fromisoformat(case['when']))
+    restored = index.Diagnosis.from_codes(json.loads(json.dumps(diagnosis.to_codes())))
+    assert (restored.summary, restored.recommendations) == (case['summary'], case['recommendations'])
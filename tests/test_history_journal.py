@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+import index
+
+
+def open_store(directory, **options):
+    store = index.AnalyticsStore(capacity=100)
+    journal = index.HistoryJournal(str(directory), commit_interval=0, **options)
+    journal.recover(store)
+    return store, journal
+
+
+def settle(journal):
+    """Wait for a background snapshot to be written"""
+    deadline = time.monotonic() + 5
+    while journal._snapshotting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def rows(store):
+    return [record.to_row() for record in store.snapshot()]
+
+
+def test_history_is_recovered_from_the_log(tmp_path, make_record):
+    store, journal = open_store(tmp_path)
+    store.add_many([make_record() for _ in range(3)])
+    store.add(make_record())
+    store.remove('r1')
+    recovered, second = open_store(tmp_path)
+    assert rows(recovered) == rows(store)
+    assert second.recovery['log_entries'] == 5 and second.recovery['snapshot_rows'] == 0
+
+
+def test_history_is_recovered_from_snapshot_and_later_log(tmp_path, make_record):
+    store, journal = open_store(tmp_path, snapshot_every=4)
+    for _ in range(6):
+        store.add(make_record())
+    settle(journal)
+    store.remove('r5')
+    recovered, second = open_store(tmp_path)
+    assert rows(recovered) == rows(store)
+    assert second.recovery['snapshot_rows'] > 0
+    # Files older than the snapshot were removed
+    assert sorted(os.listdir(tmp_path)) == ['history-00000001.log', 'history-00000001.snap']
+
+
+def test_clear_is_replayed(tmp_path, make_record):
+    store, journal = open_store(tmp_path)
+    store.add_many([make_record() for _ in range(3)])
+    store.clear()
+    store.add(make_record())
+    recovered, _ = open_store(tmp_path)
+    assert [record.id for record in recovered.snapshot()] == ['r3']
+
+
+def test_torn_tail_is_discarded(tmp_path, make_record):
+    store, journal = open_store(tmp_path)
+    store.add_many([make_record() for _ in range(2)])
+    log = tmp_path / 'history-00000000.log'
+    intact = log.stat().st_size
+    with open(log, 'ab') as f:
+        f.write(b'["+",["r9"')  # crash in the middle of a write
+    recovered, second = open_store(tmp_path)
+    assert rows(recovered) == rows(store)
+    assert log.stat().st_size == intact
+    # New entries start on a clean line and survive the next recovery
+    recovered.add(make_record())
+    again, _ = open_store(tmp_path)
+    assert rows(again) == rows(recovered)
+    assert all(json.loads(line) for line in log.read_bytes().splitlines())
+
+
+def test_recovery_survives_a_record_an_index_rejects(tmp_path, make_record):
+    store, journal = open_store(tmp_path)
+    bad = make_record()
+    bad.rsrp = -10 ** 400
+    store.add(bad)
+    store.add(make_record())
+    recovered = index.AnalyticsStore([index.ColumnarAnalyticsStore(), index.RollupIndex()], capacity=100)
+    index.HistoryJournal(str(tmp_path), commit_interval=0).recover(recovered)
+    assert rows(recovered) == rows(store)
+
+
+def test_recovered_indexes_match_incremental_ones(tmp_path, make_record):
+    def indexed_store():
+        return index.AnalyticsStore([index.RollupIndex(), index.DeadZoneIndex(), index.TowerLoadIndex(),
+                                     index.PeakHourIndex()], capacity=1000)
+
+    def views(store):
+        rollups, dead_zones, towers, peaks = store.indexes
+        for guard_index in store.indexes:
+            with store.reading(guard_index):
+                pass
+        peaks.refresh()
+        assert dead_zones.zones() and peaks.windows
+        # Removals leave float residue in the running sums, so those are compared approximately
+        return (rollups.series('day', by='operator'), dead_zones.zones(limit=100), peaks.windows,
+                sorted(towers.sums)), [value for key in sorted(towers.sums) for value in towers.sums[key]]
+
+    store = indexed_store()
+    journal = index.HistoryJournal(str(tmp_path), commit_interval=0, snapshot_every=150)
+    journal.recover(store)
+    # One operator in a small area over a few weeks, so there are dead zones and peak windows to learn
+    rng = random.Random(1)
+    records = [make_record() for _ in range(400)]
+    for hours, record in enumerate(records):
+        record.operator, record.created = 'Djezzy', time.time() - hours * 3600
+        record.lat, record.lon = 36.7 + rng.random() * 0.02, 3.0 + rng.random() * 0.02
+    for record in records[:250]:
+        store.add(record)
+    settle(journal)
+    store.add_many(records[250:])
+    for record in records[::7]:
+        store.remove(record.id)
+
+    recovered = indexed_store()
+    second = index.HistoryJournal(str(tmp_path), commit_interval=0)
+    second.recover(recovered)
+    assert second.recovery['snapshot_rows'] and second.recovery['log_entries']
+    assert rows(recovered) == rows(store)
+    (exact, sums), (expected, expected_sums) = views(recovered), views(store)
+    assert exact == expected and sums == pytest.approx(expected_sums)
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+import index
+
+
+def test_repeated_key_returns_the_first_result():
+    cache = index.IdempotencyCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)  # noqa: E731
+    assert cache.get_or_compute('k', compute) == 1
+    assert cache.get_or_compute('k', compute) == 1
+    assert cache.get_or_compute('other', compute) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_concurrent_requests_compute_once():
+    cache = index.IdempotencyCache(ttl=60)
+    started, finish = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        finish.wait(5)
+        return 'saved'
+
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    second.start()
+    finish.set()
+    first.join()
+    second.join()
+    assert results == ['saved', 'saved'] and len(calls) == 1
+
+
+def test_failed_computation_is_not_remembered():
+    cache = index.IdempotencyCache(ttl=60)
+
+    def fail():
+        raise RuntimeError('database down')
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: 'retried') == 'retried'
+
+
+def test_expired_and_overflowing_keys_are_dropped():
+    expired = index.IdempotencyCache(ttl=0)
+    expired.get_or_compute('k', lambda: 1)
+    assert expired.get_or_compute('k', lambda: 2) == 2
+    bounded = index.IdempotencyCache(ttl=60, maxsize=1)
+    bounded.get_or_compute('a', lambda: 1)
+    bounded.get_or_compute('b', lambda: 2)
+    bounded.get_or_compute('c', lambda: 3)
+    assert bounded.get_or_compute('a', lambda: 4) == 4
+
+
+def test_resubmitted_form_is_saved_once(history):
+    client = index.app.test_client()
+    form = {'lat': '36.75', 'lon': '3.06', 'rsrp': '-97', 'sinr': '11', 'network': '4G', 'operator': 'Mobilis',
+            'place': 'Indoor', 'Wilaya': 'Alger', 'city': 'Alger', 'idempotency_key': 'form-1'}
+    for _ in range(2):
+        assert client.post('/', data=form).status_code == 200
+    assert len(history) == 1
+    client.post('/', data=dict(form, rsrp='-98', idempotency_key='form-2'))
+    assert len(history) == 2
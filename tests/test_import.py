@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+
+import index
+
+CSV = (b"lat,lon,rsrp,sinr,operator,wilaya\n"
+       b"36.75,3.06,-95,12,Djezzy,Alger\n"
+       b"35.69,-0.63,-118,-2,Mobilis,Oran\n")
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(index, 'ADMIN_TOKEN', 'secret')
+    return {'X-Admin-Token': 'secret'}
+
+
+def progress(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_raw_body_is_imported(history, admin):
+    lines = progress(index.app.test_client().post('/admin/import', data=CSV, headers=admin,
+                                                  content_type='text/csv'))
+    assert 'error' not in lines[-1] and len(history) == 2
+
+
+def test_multipart_file_is_imported(history, admin):
+    data = {'file': (io.BytesIO(CSV), 'history.csv')}
+    lines = progress(index.app.test_client().post('/admin/import', data=data, headers=admin,
+                                                  content_type='multipart/form-data'))
+    assert 'error' not in lines[-1] and len(history) == 2
+
+
+def test_multipart_without_file_is_refused(history, admin):
+    response = index.app.test_client().post('/admin/import', data={'other': 'x'}, headers=admin,
+                                            content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+def test_urlencoded_body_is_refused(history, admin):
+    # What curl --data-binary sends by default: form parsing would swallow the file
+    response = index.app.test_client().post('/admin/import', data=CSV, headers=admin,
+                                            content_type='application/x-www-form-urlencoded')
+    assert response.status_code == 415 and len(history) == 0
+
+
+def test_import_needs_the_admin_token(history, admin):
+    response = index.app.test_client().post('/admin/import', data=CSV, content_type='text/csv')
+    assert response.status_code == 403
+
+
+def measured(record):
+    return (record.timestamp, record.lat, record.lon, record.rsrp, record.sinr, record.network_type,
+            record.operator, record.place, record.wilaya, record.city, record.download, record.upload, record.ping)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+@pytest.mark.parametrize('compressed', [False, True])
+def test_export_round_trips_through_the_import(history, admin, make_record, fmt, compressed):
+    history.add_many([make_record() for _ in range(30)])
+    expected = sorted(measured(record) for record in history)
+    client = index.app.test_client()
+    export = client.get(f'/api/analytics/export.{fmt}' + ('?gzip=1' if compressed else ''))
+    assert export.status_code == 200
+    assert (export.data[:2] == b'\x1f\x8b') == compressed  # gzip magic
+    history.clear()
+    data = {'file': (io.BytesIO(export.data), f'history.{fmt}' + ('.gz' if compressed else ''))}
+    lines = progress(client.post('/admin/import', data=data, headers=admin, content_type='multipart/form-data'))
+    assert lines[-1]['imported'] == 30 and lines[-1]['errors'] == 0
+    assert sorted(measured(record) for record in history) == expected
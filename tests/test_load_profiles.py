@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import index
+
+MONDAY = datetime(2024, 5, 6)
+LAT, LON = 36.7538, 3.0588
+
+
+def at(record, when, download, operator='Djezzy', wilaya='Alger'):
+    record.created, record.download, record.operator, record.wilaya = when.timestamp(), download, operator, wilaya
+    return record
+
+
+def test_congestion_threshold_follows_the_tower_baseline(make_record, monkeypatch):
+    towers = index.TowerLoadIndex()
+    bts = index.nearest_bts(LAT, LON, 'Djezzy')[0]['name']
+    records = []
+    for _ in range(towers.MIN_SAMPLES):
+        record = at(make_record(), MONDAY.replace(hour=20), 40.0)
+        record.bts = bts
+        records.append(record)
+    for record in records[:-1]:
+        towers.add(record)
+    towers.refresh()
+    # Too few samples: the fixed threshold applies
+    assert towers.congestion_threshold(bts, 20) == towers.DEFAULT_THRESHOLD
+    towers.add(records[-1])
+    towers.refresh()
+    assert towers.congestion_threshold(bts, 20) == 40.0 * towers.CONGESTION_RATIO
+    assert towers.congestion_threshold(bts, 9) == towers.DEFAULT_THRESHOLD
+
+    # 15 Mbps with a good signal is congestion only against the tower's usual 40 Mbps
+    monkeypatch.setattr(index, 'tower_load', towers)
+    analyse = lambda hour: index._analyze_network(LAT, LON, -80, 15, '4G', 'Djezzy', 'Indoor', 'Alger', 'Alger',  # noqa: E731
+                                                  {'download': 15.0}, MONDAY.replace(hour=hour))
+    assert analyse(20).issue == index.IssueType.CONGESTION
+    assert analyse(9).issue == index.IssueType.NORMAL
+    towers.remove(records[0])
+    towers.refresh()
+    assert analyse(20).issue == index.IssueType.NORMAL
+
+
+def test_peak_window_falls_back_to_the_evening_rule(make_record):
+    peaks = index.PeakHourIndex()
+    assert peaks.window('Djezzy', 'Alger', MONDAY.replace(hour=19)) == (18, 23)
+    assert peaks.window('Djezzy', 'Alger', MONDAY.replace(hour=13)) is None
+    # A slow slot at 13:00 among busy daytime hours, with too few samples overall
+    for hour in range(8, 18):
+        for _ in range(18):
+            peaks.add(at(make_record(), MONDAY.replace(hour=hour), 50.0))
+    for _ in range(10):
+        peaks.add(at(make_record(), MONDAY.replace(hour=13), 5.0))
+    peaks.refresh()
+    assert peaks.window('Djezzy', 'Alger', MONDAY.replace(hour=13)) is None
+    for _ in range(peaks.MIN_SAMPLES - 190):
+        peaks.add(at(make_record(), MONDAY.replace(hour=9), 50.0))
+    peaks.refresh()
+    assert peaks.window('Djezzy', 'Alger', MONDAY.replace(hour=13)) == (13, 13)
+    # Learned hours are off-peak; hours without enough samples keep 18:00-23:00
+    assert peaks.window('Djezzy', 'Alger', MONDAY.replace(hour=9)) is None
+    assert peaks.window('Djezzy', 'Alger', MONDAY.replace(hour=19)) == (18, 23)
+    # Other wilayas use the operator profile, other operators the default
+    assert peaks.window('Djezzy', 'Oran', MONDAY.replace(hour=13)) == (13, 13)
+    assert peaks.window('Mobilis', 'Alger', MONDAY.replace(hour=13)) is None
+    assert peaks.window('Mobilis', 'Alger', MONDAY.replace(hour=20)) == (18, 23)
@@ -0,0 +1,43 @@
+import io
+import json
+import math
+
+import pytest
+
+import index
+
+FORM = {'lat': '36.75', 'lon': '3.06', 'rsrp': '-97', 'sinr': '11', 'network': '4G', 'operator': 'Djezzy',
+        'place': 'Indoor', 'Wilaya': 'Alger', 'city': 'Alger'}
+
+
+@pytest.mark.parametrize('args', [
+    (91, 3, -90, 10), (36, -181, -90, 10), (36, 3, -141, 10), (36, 3, -43, 10), (36, 3, -90, 41),
+    (36, 3, -10 ** 400, 10), (math.nan, 3, -90, 10), (36, 3, -90, 10, {'download': -1}),
+    (36, 3, -90, 10, {'ping': 'fast'}), (36, 3, -90, 10, [1, 2]),
+])
+def test_out_of_range_measurements_are_rejected(args):
+    with pytest.raises(ValueError):
+        index.check_measurement(*args)
+
+
+def test_measurement_at_the_limits_is_accepted():
+    index.check_measurement(-90, 180, -140, 40, {'download': 0, 'upload': 10000, 'ping': 60000})
+    index.check_measurement(90, -180, -44, -20, None)
+
+
+@pytest.mark.parametrize('field, value', [('rsrp', '-' + '9' * 400), ('lat', '95'), ('sinr', '-50'),
+                                          ('speed_data', '{"download": 1e999}')])
+def test_form_rejects_out_of_range_values(history, field, value):
+    response = index.app.test_client().post('/', data=dict(FORM, **{field: value}))
+    assert response.status_code == 200
+    assert 'خطأ في البيانات' in response.get_data(as_text=True)
+    assert len(history) == 0
+
+
+def test_import_reports_out_of_range_rows(history):
+    rows = [dict(lat=36.7, lon=3.0, rsrp=-95, sinr=12), dict(lat=36.7, lon=3.0, rsrp=-400, sinr=12),
+            dict(lat=36.7, lon=3.0, rsrp=-95, sinr=12, speed_data={'download': 10, 'ping': -5})]
+    body = '\n'.join(json.dumps(row) for row in rows).encode()
+    progress = list(index.import_measurements(io.BytesIO(body), 'ndjson'))[-1]
+    assert (progress['imported'], progress['errors']) == (1, 2) and len(history) == 1
+    assert [sample['row'] for sample in progress['error_samples']] == [2, 3]
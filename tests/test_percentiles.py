@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+import index
+
+FRACTIONS = [i / 100 for i in range(1, 100)]
+
+
+def rank_errors(sketch, n):
+    """Largest |rank fraction - fraction| of the sketch's answers over a permutation of range(n)"""
+    return max(abs(value / n - fraction) for value, fraction in zip(sketch.quantiles(FRACTIONS), FRACTIONS))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rank_error_stays_within_bound(seed):
+    random.seed(seed)
+    n = 100_000
+    values = list(range(n))
+    random.shuffle(values)
+    sketch = index.KLLSketch(k=200)
+    for value in values:
+        sketch.update(value)
+    assert sketch.count == n and sketch.size <= sketch.max_size < 3 * sketch.k
+    assert rank_errors(sketch, n) < 0.02
+
+
+def test_merged_sketches_keep_the_bound():
+    random.seed(0)
+    n = 50_000
+    values = list(range(n))
+    random.shuffle(values)
+    left, right = index.KLLSketch(), index.KLLSketch()
+    for value in values[:n // 3]:
+        left.update(value)
+    for value in values[n // 3:]:
+        right.update(value)
+    merged = left.merge(right)
+    assert merged.count == n and merged.size < merged.max_size
+    assert rank_errors(merged, n) < 0.02
+
+
+def test_empty_sketch_has_no_quantiles():
+    assert index.KLLSketch().quantiles([0.5, 0.95]) == [None, None]
+
+
+def test_percentiles_group_and_clear(make_record):
+    percentiles = index.PercentileIndex()
+    records = [make_record() for _ in range(200)]
+    for record in records:
+        percentiles.add(record)
+    by_operator = percentiles.percentiles('operator')
+    assert set(by_operator) == {record.operator for record in records}
+    assert sum(group['rsrp']['count'] for group in by_operator.values()) == 200
+    overall = percentiles.percentiles('all')['all']['rsrp']
+    rsrps = sorted(record.rsrp for record in records)
+    assert overall['count'] == 200 and (overall['p5'], overall['p50'], overall['p95']) == (
+        rsrps[9], rsrps[99], rsrps[189])
+    # A sketch cannot forget items: removals are ignored, clearing resets
+    percentiles.remove(records[0])
+    assert percentiles.percentiles('all')['all']['rsrp']['count'] == 200
+    percentiles.clear()
+    assert percentiles.percentiles('operator') == {}
+    assert percentiles.percentiles('all')['all']['rsrp'] == {'count': 0, 'p5': None, 'p50': None, 'p95': None}
+
+
+def test_clearing_the_history_resets_the_sketches(history, make_record):
+    history.add_many([make_record() for _ in range(20)])
+    with history.reading(index.analytics_percentiles) as percentiles:
+        assert percentiles.percentiles('all')['all']['sinr']['count'] == 20
+    history.clear()
+    with history.reading(index.analytics_percentiles) as percentiles:
+        assert percentiles.sketches == {}
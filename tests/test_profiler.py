@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+import index
+
+PROFILED = {'X-Isharati-Profile': 'secret'}
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(index, 'ADMIN_TOKEN', 'secret')
+    profiler = index.RequestProfiler(index.request_profiler.wsgi_app, sample_rate=0)
+    monkeypatch.setattr(index.app, 'wsgi_app', profiler)
+    return profiler
+
+
+def test_profile_is_recorded_when_the_response_closes(profiler):
+    response = index.app.test_client().get('/guide', headers=PROFILED, buffered=False)
+    assert not profiler.profiles
+    response.close()
+    assert [p['path'] for p in profiler.summaries()] == ['/guide']
+
+
+def test_overlapping_request_runs_unprofiled(profiler):
+    client = index.app.test_client()
+    first = client.get('/guide', headers=PROFILED, buffered=False)
+    with client.get('/guide', headers=PROFILED) as second:
+        assert second.status_code == 200
+    assert not profiler.profiles
+    first.close()
+    assert len(profiler.profiles) == 1
+    client.get('/guide', headers=PROFILED).close()
+    assert len(profiler.profiles) == 2
+
+
+def test_failure_to_start_profiling_cleans_up(profiler, monkeypatch):
+    def busy(self):
+        raise ValueError("Another profiling tool is already active")
+    monkeypatch.setattr(index.cProfile.Profile, 'enable', busy)
+    threads = threading.active_count()
+    with pytest.raises(ValueError):
+        index.app.test_client().get('/guide', headers=PROFILED)
+    assert threading.active_count() == threads
+    monkeypatch.undo()
+    # The profiling slot was released
+    assert profiler._active.acquire(blocking=False)
+    profiler._active.release()
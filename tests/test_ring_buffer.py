@@ -0,0 +1,76 @@
+import pytest
+
+import index
+
+
+class RecordingIndex:
+    """Secondary index that only tracks which record ids it holds"""
+    def __init__(self):
+        self.ids = set()
+
+    def add(self, record):
+        self.ids.add(record.id)
+
+    def remove(self, record):
+        self.ids.remove(record.id)
+
+    def clear(self):
+        self.ids.clear()
+
+
+def ids(store):
+    return [record.id for record in store.snapshot()]
+
+
+def test_oldest_records_are_evicted_from_a_full_history(make_record):
+    seen = RecordingIndex()
+    store = index.AnalyticsStore([seen], capacity=3)
+    for _ in range(5):
+        assert store.add(make_record())
+    assert ids(store) == ['r4', 'r3', 'r2']
+    assert store.evicted == 2 and store.get('r0') is None
+    with store.reading(seen):
+        assert seen.ids == {'r2', 'r3', 'r4'}
+
+
+def test_reject_policy_turns_new_records_away(make_record):
+    store = index.AnalyticsStore(capacity=2, eviction='reject')
+    assert store.add(make_record()) and store.add(make_record())
+    assert not store.add(make_record())
+    assert ids(store) == ['r1', 'r0'] and store.rejected == 1
+
+
+def test_deleted_slots_are_reused_in_order(make_record):
+    store = index.AnalyticsStore(capacity=4)
+    records = [make_record() for _ in range(4)]
+    store.add_many(records)
+    store.remove('r1')
+    store.remove('r2')
+    store.add(make_record())
+    store.add(make_record())
+    assert ids(store) == ['r5', 'r4', 'r3', 'r0']
+    assert store.evicted == 0
+    store.add(make_record())
+    assert ids(store) == ['r6', 'r5', 'r4', 'r3']
+
+
+def test_batch_larger_than_the_capacity_keeps_its_newest_records(make_record):
+    store = index.AnalyticsStore(capacity=3)
+    assert store.add_many([make_record() for _ in range(5)]) == 3
+    assert ids(store) == ['r4', 'r3', 'r2'] and store.evicted == 2
+
+
+def test_iterating_a_published_view_survives_later_writes(make_record):
+    store = index.AnalyticsStore(capacity=3)
+    store.add_many([make_record() for _ in range(3)])
+    walk = store.iter_records()
+    assert next(walk).id == 'r2'
+    store.add(make_record())
+    # r0 was evicted and its slot reused after the walk started: it is skipped, not misread
+    assert [record.id for record in walk] == ['r1']
+
+
+@pytest.mark.parametrize('capacity, eviction', [(0, 'oldest'), (3, 'newest')])
+def test_invalid_configuration_is_refused(capacity, eviction):
+    with pytest.raises(ValueError):
+        index.AnalyticsStore(capacity=capacity, eviction=eviction)
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+import index
+
+
+@pytest.fixture
+def clustered(make_record):
+    """Factory of records moved into a ~2 km square of Algiers, dense enough for cells, rasters and zones"""
+    rng = random.Random(1)
+
+    def make(count):
+        records = [make_record() for _ in range(count)]
+        for record in records:
+            record.lat, record.lon = 36.74 + rng.random() * 0.02, 3.04 + rng.random() * 0.02
+        return records
+    return make
+
+
+def rebuilt(cls, records, **options):
+    fresh = cls(**options)
+    for record in records:
+        fresh.add(record)
+    return fresh
+
+
+def test_tiles_after_adds_and_deletes_match_a_rebuild(clustered):
+    tiles = index.TileIndex()
+    records = clustered(300)
+    for record in records:
+        tiles.add(record)
+    keys = sorted(key for key in tiles.tiles if key[0] == 'all' and key[1] == 14)
+    before = {key: tiles.tile_json(*key)[1] for key in keys}
+    for record in records[::3]:
+        tiles.remove(record)
+    fresh = rebuilt(index.TileIndex, [record for i, record in enumerate(records) if i % 3])
+    assert {key: tile['cells'] for key, tile in tiles.tiles.items() if tile['cells']} == \
+        {key: tile['cells'] for key, tile in fresh.tiles.items()}
+    # Cached renders were invalidated by the deletes
+    after = {key: tiles.tile_json(*key)[1] for key in keys}
+    assert after != before and after == {key: fresh.tile_json(*key)[1] for key in keys}
+
+
+def test_interpolated_raster_after_adds_and_deletes_matches_a_rebuild(clustered):
+    np = pytest.importorskip('numpy')
+    bounds = (36.73, 3.03, 36.77, 3.07)
+    interpolator = index.CoverageInterpolator()
+    records = clustered(300)
+    for record in records[:200]:
+        interpolator.add(record)
+    before = interpolator.raster(*bounds, size=32).copy()
+    interpolator.raster(*bounds, size=32, operator='Djezzy')
+    # The cached raster is patched in place, only around the changed samples
+    for record in records[200:]:
+        interpolator.add(record)
+    for record in records[::4]:
+        interpolator.remove(record)
+    after = interpolator.raster(*bounds, size=32)
+    fresh = rebuilt(index.CoverageInterpolator, [record for i, record in enumerate(records) if i % 4])
+    assert not np.allclose(after, before)
+    assert np.allclose(after, fresh.raster(*bounds, size=32))
+    assert any(record.operator == 'Djezzy' for record in records[::4])
+    assert np.allclose(interpolator.raster(*bounds, size=32, operator='Djezzy'),
+                       fresh.raster(*bounds, size=32, operator='Djezzy'))
+
+
+def test_dead_zones_after_adds_and_deletes_match_a_rebuild(clustered):
+    dead_zones = index.DeadZoneIndex()
+    records = clustered(400)
+    # Interleave queries with the adds, so zones are linked incrementally and cached in between
+    for start in range(0, len(records), 100):
+        for record in records[start:start + 100]:
+            dead_zones.add(record)
+        assert dead_zones.zones(limit=100) == rebuilt(index.DeadZoneIndex, records[:start + 100]).zones(limit=100)
+    bulk = index.DeadZoneIndex()
+    bulk.add_many(records)
+    assert len(dead_zones.zones(limit=100)) > 1 and bulk.zones(limit=100) == dead_zones.zones(limit=100)
+    for record in records[::3]:
+        dead_zones.remove(record)
+    survivors = [record for i, record in enumerate(records) if i % 3]
+    assert dead_zones.zones(limit=100) == rebuilt(index.DeadZoneIndex, survivors).zones(limit=100)
+    assert dead_zones.zones('Djezzy') == rebuilt(index.DeadZoneIndex, survivors).zones('Djezzy')